@@ -3,19 +3,35 @@
 Aplikasi Web dengan Flask - Integrated with MongoDB and Neo4j
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+from src.startup import startup_report
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, Response, stream_with_context, make_response
 from datetime import datetime
+from functools import wraps
+import logging
 import os
+import time
 from config import Config
-import uuid
-from werkzeug.utils import secure_filename
 from src.auth import AuthManager, UserActivityTracker, login_required, admin_required
-from neo4j import GraphDatabase
-from bson import ObjectId
+from src.images import image_pipeline
+from src.assets import static_assets
+from src.fragment_cache import fragment_cache
+from src.pools import pool_stats
+from src.metrics import metrics
+from src.logs import app_logging, log_debug, log_warning
 
 # Try to import database modules, but handle gracefully if they fail
 try:
-    from src.database import mongodb, neo4j_db
+    from src.database import mongodb, neo4j_db, product_catalog, product_ids, encode_cursor, decode_cursor, warm_up_databases
+    from src.leaderboard import featured_leaderboard
+    from src.search import product_search
+    from src.cart import hydrate_cart, build_order_items
+    from src.fanout import recommendation_fanout
+    from src.similarity import coview_similarity, content_similarity
+    from src.bought_together import bought_together
+    from src.cache import recommendation_cache, user_cache
+    from src.events import activity_events
+    from src.schema import schema_manager
+    from src.catalog_import import catalog_importer, feed_format
     DB_AVAILABLE = True
 except ImportError as e:
     print(f"⚠️  Warning: Database modules not available: {e}")
@@ -50,6 +66,10 @@ except ImportError as e:
         @staticmethod
         def track_add_to_cart(user_id, product_id, data):
             pass
+
+        @staticmethod
+        def track_order(user_id, order_doc):
+            pass
         
         @staticmethod
         def get_user_activity(user_id):
@@ -66,13 +86,83 @@ except ImportError as e:
 app = Flask(__name__)
 app.config.from_object(Config)
 
-UPLOAD_FOLDER = 'static/uploads'
+# Log JSON terstruktur via antrian + thread penulis, dengan request id per request
+log = logging.getLogger('app_web')
+app_logging.init_app(app)
+
+UPLOAD_FOLDER = Config.UPLOAD_FOLDER
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
+# Asset static ber-fingerprint di /assets (cache immutable, ETag, gzip/brotli)
+static_assets.init_app(app)
+
+# Cache fragmen template {% cache %}: kunci selalu ikut versi katalog
+fragment_cache.init_app(app, version_source=(lambda: product_catalog.version) if DB_AVAILABLE else None)
+
+def image_variant(image_url, name):
+    """URL asset varian gambar produk untuk template"""
+    return static_assets.url_for_static(image_pipeline.variant_url(image_url, name))
+
+def image_srcset(image_url):
+    """Nilai atribut srcset dengan URL asset"""
+    return ', '.join(
+        f"{static_assets.url_for_static(url)} {width}w" for width, url in image_pipeline.variants(image_url)
+    )
+
+# Metrik Prometheus di /metrics: latensi per route/query ditambah statistik komponen
+metrics.init_app(app)
+metrics.register('assets', static_assets.stats)
+metrics.register('fragment_cache', fragment_cache.stats)
+metrics.register('image_pipeline', image_pipeline.stats)
+metrics.register('pool', pool_stats)
+metrics.register('logging', app_logging.stats)
+if DB_AVAILABLE:
+    metrics.register('catalog', product_catalog.stats)
+    metrics.register('search', product_search.stats)
+    metrics.register('recommendation_cache', recommendation_cache.stats)
+    metrics.register('user_cache', user_cache.stats)
+    metrics.register('fanout', recommendation_fanout.stats)
+    metrics.register('events', activity_events.stats)
+    metrics.register('coview_similarity', coview_similarity.stats)
+    metrics.register('content_similarity', content_similarity.stats)
+
+# Helper template untuk gambar produk: URL varian ukuran dan srcset
+app.jinja_env.globals.update(
+    image_variant=image_variant,
+    image_srcset=image_srcset,
+)
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def warm_caches():
+    """Pre-warm terkontrol sebelum melayani request: koneksi database, index, lalu cache katalog dan index pencarian.
+
+    Tanpa pemanggilan ini koneksi tetap dibuka otomatis saat pertama dipakai.
+    Untuk gunicorn, panggil dari hook `post_fork` agar koneksi dibuat di worker.
+    """
+    if DB_AVAILABLE:
+        if Config.DB_WARMUP_ON_STARTUP:
+            for name, result in warm_up_databases().items():
+                if isinstance(result, float):
+                    startup_report.record(f'connect_{name}', result)
+                else:
+                    startup_report.record(f'connect_{name}', 0.0, result)
+        if Config.SCHEMA_APPLY_ON_STARTUP:
+            with startup_report.phase('schema'):
+                schema_manager.apply()
+        try:
+            with startup_report.phase('catalog'):
+                product_catalog.refresh()
+                featured_leaderboard.top_product_ids()
+            log.info("Catalog loaded: %d products indexed", product_search.stats()['documents'])
+        except Exception as e:
+            log.warning("Could not warm catalog cache: %s", e)
+    startup_report.mark_ready()
+    log.info("Startup ready in %.0f ms", startup_report.ready_seconds * 1000,
+             extra={'startup': startup_report.summary()})
+
 @app.route('/')
 def home():
     """Halaman utama"""
@@ -80,45 +170,32 @@ def home():
     recommendations = []
     all_products = []
     featured_products = []
+    next_cursor = prev_cursor = None
     if DB_AVAILABLE:
         try:
-            # Semua produk
-            all_products = list(mongodb.db.products.find().sort('name', 1))
-            # Produk unggulan: produk yang PERNAH dibeli ATAU PERNAH disukai
-            purchases_pipeline = [
-                {"$group": {"_id": "$product_id", "count": {"$sum": 1}}},
-            ]
-            purchases = list(mongodb.db.purchases.aggregate(purchases_pipeline))
-            likes_pipeline = [
-                {"$match": {"interaction_type": "like"}},
-                {"$group": {"_id": "$product_id", "count": {"$sum": 1}}},
-            ]
-            likes = list(mongodb.db.user_interactions.aggregate(likes_pipeline))
-            def to_str(val):
-                try:
-                    return str(val)
-                except Exception:
-                    return None
-            purchase_count = {to_str(p['_id']): p['count'] for p in purchases if to_str(p['_id']) is not None}
-            like_count = {to_str(l['_id']): l['count'] for l in likes if to_str(l['_id']) is not None}
-            union_ids = set(purchase_count.keys()) | set(like_count.keys())
-            combined = [(pid, purchase_count.get(pid, 0) + like_count.get(pid, 0)) for pid in union_ids]
-            combined.sort(key=lambda x: x[1], reverse=True)
-            featured_ids = [pid for pid, _ in combined][:5]
+            # Satu halaman produk (keyset pagination pada nama, id)
+            all_products, next_key, prev_key = product_catalog.page(
+                Config.HOME_PAGE_SIZE,
+                after=decode_cursor(request.args.get('after')),
+                before=decode_cursor(request.args.get('before'))
+            )
+            next_cursor = encode_cursor(next_key) if next_key else None
+            prev_cursor = encode_cursor(prev_key) if prev_key else None
+            # Produk unggulan: skor pembelian + like tertinggi dari leaderboard
+            featured_ids = featured_leaderboard.top_product_ids(10)
             if featured_ids:
-                featured_products = [p for p in all_products if to_str(p.get('id')) in featured_ids]
-                featured_products.sort(key=lambda p: featured_ids.index(to_str(p.get('id'))))
-            else:
-                featured_products = []
+                featured_products = [product_catalog.get(pid) for pid in featured_ids]
+                featured_products = [p for p in featured_products if p][:5]
         except Exception as e:
-            print(f"Error fetching products from MongoDB: {e}")
+            log.error("Error fetching products from MongoDB: %s", e)
             flash('Tidak dapat memuat produk dari database.', 'error')
     if current_user and DB_AVAILABLE:
         try:
             recommendations = neo4j_db.get_user_recommendations(current_user['user_id'])
         except Exception as e:
-            print(f"Warning: Could not get recommendations: {e}")
-    return render_template('index.html', products=all_products, user=current_user, recommendations=recommendations, featured_products=featured_products)
+            log_warning(log, 'home_recommendations', "Could not get recommendations: %s", e)
+    return render_template('index.html', products=all_products, user=current_user, recommendations=recommendations, featured_products=featured_products,
+                           next_cursor=next_cursor, prev_cursor=prev_cursor)
 
 @app.route('/product/<int:product_id>')
 def product_detail(product_id):
@@ -127,18 +204,15 @@ def product_detail(product_id):
     product = None
     if DB_AVAILABLE:
         try:
-            product = mongodb.db.products.find_one({'id': product_id})
-            print(f"[DEBUG] Product detail request for ID: {product_id}")
-            print(f"[DEBUG] Product found: {product is not None}")
-            if product:
-                print(f"[DEBUG] Product name: {product.get('name', 'N/A')}")
-        except Exception as e:
-            print(f"[ERROR] Error fetching product {product_id}: {e}")
+            product = product_catalog.get(product_id)
+            log_debug(log, 'product_detail', "Product detail request", product_id=product_id, found=product is not None)
+        except Exception:
+            log.exception("Error fetching product %s", product_id)
             flash('Terjadi kesalahan saat memuat produk.', 'error')
             return redirect(url_for('home'))
 
     if not product:
-        print(f"[DEBUG] Product {product_id} not found")
+        log_debug(log, 'product_not_found', "Product not found", product_id=product_id)
         flash('Produk tidak ditemukan.', 'error')
         return redirect(url_for('home'))
 
@@ -157,49 +231,24 @@ def product_detail(product_id):
             {'product_name': product.get('name')}
         )
 
-    # Ambil rekomendasi
+    # Ambil rekomendasi: semua sumber dijalankan paralel dengan batas waktu bersama,
+    # sumber yang gagal/timeout menghasilkan list kosong (tidak kritis untuk halaman)
     similar_products_content = []
     similar_products_collab = []
     frequently_bought_together = []
     if DB_AVAILABLE:
-        try:
-            # Rekomendasi berdasarkan konten (kategori/tags)
-            try:
-                similar_products_content = neo4j_db.get_content_based_similar_products(str(product_id))
-            except Exception as e:
-                print(f"[WARNING] Error get_content_based_similar_products for product {product_id}: {e}")
-                similar_products_content = []
-            # Rekomendasi berdasarkan kolaborasi (pengguna lain)
-            try:
-                similar_products_collab = neo4j_db.get_similar_products(str(product_id))
-            except Exception as e:
-                print(f"[WARNING] Error get_similar_products for product {product_id}: {e}")
-                similar_products_collab = []
-            # Rekomendasi berdasarkan pembelian bersama
-            try:
-                frequently_bought_together = neo4j_db.get_frequently_bought_together(str(product_id))
-            except Exception as e:
-                print(f"[WARNING] Error get_frequently_bought_together for product {product_id}: {e}")
-                frequently_bought_together = []
-        except Exception as e:
-            print(f"[WARNING] Error getting recommendations for product {product_id}: {e}")
-            # Jangan tampilkan flash message untuk rekomendasi yang gagal
-            # karena ini tidak kritis untuk menampilkan halaman produk
-            
-    # Ambil produk sejenis berdasarkan tags
-    similar_products_content = []
-    if DB_AVAILABLE and product.get('tags'):
-        try:
-            # Cari produk lain yang memiliki minimal satu tag yang sama, dan bukan produk ini sendiri
-            similar_products_content = list(
-                mongodb.db.products.find({
-                    'tags': {'$in': product['tags']},
-                    'id': {'$ne': product['id']}
-                }).limit(6)
-            )
-        except Exception as e:
-            print(f'[WARNING] Error fetching similar products by tags: {e}')
-            similar_products_content = []
+        pid = str(product_id)
+        recommendations = recommendation_fanout.gather({
+            # Store co-view offline jika sudah dibangun, jika belum traversal Neo4j
+            'collab': lambda: (coview_similarity.similar_products(pid) if coview_similarity.available
+                               else neo4j_db.get_similar_products(pid)),
+            'bought_together': lambda: (bought_together.companions(pid) if bought_together.available
+                                        else neo4j_db.get_frequently_bought_together(pid)),
+        })
+        similar_products_collab = recommendations['collab']
+        frequently_bought_together = recommendations['bought_together']
+        # Produk sejenis berdasarkan tag/kategori: satu baca dari index di memori
+        similar_products_content = content_similarity.similar_products(product['id'])
 
     return render_template(
         'product_detail.html', 
@@ -234,12 +283,8 @@ def add_product():
         if 'image_file' in request.files:
             file = request.files['image_file']
             if file and allowed_file(file.filename):
-                filename = secure_filename(f"{uuid.uuid4().hex}_{file.filename}")
-                upload_path = os.path.join(app.config['UPLOAD_FOLDER'])
-                if not os.path.exists(upload_path):
-                    os.makedirs(upload_path)
-                file.save(os.path.join(upload_path, filename))
-                image_url = url_for('static', filename=f'uploads/{filename}')
+                # Disimpan per hash konten; thumbnail dibuat di background
+                image_url = url_for('static', filename=image_pipeline.save_upload(file))
 
         # Validasi wajib
         if not form_name or not form_price:
@@ -248,16 +293,15 @@ def add_product():
 
         try:
             products_collection = mongodb.get_collection('products')
-            # Penentuan ID produk
+            # Penentuan ID produk (counter atomik, aman untuk beberapa admin/import sekaligus)
             if not form_id:
-                last_product = products_collection.find_one(sort=[("id", -1)])
-                next_id = (last_product['id'] + 1) if last_product and last_product.get('id') else 1
-                product_id = next_id
+                product_id = product_ids.allocate()[0]
             else:
                 try:
                     product_id = int(form_id)
                 except (ValueError, TypeError):
                     product_id = 1
+                product_ids.observe(product_id)
 
             # Konversi price
             try:
@@ -285,6 +329,7 @@ def add_product():
             }
 
             products_collection.insert_one(product_doc.copy())
+            product_catalog.upsert(product_doc)
             neo4j_db.create_product_node(str(product_doc['id']), product_doc)
 
             flash('Produk berhasil ditambahkan!', 'success')
@@ -370,7 +415,7 @@ def profile():
                 'status': 'selesai'
             }).sort('created_at', -1))
         except Exception as e:
-            print(f"Warning: could not get user activity: {e}")
+            log.warning("Could not get user activity: %s", e)
             flash(f'Gagal memuat aktivitas pengguna: {e}', 'warning')
     return render_template('profile.html', user=current_user, activity=activity, order_history=order_history)
 
@@ -392,17 +437,7 @@ def view_cart():
     cart_items = []
     total = 0
     if DB_AVAILABLE and cart:
-        for product_id, item in cart.items():
-            product = mongodb.db.products.find_one({'id': int(product_id)})
-            if product:
-                quantity = item.get('quantity', 1)
-                subtotal = product['price'] * quantity
-                total += subtotal
-                cart_items.append({
-                    'product': product,
-                    'quantity': quantity,
-                    'subtotal': subtotal
-                })
+        cart_items, total = hydrate_cart(cart)
     return render_template('cart.html', cart_items=cart_items, total=total, user=AuthManager.get_current_user())
 
 @app.route('/cart/checkout', methods=['GET', 'POST'])
@@ -415,21 +450,8 @@ def checkout_cart():
         if DB_AVAILABLE and cart and current_user:
             try:
                 # Siapkan data pesanan
-                order_items = []
-                total = 0
-                for product_id, item in cart.items():
-                    product = mongodb.db.products.find_one({'id': int(product_id)})
-                    if product:
-                        quantity = item.get('quantity', 1)
-                        subtotal = product['price'] * quantity
-                        total += subtotal
-                        order_items.append({
-                            'product_id': product['id'],
-                            'name': product['name'],
-                            'price': product['price'],
-                            'quantity': quantity,
-                            'subtotal': subtotal
-                        })
+                cart_items, total = hydrate_cart(cart)
+                order_items = build_order_items(cart_items)
                 order_doc = {
                     'user_id': current_user['user_id'],
                     'user_name': current_user.get('name', ''),
@@ -441,6 +463,8 @@ def checkout_cart():
                 }
                 mongodb.db.orders.insert_one(order_doc)
                 session['cart'] = {}
+                # Counter "sering dibeli bersama" diperbarui di background
+                UserActivityTracker.track_order(current_user['user_id'], order_doc)
                 flash('Checkout berhasil! Pesanan Anda sedang diproses admin.', 'success')
                 return redirect(url_for('home'))
             except Exception as e:
@@ -454,17 +478,7 @@ def checkout_cart():
     cart_items = []
     total = 0
     if DB_AVAILABLE and cart:
-        for product_id, item in cart.items():
-            product = mongodb.db.products.find_one({'id': int(product_id)})
-            if product:
-                quantity = item.get('quantity', 1)
-                subtotal = product['price'] * quantity
-                total += subtotal
-                cart_items.append({
-                    'product': product,
-                    'quantity': quantity,
-                    'subtotal': subtotal
-                })
+        cart_items, total = hydrate_cart(cart)
     return render_template('checkout.html', cart_items=cart_items, total=total, user=AuthManager.get_current_user())
 
 @app.route('/product/<int:product_id>/edit', methods=['GET', 'POST'])
@@ -490,12 +504,7 @@ def edit_product(product_id):
             if 'image_file' in request.files:
                 file = request.files['image_file']
                 if file and allowed_file(file.filename):
-                    filename = secure_filename(f"{uuid.uuid4().hex}_{file.filename}")
-                    upload_path = os.path.join(app.config['UPLOAD_FOLDER'])
-                    if not os.path.exists(upload_path):
-                        os.makedirs(upload_path)
-                    file.save(os.path.join(upload_path, filename))
-                    image_url = url_for('static', filename=f'uploads/{filename}')
+                    image_url = url_for('static', filename=image_pipeline.save_upload(file))
             try:
                 price = int(form_price) if form_price is not None else 0
             except (ValueError, TypeError):
@@ -511,6 +520,7 @@ def edit_product(product_id):
                 'updated_at': datetime.now(),
             }
             products_collection.update_one({'id': product_id}, {'$set': update_doc})
+            product_catalog.upsert({**product, **update_doc})
             neo4j_db.create_product_node(str(product_id), update_doc)
             flash('Produk berhasil diperbarui!', 'success')
             return redirect(url_for('product_detail', product_id=product_id))
@@ -532,7 +542,9 @@ def delete_product(product_id):
         flash('Produk tidak ditemukan.', 'error')
         return redirect(url_for('home'))
     products_collection.delete_one({'id': product_id})
+    product_catalog.remove(product_id)
     neo4j_db.delete_product_node(str(product_id))
+    featured_leaderboard.remove(product_id)
     flash('Produk berhasil dihapus.', 'success')
     return redirect(url_for('home'))
 
@@ -550,49 +562,102 @@ def remove_from_cart(product_id):
 
 # === API Endpoints ===
 
+CATALOG_CACHE_CONTROL = (
+    f"public, max-age={Config.CATALOG_API_MAX_AGE}, s-maxage={Config.CATALOG_API_SHARED_MAX_AGE}, "
+    f"stale-while-revalidate={Config.CATALOG_API_STALE_WHILE_REVALIDATE}"
+)
+
+def catalog_conditional(view):
+    """Decorator API katalog: ETag dari versi katalog dan 304 untuk If-None-Match.
+
+    Respons hanya bergantung pada URL dan isi katalog, jadi versi katalog
+    (dinaikkan setiap produk ditambah/diubah/dihapus) cukup sebagai validator.
+    Request yang ETag-nya masih cocok dijawab 304 tanpa menjalankan view:
+    tanpa query produk dan tanpa serialisasi JSON. Respons yang sudah
+    mengatur Cache-Control sendiri (misal jawaban error) tidak diberi ETag.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = product_catalog.version if DB_AVAILABLE else None
+        if version is None:
+            return view(*args, **kwargs)
+        etag = f"catalog-{version}"
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or 'Cache-Control' in response.headers:
+                return response
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = CATALOG_CACHE_CONTROL
+        return response
+    return wrapper
+
+def stream_products_json(after=None):
+    """Menulis array JSON produk satu per satu selama cursor MongoDB menghasilkan data"""
+    yield '['
+    first = True
+    for product in mongodb.iter_products(after=after):
+        yield ('' if first else ',') + app.json.dumps(product)
+        first = False
+    yield ']'
+
 @app.route('/api/products')
+@catalog_conditional
 def api_products():
-    """API untuk mendapatkan data produk"""
+    """API untuk mendapatkan data produk.
+
+    Parameter: `limit` (ukuran halaman), `after`/`before` (cursor dari header
+    `X-Next-Cursor`/`X-Prev-Cursor` atau `Link`), dan `stream=1` untuk mengirim
+    seluruh katalog (mulai dari `after`) sebagai JSON yang di-stream.
+    """
     if DB_AVAILABLE:
         try:
-            all_products = list(mongodb.db.products.find().sort('name', 1))
-            return jsonify(all_products)
+            after = decode_cursor(request.args.get('after'))
+            if request.args.get('stream') in ('1', 'true'):
+                return Response(stream_with_context(stream_products_json(after)), mimetype='application/json')
+            limit = request.args.get('limit', Config.API_PAGE_SIZE, type=int)
+            limit = max(1, min(limit, Config.API_MAX_PAGE_SIZE))
+            products, next_key, prev_key = product_catalog.page(
+                limit, after=after, before=decode_cursor(request.args.get('before'))
+            )
+            response = jsonify(products)
+            links = []
+            if next_key:
+                response.headers['X-Next-Cursor'] = encode_cursor(next_key)
+                links.append(f'<{url_for("api_products", limit=limit, after=encode_cursor(next_key))}>; rel="next"')
+            if prev_key:
+                response.headers['X-Prev-Cursor'] = encode_cursor(prev_key)
+                links.append(f'<{url_for("api_products", limit=limit, before=encode_cursor(prev_key))}>; rel="prev"')
+            if links:
+                response.headers['Link'] = ', '.join(links)
+            return response
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     return jsonify([])
 
 @app.route('/api/search')
+@catalog_conditional
 def search_products():
     """API untuk mencari produk"""
     query = request.args.get('q', '').strip()
-    print(f"[DEBUG] Search query: '{query}'")
+    limit = request.args.get('limit', Config.SEARCH_RESULT_LIMIT, type=int)
+    limit = max(1, min(limit, Config.SEARCH_MAX_RESULT_LIMIT))
     if DB_AVAILABLE:
         try:
-            all_products = list(mongodb.db.products.find().sort('name', 1))
-            print(f"[DEBUG] All products fetched: {len(all_products)}")
             if query:
-                filtered = []
-                for p in all_products:
-                    name = p.get('name', '')
-                    desc = p.get('description', '')
-                    if (isinstance(name, str) and query.lower() in name.lower()) or \
-                       (isinstance(desc, str) and query.lower() in desc.lower()):
-                        filtered.append(p)
-                print(f"[DEBUG] Products after filtering: {len(filtered)}")
-                for p in filtered:
-                    if '_id' in p and isinstance(p['_id'], ObjectId):
-                        p['_id'] = str(p['_id'])
-                return jsonify(filtered)
+                results = product_search.search(query, limit)
+                log_debug(log, 'search', "Search", query=query, results=len(results))
+                return jsonify(results)
             else:
-                for p in all_products:
-                    if '_id' in p and isinstance(p['_id'], ObjectId):
-                        p['_id'] = str(p['_id'])
-                return jsonify(all_products)
-        except Exception as e:
-            print(f"[ERROR] Search exception: {e}")
-            # Always return a list, even on error
-            return jsonify([])
-    print("[ERROR] DB not available")
+                return jsonify(product_catalog.page(limit)[0])
+        except Exception:
+            log.exception("Search exception")
+            # Always return a list, even on error (tapi jangan di-cache)
+            response = jsonify([])
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+    log_warning(log, 'search_no_db', "Search: database not available")
     return jsonify([])
 
 @app.route('/api/purchase', methods=['POST'])
@@ -610,7 +675,7 @@ def api_purchase():
         if not product_id:
             return jsonify({'error': 'Product ID is required'}), 400
         # Validasi produk benar-benar ada
-        product = mongodb.db.products.find_one({'id': int(product_id)})
+        product = product_catalog.get(product_id)
         if not product:
             return jsonify({'error': 'Produk tidak ditemukan'}), 404
         try:
@@ -668,13 +733,13 @@ def api_like_product(product_id):
     if not current_user: return jsonify({'error': 'User not found'}), 404
     if DB_AVAILABLE:
         try:
-            product = mongodb.db.products.find_one({'id': product_id})
+            product = product_catalog.get(product_id)
             if not product:
                 return jsonify({'error': 'Product not found'}), 404
             UserActivityTracker.track_like(current_user['user_id'], str(product_id), {'product_name': product['name']})
             return jsonify({'message': 'Product liked successfully'})
-        except Exception as e:
-            print(f"Error liking product: {e}")
+        except Exception:
+            log.exception("Error liking product %s", product_id)
             return jsonify({'error': 'Could not process like'}), 500
     return jsonify({'error': 'Database not available'}), 503
 
@@ -686,7 +751,7 @@ def api_add_to_cart(product_id):
         return jsonify({'error': 'User not found'}), 404
     if DB_AVAILABLE:
         try:
-            product = mongodb.db.products.find_one({'id': product_id})
+            product = product_catalog.get(product_id)
             if not product:
                 return jsonify({'error': 'Product not found'}), 404
             # Simpan ke session keranjang
@@ -698,11 +763,52 @@ def api_add_to_cart(product_id):
             session['cart'] = cart
             UserActivityTracker.track_add_to_cart(current_user['user_id'], str(product_id), {'product_name': product['name'], 'quantity': cart[str(product_id)]['quantity']})
             return jsonify({'message': 'Product added to cart successfully'})
-        except Exception as e:
-            print(f"Error adding to cart: {e}")
+        except Exception:
+            log.exception("Error adding product %s to cart", product_id)
             return jsonify({'error': 'Could not process add to cart'}), 500
     return jsonify({'error': 'Database not available'}), 503
 
+@app.route('/api/admin/pools')
+@admin_required
+@login_required
+def api_pool_stats():
+    """Statistik connection pool MongoDB dan Neo4j (in-use, idle, antrian, latensi pengambilan)"""
+    return jsonify(pool_stats())
+
+@app.route('/api/admin/products/import', methods=['POST'])
+@admin_required
+@login_required
+def api_import_products():
+    """Import produk massal dari file CSV/JSONL (boleh .gz); diproses di background"""
+    if not DB_AVAILABLE:
+        return jsonify({'error': 'Database not available'}), 503
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'error': 'File feed wajib diunggah (field "file")'}), 400
+    fmt = request.form.get('format') or None
+    try:
+        feed_format(upload.filename, fmt)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    path = catalog_importer.save_upload(upload)
+    job = catalog_importer.start(path, fmt, graph=request.form.get('graph', 'true').lower() != 'false',
+                                 source=upload.filename, remove_source=True)
+    log.info("Catalog import %s started from %s", job.id, upload.filename)
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = url_for('api_import_status', job_id=job.id)
+    return response
+
+@app.route('/api/admin/products/import/<job_id>')
+@admin_required
+@login_required
+def api_import_status(job_id):
+    """Status dan progres job import produk"""
+    job = catalog_importer.get_job(job_id) if DB_AVAILABLE else None
+    if job is None:
+        return jsonify({'error': 'Job import tidak ditemukan'}), 404
+    return jsonify(job)
+
 @app.route('/admin/orders')
 @admin_required
 @login_required
@@ -745,7 +851,10 @@ def admin_order_selesai(order_id):
     flash('Status pesanan diubah menjadi selesai.', 'success')
     return redirect(url_for('admin_orders'))
 
+startup_report.record('import', time.perf_counter() - startup_report.started)
+
 if __name__ == '__main__':
     if not os.path.exists('instance'):
         os.makedirs('instance')
+    warm_caches()
     app.run(debug=False, port=5001) 
\ No newline at end of file
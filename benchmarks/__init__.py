@@ -0,0 +1 @@
+# Package benchmark / load test aplikasi web
@@ -0,0 +1,449 @@
+"""
+Generator dataset sintetis skala besar: produk, user, dan interaksi (view, like,
+keranjang, pembelian, pesanan) dengan popularitas produk dan keaktifan user
+berdistribusi Zipf. Hasilnya deterministik untuk seed yang sama.
+
+    python -m benchmarks.datagen --products 100000 --users 200000 --views 20000000
+    python -m benchmarks.datagen --products 10000 --views 1000000 --target files --out data/bench
+"""
+
+import argparse
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+
+# (kategori, bobot, median harga, tag, jenis produk)
+CATEGORIES = [
+    ('Smartphone', 0.22, 3500000, ['android', '5g', 'kamera', 'baterai-besar', 'dual-sim', 'amoled'], ['Phone', 'Smartphone']),
+    ('Aksesoris', 0.20, 150000, ['charger', 'kabel', 'usb-c', 'fast-charging', 'casing', 'powerbank'], ['Charger', 'Kabel', 'Powerbank', 'Casing']),
+    ('Audio', 0.16, 450000, ['bluetooth', 'wireless', 'noise-cancelling', 'bass', 'tws'], ['Earbuds', 'Headphone', 'Speaker']),
+    ('Laptop', 0.12, 9000000, ['gaming', 'ultrabook', 'ssd', 'intel', 'amd', 'kerja'], ['Laptop', 'Notebook']),
+    ('Tablet', 0.07, 4000000, ['android', 'stylus', 'wifi', 'lte'], ['Tab', 'Pad']),
+    ('Smartwatch', 0.07, 1200000, ['fitness', 'gps', 'amoled', 'tahan-air'], ['Watch', 'Band']),
+    ('Monitor', 0.06, 2500000, ['ips', '144hz', '4k', 'gaming', 'ultrawide'], ['Monitor']),
+    ('Kamera', 0.05, 7000000, ['mirrorless', '4k', 'lensa', 'vlog'], ['Kamera', 'Action Cam']),
+    ('Gaming', 0.05, 800000, ['konsol', 'controller', 'rgb', 'mekanikal'], ['Keyboard', 'Mouse', 'Controller']),
+]
+BRANDS = ['Samsung', 'Xiaomi', 'Oppo', 'Vivo', 'Asus', 'Lenovo', 'Acer', 'Sony', 'JBL', 'Anker',
+          'Logitech', 'Realme', 'Apple', 'HP', 'Dell', 'Canon', 'Huawei']
+MODELS = ['Pro', 'Lite', 'Max', 'Plus', 'Air', 'Ultra', 'Neo', 'SE']
+FIRST_NAMES = ['Budi', 'Siti', 'Agus', 'Dewi', 'Rizky', 'Putri', 'Andi', 'Rina', 'Fajar', 'Ayu', 'Dimas', 'Nur']
+LAST_NAMES = ['Santoso', 'Wijaya', 'Pratama', 'Lestari', 'Saputra', 'Hidayat', 'Kusuma', 'Nugroho']
+
+# Password semua user hasil generator (untuk login saat load test)
+DEFAULT_PASSWORD = 'benchmark123'
+
+# Field tanggal yang dikembalikan menjadi datetime saat memuat file JSONL
+DATETIME_FIELDS = ('created_at', 'updated_at', 'viewed_at', 'interacted_at', 'purchase_date')
+
+# Urutan koleksi yang ditulis generator
+COLLECTIONS = ('products', 'users', 'product_views', 'user_interactions', 'purchases', 'orders')
+
+class ZipfSampler:
+    """Sampling indeks 0..n-1 dengan peluang peringkat k sebanding 1/k^exponent.
+
+    Peringkat diacak ke indeks (lewat `ranking_rng`) agar item populer tidak
+    selalu berindeks kecil; urutan popularitas sama untuk seed yang sama.
+    Memakai `random.choices` dengan bobot kumulatif (bisect), jadi satu sampel O(log n).
+    """
+
+    def __init__(self, n, exponent, ranking_rng, rng):
+        self.items = list(range(n))
+        ranking_rng.shuffle(self.items)
+        self.cum_weights = list(accumulate(1.0 / (rank ** exponent) for rank in range(1, n + 1)))
+        self.rng = rng
+
+    def sample(self, k):
+        return self.rng.choices(self.items, cum_weights=self.cum_weights, k=k)
+
+    def ranked(self):
+        """Indeks terurut dari yang paling populer"""
+        return self.items
+
+class DatasetGenerator:
+    """Membuat dokumen dengan bentuk yang sama seperti yang ditulis aplikasi.
+
+    View mengikuti Zipf pada produk dan user; sebagian view berlanjut menjadi
+    like, tambah ke keranjang, dan pembelian (`*_rate`, peluang per view).
+    Pesanan berisi satu produk utama ditambah produk populer dari kategori
+    yang sama, sehingga tabel "sering dibeli bersama" punya sinyal.
+    """
+
+    def __init__(self, products=1000, users=1000, views=100000, orders=None, like_rate=0.05, cart_rate=0.08,
+                 purchase_rate=0.02, product_exponent=1.07, user_exponent=0.8, seed=42,
+                 start=datetime(2024, 1, 1), days=90, first_product_id=1):
+        self.product_count = products
+        self.user_count = users
+        self.view_count = views
+        self.order_count = views // 100 if orders is None else orders
+        self.like_rate = like_rate
+        self.cart_rate = cart_rate
+        self.purchase_rate = purchase_rate
+        self.product_exponent = product_exponent
+        self.user_exponent = user_exponent
+        self.seed = seed
+        self.start = start
+        self.span_seconds = days * 86400
+        self.first_product_id = first_product_id
+        self._products = None
+        self._user_ids = None
+
+    def _rng(self, name):
+        return random.Random(f"{self.seed}:{name}")
+
+    # --- Entitas ---
+
+    def _build_products(self):
+        rng = self._rng('products')
+        categories = rng.choices(CATEGORIES, weights=[c[1] for c in CATEGORIES], k=self.product_count)
+        products = []
+        for index, (category, _, median_price, tags, kinds) in enumerate(categories):
+            brand = rng.choice(BRANDS)
+            kind = rng.choice(kinds)
+            product_tags = rng.sample(tags, rng.randint(2, min(4, len(tags)))) + [brand.lower()]
+            products.append({
+                'id': self.first_product_id + index,
+                'name': f"{brand} {kind} {rng.choice(MODELS)} {rng.randint(1, 99)}",
+                'category': category,
+                'description': f"{kind} {brand} dengan fitur {', '.join(product_tags[:-1])}.",
+                'price': max(1000, int(round(rng.lognormvariate(math.log(median_price), 0.5), -3))),
+                'tags': product_tags,
+                'image': None,
+                'created_at': self.start + timedelta(seconds=rng.randrange(self.span_seconds)),
+                'updated_at': self.start,
+            })
+        return products
+
+    @property
+    def products(self):
+        """Semua dokumen produk (disimpan di memori; dipakai juga untuk nama dan harga event)"""
+        if self._products is None:
+            self._products = self._build_products()
+        return self._products
+
+    def iter_users(self):
+        """Dokumen user; email `user{n}@example.com`, password `DEFAULT_PASSWORD`"""
+        from src.auth import hash_password
+
+        rng = self._rng('users')
+        password = hash_password(DEFAULT_PASSWORD)
+        for n in range(1, self.user_count + 1):
+            created_at = self.start + timedelta(seconds=rng.randrange(self.span_seconds))
+            yield {
+                'user_id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                'email': f"user{n}@example.com",
+                'password': password,
+                'role': 'customer',
+                'created_at': created_at,
+                'updated_at': created_at,
+            }
+
+    @property
+    def user_ids(self):
+        if self._user_ids is None:
+            self._user_ids = [user['user_id'] for user in self.iter_users()]
+        return self._user_ids
+
+    # --- Event ---
+
+    def iter_event_batches(self, batch_size=10000):
+        """Batch {koleksi: [dokumen]} berisi view beserta like/keranjang/pembelian turunannya"""
+        rng = self._rng('events')
+        products = self.products
+        user_ids = self.user_ids
+        product_sampler = ZipfSampler(len(products), self.product_exponent, self._rng('product-popularity'), rng)
+        user_sampler = ZipfSampler(len(user_ids), self.user_exponent, self._rng('user-activity'), rng)
+        start, span = self.start, self.span_seconds
+        like_rate = self.like_rate
+        cart_rate = like_rate + self.cart_rate
+        purchase_rate = self.purchase_rate
+        sequence = 0
+        remaining = self.view_count
+        while remaining > 0:
+            k = min(batch_size, remaining)
+            remaining -= k
+            views, interactions, purchases = [], [], []
+            for user_index, product_index in zip(user_sampler.sample(k), product_sampler.sample(k)):
+                sequence += 1
+                user_id = user_ids[user_index]
+                product = products[product_index]
+                at = start + timedelta(seconds=rng.random() * span)
+                views.append({'user_id': user_id, 'product_id': product['id'],
+                              'view_id': f"v{self.seed}-{sequence}", 'viewed_at': at})
+                roll = rng.random()
+                if roll < cart_rate:
+                    kind = 'like' if roll < like_rate else 'add_to_cart'
+                    interactions.append({'user_id': user_id, 'product_id': product['id'], 'interaction_type': kind,
+                                         'interaction_id': f"i{self.seed}-{sequence}",
+                                         'interacted_at': at + timedelta(seconds=30)})
+                if rng.random() < purchase_rate:
+                    quantity = 1 if rng.random() < 0.85 else 2
+                    purchases.append({'user_id': user_id, 'product_id': product['id'], 'product_name': product['name'],
+                                      'quantity': quantity, 'price': product['price'],
+                                      'total_amount': product['price'] * quantity,
+                                      'purchase_date': at + timedelta(seconds=120),
+                                      'purchase_id': f"p{self.seed}-{sequence}"})
+            yield {'product_views': views, 'user_interactions': interactions, 'purchases': purchases}
+
+    def iter_order_batches(self, batch_size=10000):
+        """Batch pesanan: produk utama (Zipf) ditambah 0-3 produk populer dari kategori yang sama"""
+        rng = self._rng('orders')
+        products = self.products
+        user_ids = self.user_ids
+        product_sampler = ZipfSampler(len(products), self.product_exponent, self._rng('product-popularity'), rng)
+        user_sampler = ZipfSampler(len(user_ids), self.user_exponent, self._rng('user-activity'), rng)
+        popular_by_category = {}
+        for index in product_sampler.ranked():
+            top = popular_by_category.setdefault(products[index]['category'], [])
+            if len(top) < 50:
+                top.append(products[index])
+        remaining = self.order_count
+        while remaining > 0:
+            k = min(batch_size, remaining)
+            remaining -= k
+            orders = []
+            for user_index, product_index in zip(user_sampler.sample(k), product_sampler.sample(k)):
+                anchor = products[product_index]
+                basket = {anchor['id']: anchor}
+                for companion in rng.sample(popular_by_category[anchor['category']],
+                                            min(rng.randint(0, 3), len(popular_by_category[anchor['category']]))):
+                    basket.setdefault(companion['id'], companion)
+                items = []
+                for product in basket.values():
+                    quantity = 1 if rng.random() < 0.85 else 2
+                    items.append({'product_id': product['id'], 'name': product['name'], 'price': product['price'],
+                                  'quantity': quantity, 'subtotal': product['price'] * quantity})
+                created_at = self.start + timedelta(seconds=rng.random() * self.span_seconds)
+                orders.append({
+                    'user_id': user_ids[user_index],
+                    'user_name': '',
+                    'items': items,
+                    'total': sum(item['subtotal'] for item in items),
+                    'status': 'selesai' if rng.random() < 0.8 else 'pending',
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                })
+            yield {'orders': orders}
+
+# --- Tujuan penulisan ---
+
+class MongoSink:
+    """Menulis dokumen ke MongoDB dengan `insert_many(ordered=False)` per potongan"""
+
+    name = 'mongo'
+
+    def __init__(self, db, chunk_size=5000):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def write(self, collection_name, documents):
+        collection = self.db[collection_name]
+        documents = iter(documents)
+        while True:
+            chunk = list(islice(documents, self.chunk_size))
+            if not chunk:
+                break
+            collection.insert_many(chunk, ordered=False)
+
+    def close(self):
+        pass
+
+class Neo4jSink:
+    """Menulis node dan relasi lewat method batch Neo4jDB (UNWIND per potongan)"""
+
+    name = 'neo4j'
+
+    KINDS = {'product_views': 'view', 'purchases': 'purchase'}
+
+    def __init__(self, graph, chunk_size=None, views=True):
+        self.graph = graph
+        self.chunk_size = chunk_size
+        self.views = views
+
+    def write(self, collection_name, documents):
+        if collection_name == 'products':
+            self.graph.create_product_nodes(
+                (dict(p, product_id=p['id']) for p in documents), chunk_size=self.chunk_size)
+        elif collection_name == 'users':
+            self.graph.create_user_nodes(documents, chunk_size=self.chunk_size)
+        elif collection_name == 'product_views' and not self.views:
+            return
+        elif collection_name in ('product_views', 'user_interactions', 'purchases'):
+            rows = [self._activity_row(collection_name, doc) for doc in documents]
+            self.graph.write_activity_batch(rows)
+
+    def _activity_row(self, collection_name, doc):
+        kind = self.KINDS.get(collection_name) or doc['interaction_type']
+        at = doc.get('viewed_at') or doc.get('interacted_at') or doc.get('purchase_date')
+        row = {'kind': kind, 'user_id': doc['user_id'], 'product_id': str(doc['product_id']), 'at': at.isoformat()}
+        if kind == 'purchase':
+            row.update(purchase_id=doc['purchase_id'], quantity=doc['quantity'], price=doc['price'])
+        return row
+
+    def close(self):
+        pass
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipe tidak didukung: {type(value).__name__}")
+
+# Satu encoder dipakai ulang; json.dumps(default=...) membuat encoder baru setiap panggilan
+_encode_json = json.JSONEncoder(default=_json_default).encode
+
+class FileSink:
+    """Menulis satu file JSONL per koleksi (untuk dimuat ke stand-in dengan `load_files`)"""
+
+    name = 'files'
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._files = {}
+
+    def write(self, collection_name, documents):
+        f = self._files.get(collection_name)
+        if f is None:
+            f = self._files[collection_name] = open(
+                os.path.join(self.directory, f"{collection_name}.jsonl"), 'w', buffering=1 << 20)
+        f.writelines(_encode_json(doc) + '\n' for doc in documents)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+def load_files(db, directory, chunk_size=5000):
+    """Memuat file JSONL hasil `FileSink` ke database (MongoDB atau stand-in in-memory)"""
+    sink = MongoSink(db, chunk_size)
+    counts = {}
+    for collection_name in COLLECTIONS:
+        path = os.path.join(directory, f"{collection_name}.jsonl")
+        if not os.path.exists(path):
+            continue
+
+        def documents(path=path):
+            with open(path) as f:
+                for line in f:
+                    doc = json.loads(line)
+                    for field in DATETIME_FIELDS:
+                        if isinstance(doc.get(field), str):
+                            doc[field] = datetime.fromisoformat(doc[field])
+                    counts[collection_name] = counts.get(collection_name, 0) + 1
+                    yield doc
+
+        sink.write(collection_name, documents())
+    return counts
+
+# --- Orkestrasi ---
+
+def generate(generator, sinks, progress=None):
+    """Menulis seluruh dataset ke semua sink; mengembalikan jumlah dokumen per koleksi"""
+    counts = dict.fromkeys(COLLECTIONS, 0)
+
+    def emit(collection_name, documents):
+        documents = list(documents)
+        for sink in sinks:
+            sink.write(collection_name, documents)
+        counts[collection_name] += len(documents)
+
+    emit('products', generator.products)
+    if progress:
+        progress(counts)
+    users = generator.iter_users()
+    while True:
+        chunk = list(islice(users, 10000))
+        if not chunk:
+            break
+        emit('users', chunk)
+    if progress:
+        progress(counts)
+    for batch in generator.iter_event_batches():
+        for collection_name, documents in batch.items():
+            emit(collection_name, documents)
+        if progress:
+            progress(counts)
+    for batch in generator.iter_order_batches():
+        emit('orders', batch['orders'])
+    if progress:
+        progress(counts)
+    for sink in sinks:
+        sink.close()
+    return counts
+
+def rebuild_derived():
+    """Menghitung ulang data turunan (versi katalog, leaderboard, sering dibeli bersama)"""
+    from src.bought_together import bought_together
+    from src.database import product_catalog
+    from src.leaderboard import featured_leaderboard
+
+    product_catalog.bump_version()
+    featured_leaderboard.rebuild()
+    bought_together.rebuild()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generator dataset sintetis (produk, user, interaksi)')
+    parser.add_argument('--products', type=int, default=10000, help='Jumlah produk')
+    parser.add_argument('--users', type=int, default=10000, help='Jumlah user')
+    parser.add_argument('--views', type=int, default=1000000, help='Jumlah view produk')
+    parser.add_argument('--orders', type=int, default=None, help='Jumlah pesanan (default views/100)')
+    parser.add_argument('--like-rate', type=float, default=0.05, help='Peluang view berlanjut ke like')
+    parser.add_argument('--cart-rate', type=float, default=0.08, help='Peluang view berlanjut ke keranjang')
+    parser.add_argument('--purchase-rate', type=float, default=0.02, help='Peluang view berlanjut ke pembelian')
+    parser.add_argument('--zipf', type=float, default=1.07, help='Eksponen Zipf popularitas produk')
+    parser.add_argument('--days', type=int, default=90, help='Rentang waktu event (hari sejak 2024-01-01)')
+    parser.add_argument('--first-product-id', type=int, default=1, help='ID produk pertama')
+    parser.add_argument('--seed', type=int, default=42, help='Seed acak (hasil sama untuk seed sama)')
+    parser.add_argument('--target', action='append', choices=['mongo', 'neo4j', 'files'],
+                        help='Tujuan penulisan, boleh lebih dari satu (default: mongo dan neo4j)')
+    parser.add_argument('--out', default='data/synthetic', help='Folder output untuk --target files')
+    parser.add_argument('--no-graph-views', action='store_true', help='Jangan tulis relasi VIEWED ke Neo4j')
+    parser.add_argument('--no-derived', action='store_true', help='Lewati rebuild leaderboard/bought-together')
+    args = parser.parse_args(argv)
+    targets = args.target or ['mongo', 'neo4j']
+
+    generator = DatasetGenerator(
+        products=args.products, users=args.users, views=args.views, orders=args.orders,
+        like_rate=args.like_rate, cart_rate=args.cart_rate, purchase_rate=args.purchase_rate,
+        product_exponent=args.zipf, seed=args.seed, days=args.days, first_product_id=args.first_product_id,
+    )
+    sinks = []
+    if 'mongo' in targets:
+        from src.database import mongodb
+        sinks.append(MongoSink(mongodb.db))
+    if 'neo4j' in targets:
+        from src.database import neo4j_db
+        sinks.append(Neo4jSink(neo4j_db, views=not args.no_graph_views))
+    if 'files' in targets:
+        sinks.append(FileSink(args.out))
+
+    started = time.perf_counter()
+    last = [0.0]
+
+    def progress(counts):
+        now = time.perf_counter()
+        if now - last[0] < 2:
+            return
+        last[0] = now
+        events = sum(counts[name] for name in COLLECTIONS[2:])
+        print(f"⏳ {counts['products']} produk, {counts['users']} user, {events} event "
+              f"({events / (now - started):,.0f} event/detik)")
+
+    print(f"🔄 Membuat dataset (seed {args.seed}) ke {', '.join(targets)}...")
+    counts = generate(generator, sinks, progress)
+    if 'mongo' in targets and not args.no_derived:
+        print("🔄 Menghitung ulang leaderboard dan sering dibeli bersama...")
+        rebuild_derived()
+    elapsed = time.perf_counter() - started
+    print(f"✅ Selesai dalam {elapsed:.1f} detik: " + ', '.join(f"{count} {name}" for name, count in counts.items()))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
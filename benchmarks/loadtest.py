@@ -0,0 +1,262 @@
+"""
+Load test aplikasi web terhadap stand-in lokal MongoDB/Neo4j.
+
+Menjalankan app_web.app di server WSGI lokal, lalu sejumlah sesi bersamaan
+menjalankan skenario belanja (beranda, detail produk, cari, like, tambah ke
+keranjang, checkout). Hasilnya RPS dan persentil latensi per route dalam JSON.
+
+    python -m benchmarks.loadtest --sessions 16 --duration 30 --output hasil.json
+    python -m benchmarks.loadtest --baseline hasil.json
+"""
+
+import argparse
+from collections import defaultdict
+from http.client import HTTPConnection
+from http.cookies import SimpleCookie
+import json
+import logging
+import math
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+from benchmarks.datagen import DEFAULT_PASSWORD, DatasetGenerator, MongoSink, generate, load_files, rebuild_derived
+from benchmarks.standins import LatencyModel, install
+
+SEARCH_TERMS = ['samsung', 'laptop', 'charger', 'gaming', 'bluetooth', 'kamera', 'phone', 'watch']
+
+def log(message):
+    print(message, file=sys.stderr)
+
+def seed(db, args):
+    """Mengisi store in-memory dari folder dataset atau dataset sintetis kecil; mengembalikan jumlah user"""
+    if args.dataset:
+        counts = load_files(db, args.dataset)
+    else:
+        generator = DatasetGenerator(products=args.products, users=max(args.users, args.sessions),
+                                     views=args.views, seed=args.seed)
+        counts = generate(generator, [MongoSink(db)])
+    rebuild_derived()
+    log("📦 Dataset: " + ', '.join(f"{count} {name}" for name, count in counts.items()))
+    return counts['users']
+
+class Session:
+    """Satu klien HTTP dengan cookie sendiri (koneksi dibuka ulang otomatis)"""
+
+    def __init__(self, host, port):
+        self.connection = HTTPConnection(host, port, timeout=30)
+        self.cookies = {}
+
+    def request(self, method, path, form=None):
+        body = urlencode(form) if form is not None else None
+        headers = {'Accept-Encoding': 'gzip, br'}
+        if form is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{k}={v}" for k, v in self.cookies.items())
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (ConnectionError, OSError):
+            # Server menutup koneksi keep-alive: buka ulang sekali
+            self.connection.close()
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+        for header in response.headers.get_all('Set-Cookie') or []:
+            cookie = SimpleCookie(header)
+            for key, morsel in cookie.items():
+                self.cookies[key] = morsel.value
+        return response.status
+
+class Recorder:
+    """Mengumpulkan latensi per route (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.recording = False
+
+    def record(self, route, status, seconds):
+        if not self.recording:
+            return
+        with self._lock:
+            self.samples[route].append(seconds)
+            if status is None or status >= 500:
+                self.errors[route] += 1
+
+def percentile(sorted_values, pct):
+    """Persentil nearest-rank dari list yang sudah terurut"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def run_session(index, base, products, users, recorder, stop, think_ms):
+    """Skenario satu user: login, lalu berulang menjelajah, mencari, like, keranjang, checkout"""
+    session = Session(*base)
+    rng = random.Random(index)
+
+    def call(route, method, path, form=None):
+        started = time.perf_counter()
+        try:
+            status = session.request(method, path, form)
+        except Exception:
+            status = None
+        recorder.record(route, status, time.perf_counter() - started)
+        if think_ms:
+            time.sleep(rng.uniform(0, think_ms) / 1000)
+        return status
+
+    call('login', 'POST', '/login', {'email': f"user{index % users + 1}@example.com", 'password': DEFAULT_PASSWORD})
+    while not stop.is_set():
+        call('home', 'GET', '/')
+        product_id = rng.choice(products)
+        call('product_detail', 'GET', f"/product/{product_id}")
+        call('search', 'GET', '/api/search?' + urlencode({'q': rng.choice(SEARCH_TERMS)}))
+        if rng.random() < 0.3:
+            call('like', 'POST', f"/api/product/{product_id}/like", {})
+        if rng.random() < 0.2:
+            call('add_to_cart', 'POST', f"/api/product/{product_id}/add_to_cart", {})
+            if rng.random() < 0.3:
+                call('checkout', 'POST', '/cart/checkout', {})
+
+def summarize(recorder, elapsed):
+    """Ringkasan per route: jumlah, error, RPS, p50/p95/p99/max (ms)"""
+    routes = {}
+    everything = []
+    for route, values in sorted(recorder.samples.items()):
+        values = sorted(values)
+        everything.extend(values)
+        routes[route] = {
+            'count': len(values),
+            'errors': recorder.errors.get(route, 0),
+            'rps': round(len(values) / elapsed, 2),
+            'p50_ms': round(percentile(values, 50) * 1000, 2),
+            'p95_ms': round(percentile(values, 95) * 1000, 2),
+            'p99_ms': round(percentile(values, 99) * 1000, 2),
+            'max_ms': round(values[-1] * 1000, 2),
+        }
+    everything.sort()
+    total = {
+        'count': len(everything),
+        'errors': sum(recorder.errors.values()),
+        'rps': round(len(everything) / elapsed, 2),
+        'p50_ms': round(percentile(everything, 50) * 1000, 2),
+        'p95_ms': round(percentile(everything, 95) * 1000, 2),
+        'p99_ms': round(percentile(everything, 99) * 1000, 2),
+    }
+    return routes, total
+
+def compare(report, baseline):
+    """Selisih relatif (%) terhadap hasil sebelumnya: rps naik = lebih baik, latensi naik = regresi"""
+    diff = {}
+    for route, current in report['routes'].items():
+        previous = baseline.get('routes', {}).get(route)
+        if not previous:
+            continue
+        diff[route] = {
+            key: round((current[key] - previous[key]) / previous[key] * 100, 1) if previous[key] else None
+            for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms')
+        }
+    return diff
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test aplikasi web dengan stand-in MongoDB/Neo4j')
+    parser.add_argument('--sessions', type=int, default=16, help='Jumlah sesi user bersamaan')
+    parser.add_argument('--duration', type=float, default=20, help='Lama pengukuran (detik)')
+    parser.add_argument('--warmup', type=float, default=3, help='Pemanasan sebelum pengukuran (detik)')
+    parser.add_argument('--products', type=int, default=500, help='Jumlah produk dataset sintetis')
+    parser.add_argument('--users', type=int, default=200, help='Jumlah user dataset sintetis')
+    parser.add_argument('--views', type=int, default=20000, help='Jumlah view dataset sintetis')
+    parser.add_argument('--seed', type=int, default=42, help='Seed dataset sintetis')
+    parser.add_argument('--dataset', help='Folder JSONL dari `benchmarks.datagen --target files` (ganti dataset sintetis)')
+    parser.add_argument('--think-ms', type=float, default=0, help='Jeda acak maksimum antar request per sesi')
+    parser.add_argument('--neo4j-read-ms', type=float, default=8, help='Median latensi query baca Neo4j')
+    parser.add_argument('--neo4j-write-ms', type=float, default=4, help='Median latensi tulis Neo4j')
+    parser.add_argument('--neo4j-p99-factor', type=float, default=5, help='p99 = median x faktor')
+    parser.add_argument('--output', help='Simpan hasil JSON ke file (default: stdout)')
+    parser.add_argument('--baseline', help='File JSON hasil sebelumnya untuk dibandingkan')
+    args = parser.parse_args(argv)
+
+    # Log print() aplikasi ke stderr agar stdout hanya berisi JSON hasil
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    try:
+        report = run(args)
+    finally:
+        sys.stdout = stdout
+
+    output = json.dumps(report, indent=2, default=str)
+    total = report['total']
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        log(f"✅ {total['count']} request, {total['rps']} RPS, p95 {total['p95_ms']} ms -> {args.output}")
+    else:
+        print(output)
+    return 1 if total['errors'] else 0
+
+def run(args):
+    """Menyiapkan stand-in dan server, menjalankan sesi, lalu menyusun laporan"""
+    from config import Config
+    Config.SCHEMA_APPLY_ON_STARTUP = False
+    db = install(
+        read_latency=LatencyModel(args.neo4j_read_ms, args.neo4j_read_ms * args.neo4j_p99_factor),
+        write_latency=LatencyModel(args.neo4j_write_ms, args.neo4j_write_ms * args.neo4j_p99_factor),
+    )
+    users = seed(db, args)
+    products = [p['id'] for p in db.products.find({}, {'_id': 0, 'id': 1})]
+
+    from werkzeug.serving import make_server
+    import app_web
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    app_web.warm_caches()
+    server = make_server('127.0.0.1', 0, app_web.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='loadtest-server', daemon=True).start()
+    base = ('127.0.0.1', server.server_port)
+    log(f"🚀 Server benchmark di http://{base[0]}:{base[1]}, {args.sessions} sesi")
+
+    recorder = Recorder()
+    stop = threading.Event()
+    workers = [
+        threading.Thread(target=run_session, args=(i, base, products, users, recorder, stop, args.think_ms), daemon=True)
+        for i in range(args.sessions)
+    ]
+    for worker in workers:
+        worker.start()
+    time.sleep(args.warmup)
+    recorder.recording = True
+    started = time.perf_counter()
+    time.sleep(args.duration)
+    recorder.recording = False
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for worker in workers:
+        worker.join(timeout=10)
+    server.shutdown()
+
+    routes, total = summarize(recorder, elapsed)
+    report = {
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'elapsed_seconds': round(elapsed, 3),
+        'total': total,
+        'routes': routes,
+        'caches': {
+            'recommendation': app_web.recommendation_cache.stats(),
+            'fragment': app_web.fragment_cache.stats(),
+            'user': app_web.user_cache.stats(),
+        },
+        'events': app_web.activity_events.stats(),
+        'logging': app_web.app_logging.stats(),
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['vs_baseline_pct'] = compare(report, json.load(f))
+    return report
+
+if __name__ == '__main__':
+    sys.exit(main())
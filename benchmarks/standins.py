@@ -0,0 +1,222 @@
+"""
+Pengganti lokal MongoDB dan Neo4j untuk benchmark: store in-memory kompatibel
+MongoDB (mongomock) dan Neo4jDB palsu dengan latensi buatan
+"""
+
+import math
+import random
+import time
+from config import Config
+
+try:
+    import mongomock
+    from mongomock.collection import Collection as _MockCollection
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    mongomock = _MockCollection = None
+    MONGOMOCK_AVAILABLE = False
+
+class LatencyModel:
+    """Latensi acak berdistribusi log-normal yang ditentukan oleh median dan p99 (ms)"""
+
+    def __init__(self, median_ms, p99_ms=None):
+        self.median_ms = median_ms
+        self.p99_ms = p99_ms or median_ms
+        self._mu = math.log(max(median_ms, 1e-3) / 1000.0)
+        # z(0.99) = 2.326: p99 = median * exp(2.326 * sigma)
+        self._sigma = math.log(self.p99_ms / median_ms) / 2.326 if median_ms and self.p99_ms > median_ms else 0.0
+
+    def sample(self):
+        """Satu nilai latensi (detik)"""
+        if not self.median_ms:
+            return 0.0
+        return random.lognormvariate(self._mu, self._sigma)
+
+    def sleep(self):
+        """Menunggu selama satu sampel latensi"""
+        seconds = self.sample()
+        if seconds > 0:
+            time.sleep(seconds)
+        return seconds
+
+# --- MongoDB ---
+
+class _BulkWriteResult:
+    """Hasil bulk_write dengan atribut yang sama seperti pymongo BulkWriteResult"""
+
+    def __init__(self):
+        self.inserted_count = 0
+        self.matched_count = 0
+        self.modified_count = 0
+        self.deleted_count = 0
+        self.upserted_count = 0
+        self.upserted_ids = {}
+        self.acknowledged = True
+
+def _bulk_write(collection, requests, ordered=True, **kwargs):
+    """bulk_write per operasi (mongomock 4.x tidak cocok dengan operasi bulk pymongo terbaru)"""
+    from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+
+    result = _BulkWriteResult()
+    for index, op in enumerate(requests):
+        if isinstance(op, InsertOne):
+            collection.insert_one(op._doc)
+            result.inserted_count += 1
+        elif isinstance(op, (UpdateOne, UpdateMany, ReplaceOne)):
+            if isinstance(op, UpdateOne):
+                outcome = collection.update_one(op._filter, op._doc, upsert=op._upsert)
+            elif isinstance(op, UpdateMany):
+                outcome = collection.update_many(op._filter, op._doc, upsert=op._upsert)
+            else:
+                outcome = collection.replace_one(op._filter, op._doc, upsert=op._upsert)
+            result.matched_count += outcome.matched_count
+            result.modified_count += outcome.modified_count
+            if outcome.upserted_id is not None:
+                result.upserted_count += 1
+                result.upserted_ids[index] = outcome.upserted_id
+        elif isinstance(op, DeleteOne):
+            result.deleted_count += collection.delete_one(op._filter).deleted_count
+        elif isinstance(op, DeleteMany):
+            result.deleted_count += collection.delete_many(op._filter).deleted_count
+        else:
+            raise TypeError(f"Operasi bulk tidak didukung: {op!r}")
+    return result
+
+def in_memory_mongo_client():
+    """MongoClient in-memory (mongomock) yang cukup untuk semua query aplikasi"""
+    if not MONGOMOCK_AVAILABLE:
+        raise RuntimeError("mongomock diperlukan untuk benchmark: pip install -r requirements-dev.txt")
+    if getattr(_MockCollection.bulk_write, '__module__', None) != __name__:
+        _MockCollection.bulk_write = _bulk_write
+    return mongomock.MongoClient()
+
+# --- Neo4j ---
+
+class _FakeResult:
+    def __init__(self, records=()):
+        self._records = list(records)
+        self.plan = None
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def consume(self):
+        return self
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+    def data(self):
+        return list(self._records)
+
+class _FakeSession:
+    """Session Neo4j palsu: setiap statement menunggu satu sampel latensi tulis"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, **kwargs):
+        self.latency.sleep()
+        return _FakeResult()
+
+    def execute_write(self, work, *args, **kwargs):
+        return work(self, *args, **kwargs)
+
+    execute_read = execute_write
+
+    def close(self):
+        pass
+
+class _FakeDriver:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def session(self, **kwargs):
+        return _FakeSession(self.latency)
+
+    def verify_connectivity(self):
+        self.latency.sleep()
+
+    def close(self):
+        pass
+
+def fake_neo4j_db(catalog, read_latency, write_latency):
+    """Neo4jDB palsu: tulis lewat driver palsu, rekomendasi diambil acak (stabil) dari katalog.
+
+    Method rekomendasi tetap melewati cache rekomendasi dan metrik seperti
+    Neo4jDB asli; hanya query ke server yang diganti dengan latensi buatan.
+    """
+    from src.cache import cached_recommendation
+    from src.database import Neo4jDB
+    from src.metrics import metrics
+
+    class FakeNeo4jDB(Neo4jDB):
+        def __init__(self):
+            super().__init__()
+            self.driver = _FakeDriver(write_latency)
+
+        def _pick(self, subject_id, limit):
+            read_latency.sleep()
+            products = catalog.all()
+            if not products:
+                return []
+            rng = random.Random(str(subject_id))
+            return rng.sample(products, min(limit, len(products)))
+
+        @cached_recommendation('user')
+        @metrics.timed_neo4j
+        def get_user_recommendations(self, user_id, limit=5):
+            return [
+                {'product_name': p.get('name'), 'product_id': str(p['id']), 'view_count': 1}
+                for p in self._pick(user_id, limit)
+            ]
+
+        @cached_recommendation('similar')
+        @metrics.timed_neo4j
+        def get_similar_products(self, product_id, limit=5):
+            return [
+                {'product_name': p.get('name'), 'product_id': str(p['id']), 'common_users': 1}
+                for p in self._pick(f"similar:{product_id}", limit) if str(p['id']) != str(product_id)
+            ]
+
+        @cached_recommendation('bought_together')
+        @metrics.timed_neo4j
+        def get_frequently_bought_together(self, product_id, limit=5):
+            return [
+                {'id': str(p['id']), 'name': p.get('name'), 'image': p.get('image'), 'price': p.get('price'), 'frequency': 1}
+                for p in self._pick(f"fbt:{product_id}", limit) if str(p['id']) != str(product_id)
+            ]
+
+        @cached_recommendation('content')
+        @metrics.timed_neo4j
+        def get_content_based_similar_products(self, product_id, limit=5):
+            return [
+                {'id': str(p['id']), 'name': p.get('name'), 'image': p.get('image'), 'price': p.get('price'), 'shared_tags': 1}
+                for p in self._pick(f"content:{product_id}", limit) if str(p['id']) != str(product_id)
+            ]
+
+    return FakeNeo4jDB()
+
+def install(read_latency=None, write_latency=None):
+    """Mengganti koneksi database aplikasi dengan stand-in lokal.
+
+    Harus dipanggil sebelum `app_web` (dan modul lain yang mengambil
+    `neo4j_db`) di-import. Mengembalikan database MongoDB in-memory.
+    """
+    import src.database as database
+
+    client = in_memory_mongo_client()
+    database.mongodb.client = client
+    database.mongodb.db = client[Config.MONGODB_DB]
+    database.neo4j_db = fake_neo4j_db(
+        database.product_catalog,
+        read_latency or LatencyModel(8, 40),
+        write_latency or LatencyModel(4, 25),
+    )
+    return database.mongodb.db
@@ -14,12 +14,133 @@ class Config:
     # MongoDB Configuration
     MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
     MONGODB_DB = os.getenv('MONGODB_DB', 'tokoelektronik')
+    # Connection pool MongoDB (timeout dalam ms; 0 = tanpa batas)
+    MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', '100'))
+    MONGODB_MIN_POOL_SIZE = int(os.getenv('MONGODB_MIN_POOL_SIZE', '0'))
+    MONGODB_MAX_IDLE_TIME_MS = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', '300000'))
+    MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', '5000'))
+    MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', '0'))
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '10000'))
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', '5000'))
     
     # Neo4j Configuration
     NEO4J_URI = 'bolt://127.0.0.1:7687'
     NEO4J_USER = 'neo4j'
     NEO4J_PASSWORD = 'Aku12345678'
     NEO4J_DATABASE = 'neo4j'
+    NEO4J_BATCH_SIZE = int(os.getenv('NEO4J_BATCH_SIZE', '1000'))  # row per transaksi UNWIND
+    NEO4J_WRITE_RETRIES = int(os.getenv('NEO4J_WRITE_RETRIES', '3'))
+    NEO4J_RETRY_BACKOFF = float(os.getenv('NEO4J_RETRY_BACKOFF', '0.2'))  # detik, dikali 2 tiap percobaan
+    # Connection pool Neo4j (detik)
+    NEO4J_MAX_POOL_SIZE = int(os.getenv('NEO4J_MAX_POOL_SIZE', '100'))
+    NEO4J_CONNECTION_TIMEOUT = float(os.getenv('NEO4J_CONNECTION_TIMEOUT', '5'))
+    NEO4J_ACQUISITION_TIMEOUT = float(os.getenv('NEO4J_ACQUISITION_TIMEOUT', '10'))
+    NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv('NEO4J_MAX_CONNECTION_LIFETIME', '3600'))
+    # Koneksi yang menganggur lebih lama dari ini dicek dulu sebelum dipakai ulang
+    NEO4J_MAX_IDLE_TIME = float(os.getenv('NEO4J_MAX_IDLE_TIME', '300'))
+    
+    # Cache Configuration
+    # Interval (detik) pengecekan versi katalog ke MongoDB oleh cache produk
+    CATALOG_VERSION_CHECK_SECONDS = float(os.getenv('CATALOG_VERSION_CHECK_SECONDS', '5'))
+    # Jumlah ID produk terakhir yang dicatat di catalog_meta; proses yang tertinggal lebih jauh memuat ulang penuh
+    CATALOG_CHANGE_LOG_SIZE = int(os.getenv('CATALOG_CHANGE_LOG_SIZE', '2000'))
+    # Di atas jumlah produk berubah ini, index turunan dibangun ulang sekali (reset) alih-alih upsert per produk
+    CATALOG_INCREMENTAL_LIMIT = int(os.getenv('CATALOG_INCREMENTAL_LIMIT', '300'))
+    # Cache-Control API katalog: browser selalu revalidasi (304 murah), shared cache boleh simpan sebentar
+    CATALOG_API_MAX_AGE = int(os.getenv('CATALOG_API_MAX_AGE', '0'))
+    CATALOG_API_SHARED_MAX_AGE = int(os.getenv('CATALOG_API_SHARED_MAX_AGE', '5'))
+    CATALOG_API_STALE_WHILE_REVALIDATE = int(os.getenv('CATALOG_API_STALE_WHILE_REVALIDATE', '30'))
+    # Endpoint /metrics: jika diisi, scraper wajib mengirim header "Authorization: Bearer <token>"
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    
+    # Cache fragmen template (grid produk, produk unggulan, blok rekomendasi)
+    FRAGMENT_CACHE_SIZE = int(os.getenv('FRAGMENT_CACHE_SIZE', '1000'))
+    FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', '300'))
+    
+    # Search Configuration
+    SEARCH_RESULT_LIMIT = int(os.getenv('SEARCH_RESULT_LIMIT', '20'))
+    SEARCH_MAX_RESULT_LIMIT = 100
+    
+    # Buka koneksi MongoDB/Neo4j saat warm-up startup (jika False, koneksi dibuat saat pertama dipakai)
+    DB_WARMUP_ON_STARTUP = os.getenv('DB_WARMUP_ON_STARTUP', 'True').lower() == 'true'
+    
+    # Schema: buat index MongoDB & constraint Neo4j saat aplikasi start
+    SCHEMA_APPLY_ON_STARTUP = os.getenv('SCHEMA_APPLY_ON_STARTUP', 'True').lower() == 'true'
+    
+    # Upload gambar produk
+    UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'static/uploads')
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '2'))
+    IMAGE_JPEG_QUALITY = int(os.getenv('IMAGE_JPEG_QUALITY', '82'))
+    
+    # Import katalog massal: jumlah record per bulk_write/batch Neo4j
+    IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))
+    # Status job import di koleksi import_jobs dihapus otomatis (index TTL) setelah tidak diperbarui selama ini
+    IMPORT_JOB_RETENTION_SECONDS = int(os.getenv('IMPORT_JOB_RETENTION_SECONDS', str(7 * 24 * 3600)))
+    # Job running yang tidak diperbarui selama ini (atau prosesnya sudah mati) dianggap gagal saat dibaca
+    IMPORT_JOB_STALE_SECONDS = int(os.getenv('IMPORT_JOB_STALE_SECONDS', '600'))
+    # Versi katalog dinaikkan sekali setiap sekian potongan (dan di akhir import), bukan per potongan
+    IMPORT_CATALOG_BUMP_CHUNKS = int(os.getenv('IMPORT_CATALOG_BUMP_CHUNKS', '10'))
+    
+    # Static asset: '' (dikirim Flask), 'x-sendfile' (Apache/lighttpd), atau 'x-accel-redirect' (nginx)
+    STATIC_OFFLOAD = os.getenv('STATIC_OFFLOAD', '').lower()
+    # Prefix location internal nginx yang menunjuk ke folder static
+    STATIC_ACCEL_PREFIX = os.getenv('STATIC_ACCEL_PREFIX', '/_static_internal')
+    
+    # Pagination Configuration
+    HOME_PAGE_SIZE = int(os.getenv('HOME_PAGE_SIZE', '24'))
+    # Produk unggulan: top-N leaderboard disimpan di memori proses dan dibaca ulang di background setelah TTL
+    LEADERBOARD_CACHE_SIZE = int(os.getenv('LEADERBOARD_CACHE_SIZE', '50'))
+    LEADERBOARD_CACHE_SECONDS = float(os.getenv('LEADERBOARD_CACHE_SECONDS', '10'))
+    API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '50'))
+    API_MAX_PAGE_SIZE = 500
+    
+    # Recommendation Fan-out
+    # Batas waktu total (ms) untuk semua sumber rekomendasi di halaman produk
+    RECOMMENDATION_BUDGET_MS = int(os.getenv('RECOMMENDATION_BUDGET_MS', '300'))
+    RECOMMENDATION_WORKERS = int(os.getenv('RECOMMENDATION_WORKERS', '16'))
+    # Cache hasil rekomendasi (TTL dalam detik, ukuran = jumlah entri)
+    RECOMMENDATION_CACHE_TTL = int(os.getenv('RECOMMENDATION_CACHE_TTL', '300'))
+    RECOMMENDATION_CACHE_SIZE = int(os.getenv('RECOMMENDATION_CACHE_SIZE', '10000'))
+    # View terakhir per user yang rekomendasi co-view-nya ikut di-invalidasi saat user melihat produk baru
+    RECOMMENDATION_INVALIDATION_VIEWS = int(os.getenv('RECOMMENDATION_INVALIDATION_VIEWS', '50'))
+    
+    # Cache dokumen user yang sedang login (detik / jumlah entri)
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '30'))
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+    
+    # Kemiripan co-view (dibangun offline dengan `python manage.py build-similarity`)
+    SIMILARITY_STORE_PATH = os.getenv('SIMILARITY_STORE_PATH', 'data/coview_similarity.npz')
+    SIMILARITY_TOP_K = int(os.getenv('SIMILARITY_TOP_K', '20'))
+    SIMILARITY_MIN_COMMON_USERS = int(os.getenv('SIMILARITY_MIN_COMMON_USERS', '1'))
+    SIMILARITY_RELOAD_SECONDS = int(os.getenv('SIMILARITY_RELOAD_SECONDS', '30'))
+    CONTENT_SIMILARITY_TOP_K = int(os.getenv('CONTENT_SIMILARITY_TOP_K', '12'))
+    
+    # Sering dibeli bersama (aturan asosiasi); support = jumlah keranjang berisi pasangan
+    FBT_MIN_SUPPORT = int(os.getenv('FBT_MIN_SUPPORT', '2'))
+    FBT_MIN_CONFIDENCE = float(os.getenv('FBT_MIN_CONFIDENCE', '0.05'))
+    FBT_MIN_LIFT = float(os.getenv('FBT_MIN_LIFT', '1.0'))
+    FBT_TOP_K = int(os.getenv('FBT_TOP_K', '10'))
+    
+    # Activity Event Pipeline (write-behind tracking)
+    ACTIVITY_WRITE_BEHIND = os.getenv('ACTIVITY_WRITE_BEHIND', 'True').lower() == 'true'
+    EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', '10000'))
+    EVENT_BATCH_SIZE = int(os.getenv('EVENT_BATCH_SIZE', '200'))
+    EVENT_FLUSH_INTERVAL = float(os.getenv('EVENT_FLUSH_INTERVAL', '0.5'))  # detik
+    EVENT_WORKERS = int(os.getenv('EVENT_WORKERS', '1'))
+    # Kebijakan saat antrian penuh: drop_newest, drop_oldest, atau block
+    EVENT_QUEUE_FULL_POLICY = os.getenv('EVENT_QUEUE_FULL_POLICY', 'drop_newest')
+    EVENT_BLOCK_TIMEOUT = float(os.getenv('EVENT_BLOCK_TIMEOUT', '0.05'))  # detik
+    # Pembelian/pesanan yang gagal ditulis dicoba ulang sekian kali, lalu disimpan ke file untuk replay
+    EVENT_WRITE_RETRIES = int(os.getenv('EVENT_WRITE_RETRIES', '3'))
+    EVENT_SPILL_PATH = os.getenv('EVENT_SPILL_PATH', 'data/event_spill.jsonl')
+    
+    # Logging terstruktur (ditulis ke stderr oleh thread background)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # 'json' atau 'text'
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))  # record dibuang jika antrian penuh
+    # Log di jalur sibuk: maksimal N record per detik per jenis, debug di-sampling (0-1)
+    LOG_RATE_LIMIT = int(os.getenv('LOG_RATE_LIMIT', '10'))
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '1.0'))
     
     # Session Configuration
     SESSION_TYPE = 'filesystem'
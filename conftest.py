@@ -0,0 +1,23 @@
+"""
+Konfigurasi pytest untuk test unit (`python -m pytest`)
+"""
+
+import pytest
+
+# test_apps.py adalah script yang menjalankan server sungguhan, bukan test pytest
+collect_ignore = ['test_apps.py']
+
+class MemoryDB:
+    """Pengganti `MongoDB` berbasis mongomock: cukup `get_collection` untuk modul yang diuji"""
+
+    def __init__(self):
+        pytest.importorskip('mongomock')
+        from benchmarks.standins import in_memory_mongo_client
+        self.db = in_memory_mongo_client().db
+
+    def get_collection(self, name):
+        return self.db[name]
+
+@pytest.fixture
+def memory_db():
+    return MemoryDB()
@@ -35,6 +35,7 @@ def web_app():
     """Menjalankan aplikasi web Flask"""
     try:
         import app_web
+        app_web.warm_caches()
         print("🚀 Menjalankan aplikasi web...")
         print("📱 Buka browser dan kunjungi: http://localhost:5000")
         print("⏹️  Tekan Ctrl+C untuk menghentikan server")
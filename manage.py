@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Perintah maintenance untuk aplikasi web (backfill, rebuild, dll)
+
+Contoh:
+    python manage.py rebuild-leaderboard
+"""
+
+import argparse
+import os
+import sys
+
+def rebuild_leaderboard(args):
+    """Menghitung ulang leaderboard produk unggulan dari riwayat"""
+    from src.leaderboard import featured_leaderboard
+    print("🔄 Menghitung ulang leaderboard produk unggulan...")
+    total = featured_leaderboard.rebuild()
+    print(f"✅ Leaderboard diperbarui untuk {total} produk.")
+    for entry in featured_leaderboard.top(args.show):
+        print(f"   #{entry['product_id']}: {entry['purchase_count']} pembelian, "
+              f"{entry['like_count']} like (skor {entry['score']})")
+
+def sync_graph(args):
+    """Menyamakan node User/Product di Neo4j dengan data di MongoDB"""
+    from src.database import mongodb, neo4j_db
+    if not args.products_only:
+        users = mongodb.get_collection('users').find({}, {'_id': 0, 'user_id': 1, 'name': 1, 'email': 1})
+        total = neo4j_db.create_user_nodes(users, chunk_size=args.chunk_size)
+        print(f"✅ {total} node User disinkronkan.")
+    if not args.users_only:
+        products = (
+            {'product_id': p['id'], 'name': p.get('name'), 'category': p.get('category'), 'tags': p.get('tags')}
+            for p in mongodb.get_collection('products').find({}, {'_id': 0, 'id': 1, 'name': 1, 'category': 1, 'tags': 1})
+        )
+        total = neo4j_db.create_product_nodes(products, chunk_size=args.chunk_size)
+        print(f"✅ {total} node Product disinkronkan.")
+
+def build_similarity(args):
+    """Membangun (atau memperbarui) store kemiripan produk dari data co-view"""
+    from src.similarity import SIMILARITY_AVAILABLE, coview_similarity
+    if not SIMILARITY_AVAILABLE:
+        raise RuntimeError("numpy dan scipy diperlukan: pip install -r requirements.txt")
+    if args.incremental:
+        print("🔄 Menambahkan view baru ke store kemiripan...")
+        stats = coview_similarity.refresh()
+    else:
+        print("🔄 Membangun ulang store kemiripan dari semua view...")
+        stats = coview_similarity.build()
+    print(f"✅ {stats['products']} produk, {stats['users']} user, {stats['pairs']} pasangan "
+          f"disimpan ke {coview_similarity.path}")
+
+def rebuild_bought_together(args):
+    """Menghitung ulang counter dan tabel "sering dibeli bersama" dari riwayat"""
+    from src.bought_together import bought_together
+    print("🔄 Menambang pasangan produk dari pesanan dan pembelian...")
+    stats = bought_together.rebuild()
+    print(f"✅ {stats['baskets']} keranjang, {stats['products']} produk, {stats['pairs']} pasangan.")
+
+def apply_indexes(args):
+    """Membuat index MongoDB dan constraint Neo4j (idempoten)"""
+    from src.schema import schema_manager
+    failures = 0
+    if not args.neo4j_only:
+        for collection_name, name, error in schema_manager.apply_mongo():
+            failures += bool(error)
+            print(f"{'❌' if error else '✅'} MongoDB {collection_name}.{name}" + (f": {error}" if error else ""))
+    if not args.mongo_only:
+        for statement, error in schema_manager.apply_neo4j():
+            failures += bool(error)
+            print(f"{'❌' if error else '✅'} Neo4j {statement}" + (f": {error}" if error else ""))
+    return 1 if failures else 0
+
+def verify_indexes(args):
+    """Mengecek lewat explain()/EXPLAIN bahwa query penting memakai index"""
+    from src.schema import schema_manager
+    report = []
+    if not args.neo4j_only:
+        report += schema_manager.verify_mongo()
+    if not args.mongo_only:
+        report += schema_manager.verify_neo4j()
+    scans = 0
+    for entry in report:
+        if not entry['ok']:
+            scans += 1
+        icon = '✅' if entry['ok'] else '❌'
+        note = entry.get('error') or ' > '.join(entry['plan'])
+        if entry.get('in_memory_sort'):
+            note += ' (sort di memori)'
+        print(f"{icon} [{entry['store']}] {entry['query']}: {note}")
+    print(f"{len(report) - scans}/{len(report)} query memakai index.")
+    return 1 if scans else 0
+
+def backfill_images(args):
+    """Memindahkan upload lama ke nama hash konten dan membuat thumbnail"""
+    from src.images import image_pipeline
+    print(f"🔄 Memproses gambar di {image_pipeline.upload_folder}...")
+    stats = image_pipeline.backfill(prune=args.prune)
+    print(f"✅ {stats['files']} file lama -> {stats['unique_images']} gambar unik, "
+          f"{stats['products_updated']} produk diperbarui, {stats['variants']} varian siap.")
+
+def build_assets(args):
+    """Membuat varian gzip/brotli untuk file teks di folder static"""
+    from src.assets import static_assets
+    static_assets.root = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    print(f"🔄 Mengompres asset di {static_assets.root}...")
+    stats = static_assets.build_precompressed(min_size=args.min_size)
+    brotli_note = '' if stats['brotli'] else ' (modul brotli tidak ada, hanya gzip)'
+    print(f"✅ {stats['written']} file terkompresi dibuat, {stats['skipped']} dilewati{brotli_note}.")
+
+def import_products(args):
+    """Import produk massal dari feed CSV/JSONL (idempoten per SKU/ID/nama)"""
+    from src.catalog_import import CatalogImporter
+    from src.database import mongodb, neo4j_db, product_catalog, product_ids
+    importer = CatalogImporter(mongodb, neo4j_db, product_catalog, product_ids, chunk_size=args.chunk_size)
+
+    def progress(job):
+        print(f"   {job.rows} baris: {job.inserted} baru, {job.updated} diperbarui, {job.invalid} tidak valid")
+
+    print(f"🔄 Mengimpor produk dari {args.path}...")
+    job = importer.run(args.path, args.format, graph=not args.no_graph, progress=progress)
+    stats = job.to_dict()
+    for error in stats['errors']:
+        print(f"⚠️  Baris {error['line']}: {error['error']}")
+    icon = '✅' if job.status == 'done' else '❌'
+    print(f"{icon} {stats['inserted']} produk baru, {stats['updated']} diperbarui, {stats['invalid']} tidak valid, "
+          f"{stats['graph_synced']} node Product disinkronkan ({stats['rows_per_second']} baris/detik).")
+    return 0 if job.status == 'done' and not job.failed else 1
+
+def replay_events(args):
+    """Menulis ulang event pembelian yang tersimpan di file spill karena MongoDB gagal"""
+    # Import modul subscriber agar leaderboard/bought_together ikut diperbarui
+    import src.auth, src.bought_together, src.leaderboard  # noqa: F401
+    from src.events import activity_events
+    print(f"🔄 Replay event dari {activity_events.spill_path}...")
+    total = activity_events.replay_spilled()
+    stats = activity_events.stats()
+    print(f"✅ {total} event dibaca, {stats.get('written', 0)} tersimpan, {stats.get('spilled', 0)} masih gagal.")
+    return 0 if not stats.get('spilled') else 1
+
+def build_parser():
+    """Membuat parser argumen command line"""
+    parser = argparse.ArgumentParser(description='Perintah maintenance Toko Elektronik')
+    subparsers = parser.add_subparsers(dest='command')
+
+    leaderboard = subparsers.add_parser('rebuild-leaderboard', help='Backfill leaderboard produk unggulan')
+    leaderboard.add_argument('--show', type=int, default=5, help='Jumlah produk teratas yang ditampilkan')
+    leaderboard.set_defaults(func=rebuild_leaderboard)
+
+    graph = subparsers.add_parser('sync-graph', help='Sinkronkan node User/Product dari MongoDB ke Neo4j')
+    graph.add_argument('--chunk-size', type=int, default=None, help='Jumlah row per transaksi (default NEO4J_BATCH_SIZE)')
+    graph.add_argument('--users-only', action='store_true', help='Hanya sinkronkan node User')
+    graph.add_argument('--products-only', action='store_true', help='Hanya sinkronkan node Product')
+    graph.set_defaults(func=sync_graph)
+
+    similarity = subparsers.add_parser('build-similarity', help='Hitung kemiripan produk dari data co-view')
+    similarity.add_argument('--incremental', action='store_true', help='Hanya proses view baru sejak build terakhir')
+    similarity.set_defaults(func=build_similarity)
+
+    fbt = subparsers.add_parser('rebuild-bought-together', help='Backfill tabel produk yang sering dibeli bersama')
+    fbt.set_defaults(func=rebuild_bought_together)
+
+    for name, func, help_text in (
+        ('apply-indexes', apply_indexes, 'Buat index MongoDB dan constraint Neo4j'),
+        ('verify-indexes', verify_indexes, 'Cek query plan: laporkan query yang masih scan penuh'),
+    ):
+        schema = subparsers.add_parser(name, help=help_text)
+        schema.add_argument('--mongo-only', action='store_true', help='Hanya MongoDB')
+        schema.add_argument('--neo4j-only', action='store_true', help='Hanya Neo4j')
+        schema.set_defaults(func=func)
+
+    images = subparsers.add_parser('backfill-images', help='Dedup upload lama dan buat thumbnail')
+    images.add_argument('--prune', action='store_true', help='Hapus file lama setelah dipindah ke nama hash')
+    images.set_defaults(func=backfill_images)
+
+    assets = subparsers.add_parser('build-assets', help='Buat varian .gz/.br untuk asset static')
+    assets.add_argument('--min-size', type=int, default=256, help='Ukuran minimum file (byte) yang dikompres')
+    assets.set_defaults(func=build_assets)
+
+    products = subparsers.add_parser('import-products', help='Import produk massal dari file CSV/JSONL (boleh .gz)')
+    products.add_argument('path', help='Path file feed produk')
+    products.add_argument('--format', choices=['csv', 'jsonl'], default=None, help='Format feed (default dari ekstensi file)')
+    products.add_argument('--chunk-size', type=int, default=None, help='Record per bulk write (default IMPORT_CHUNK_SIZE)')
+    products.add_argument('--no-graph', action='store_true', help='Lewati sinkronisasi node Product ke Neo4j')
+    products.set_defaults(func=import_products)
+
+    events = subparsers.add_parser('replay-events', help='Tulis ulang event pembelian dari file spill (EVENT_SPILL_PATH)')
+    events.set_defaults(func=replay_events)
+
+    return parser
+
+def main(argv=None):
+    """Fungsi utama command line"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        return 1
+    from src.logs import app_logging
+    app_logging.configure()
+    try:
+        return args.func(args) or 0
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+Modul penyajian file static: nama ber-fingerprint, cache jangka panjang, ETag, dan varian terkompresi
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+from flask import Response, abort, request, send_file
+from werkzeug.security import safe_join
+from config import Config
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+# Ekstensi yang layak dikompres (gambar sudah terkompresi)
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.svg', '.json', '.txt', '.html', '.xml', '.map', '.ico'}
+
+# <nama>.<fingerprint 12 hex>.<ext>
+_FINGERPRINT_RE = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{12})(?P<ext>\.[A-Za-z0-9]+)$')
+# Upload yang namanya sudah hash konten (lihat src/images.py)
+_CONTENT_NAMED_RE = re.compile(r'^(?P<digest>[0-9a-f]{32}(?:_\d+w)?)\.[a-z0-9]+$')
+
+class StaticAssets:
+    """Layer penyajian file di folder static aplikasi.
+
+    `asset_url()` menyisipkan fingerprint isi file ke nama file
+    (`app.3f2a9c1b7d4e.css`), sehingga URL berubah setiap isi berubah dan
+    respons boleh di-cache selamanya (`Cache-Control: immutable`). Upload
+    yang sudah bernama hash konten dipakai apa adanya. Setiap respons
+    membawa ETag kuat dan menjawab `If-None-Match` dengan 304.
+
+    Untuk file teks, varian `.br`/`.gz` yang dibuat `build_precompressed()`
+    dikirim sesuai `Accept-Encoding`. Pengiriman isi file bisa diserahkan
+    ke proxy depan lewat X-Sendfile (Apache/lighttpd) atau
+    X-Accel-Redirect (nginx), diatur dengan `STATIC_OFFLOAD`.
+    """
+
+    IMMUTABLE = 'public, max-age=31536000, immutable'
+    REVALIDATE = 'public, no-cache'
+
+    def __init__(self, app=None, url_prefix='/assets'):
+        self.url_prefix = url_prefix
+        self.root = None
+        self.static_url_path = '/static'
+        self.offload = Config.STATIC_OFFLOAD
+        self.accel_prefix = Config.STATIC_ACCEL_PREFIX.rstrip('/')
+        self._digests = {}
+        self._lock = threading.Lock()
+        self.served = 0
+        self.not_modified = 0
+        self.precompressed = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Mendaftarkan route `/assets/...` dan helper template `asset_url`"""
+        self.root = app.static_folder
+        self.static_url_path = app.static_url_path
+        app.add_url_rule(f"{self.url_prefix}/<path:filename>", 'assets', self.serve)
+        app.jinja_env.globals['asset_url'] = self.asset_url
+
+    # --- Fingerprint ---
+
+    def _digest(self, relative_path):
+        """SHA-256 isi file (di-cache per mtime dan ukuran); None jika file tidak ada"""
+        content_named = _CONTENT_NAMED_RE.match(posixpath.basename(relative_path))
+        if content_named:
+            return content_named.group('digest')
+        path = safe_join(self.root, relative_path)
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError):
+            return None
+        cached = self._digests.get(relative_path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+        with self._lock:
+            self._digests[relative_path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def asset_url(self, filename):
+        """URL ber-fingerprint untuk file di folder static (relatif, misal `uploads/a.jpg`)"""
+        filename = filename.lstrip('/')
+        directory, name = posixpath.split(filename)
+        if not _CONTENT_NAMED_RE.match(name):
+            digest = self._digest(filename)
+            if digest is None:
+                return f"{self.static_url_path}/{filename}"
+            stem, ext = posixpath.splitext(name)
+            name = f"{stem}.{digest[:12]}{ext}"
+        return f"{self.url_prefix}/{posixpath.join(directory, name)}"
+
+    def url_for_static(self, url):
+        """Mengubah URL `/static/...` (misal gambar produk di database) menjadi URL asset"""
+        prefix = f"{self.static_url_path}/"
+        if url and url.startswith(prefix):
+            return self.asset_url(url[len(prefix):])
+        return url
+
+    # --- Penyajian ---
+
+    def _resolve(self, filename):
+        """Memetakan nama yang diminta ke file asli: (path relatif, fingerprint yang diminta)"""
+        directory, name = posixpath.split(filename)
+        if _CONTENT_NAMED_RE.match(name):
+            return filename, None
+        match = _FINGERPRINT_RE.match(name)
+        if match:
+            real = posixpath.join(directory, match.group('stem') + match.group('ext'))
+            if os.path.isfile(safe_join(self.root, real) or ''):
+                return real, match.group('digest')
+        return filename, None
+
+    def _negotiate(self, path):
+        """Memilih varian terkompresi sesuai Accept-Encoding: (path dikirim, encoding)"""
+        if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return path, None
+        mtime = os.path.getmtime(path)
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            candidate = path + suffix
+            if request.accept_encodings[encoding] and os.path.isfile(candidate) \
+                    and os.path.getmtime(candidate) >= mtime:
+                return candidate, encoding
+        return path, None
+
+    def serve(self, filename):
+        """View untuk `/assets/<filename>`"""
+        relative, requested = self._resolve(filename)
+        path = safe_join(self.root, relative)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        digest = self._digest(relative)
+        content_named = _CONTENT_NAMED_RE.match(posixpath.basename(relative))
+        # Fingerprint lama (isi sudah berubah) tetap dilayani, tapi tanpa cache panjang
+        immutable = bool(content_named) or (requested is not None and digest.startswith(requested))
+        send_path, encoding = self._negotiate(path)
+        etag = digest[:32] + (f"-{encoding}" if encoding else '')
+
+        headers = {
+            'Cache-Control': self.IMMUTABLE if immutable else self.REVALIDATE,
+            'ETag': f'"{etag}"',
+        }
+        if os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding:
+            headers['Content-Encoding'] = encoding
+
+        if request.if_none_match.contains(etag):
+            self.not_modified += 1
+            return Response(status=304, headers=headers)
+
+        self.served += 1
+        if encoding:
+            self.precompressed += 1
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.offload == 'x-accel-redirect':
+            # nginx mengirim file dari location internal
+            internal = posixpath.join(self.accel_prefix, os.path.relpath(send_path, self.root).replace(os.sep, '/'))
+            response = Response(status=200, mimetype=mimetype, headers=headers)
+            response.headers['X-Accel-Redirect'] = internal
+            return response
+        if self.offload == 'x-sendfile':
+            response = Response(status=200, mimetype=mimetype, headers=headers)
+            response.headers['X-Sendfile'] = os.path.abspath(send_path)
+            return response
+        response = send_file(send_path, mimetype=mimetype, conditional=False, etag=False)
+        response.headers.update(headers)
+        return response
+
+    # --- Build ---
+
+    def build_precompressed(self, min_size=256):
+        """Membuat varian .gz (dan .br jika modul brotli ada) untuk file teks di folder static"""
+        written = skipped = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                    continue
+                path = os.path.join(directory, name)
+                if os.path.getsize(path) < min_size:
+                    skipped += 1
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+                variants = [('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+                if BROTLI_AVAILABLE:
+                    variants.append(('.br', lambda raw: brotli.compress(raw, quality=11)))
+                for suffix, compress in variants:
+                    target = path + suffix
+                    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                        continue
+                    compressed = compress(data)
+                    if len(compressed) >= len(data):
+                        skipped += 1
+                        continue
+                    with open(target + '.tmp', 'wb') as f:
+                        f.write(compressed)
+                    os.replace(target + '.tmp', target)
+                    written += 1
+        return {'written': written, 'skipped': skipped, 'brotli': BROTLI_AVAILABLE}
+
+    def stats(self):
+        """Statistik penyajian asset"""
+        return {
+            'served': self.served,
+            'not_modified': self.not_modified,
+            'precompressed': self.precompressed,
+            'fingerprints_cached': len(self._digests),
+            'offload': self.offload or 'none',
+        }
+
+# Instance layer asset static (didaftarkan ke app lewat init_app)
+static_assets = StaticAssets()
@@ -2,13 +2,19 @@
 Modul autentikasi untuk login, register, dan session management
 """
 
-from flask import session, request, redirect, url_for, flash
+from flask import session, request, redirect, url_for, flash, g, has_request_context
 from functools import wraps
-from src.database import mongodb, neo4j_db
+from config import Config
+from src.cache import recommendation_cache, user_cache
+from src.database import mongodb, neo4j_db, product_catalog
+from src.events import activity_events
 import hashlib
+import logging
 import secrets
 from datetime import datetime
 
+log = logging.getLogger(__name__)
+
 def hash_password(password):
     """Hash password menggunakan SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -104,11 +110,40 @@ class AuthManager:
     
     @staticmethod
     def get_current_user():
-        """Mendapatkan data user yang sedang login"""
+        """Mendapatkan data user yang sedang login.
+
+        Hasilnya disimpan di `g` sehingga decorator, route, dan template dalam
+        satu request cukup satu kali lookup, dan di cache TTL per user_id
+        sehingga request berikutnya tidak perlu query MongoDB.
+        """
         if 'user_id' not in session:
             return None
-        
-        return mongodb.get_user_by_id(session['user_id'])
+        user_id = session['user_id']
+        in_request = has_request_context()
+        if in_request:
+            resolved = g.get('_current_user')
+            if resolved is not None and resolved[0] == user_id:
+                return resolved[1]
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = mongodb.get_user_by_id(user_id)
+            if user is not None:
+                user_cache.set(user_id, user)
+        # Salinan per request agar perubahan di route tidak mengotori cache
+        user = dict(user) if user is not None else None
+        if in_request:
+            g._current_user = (user_id, user)
+        return user
+
+    @staticmethod
+    def invalidate_user(user_id):
+        """Membuang data user dari cache (dipanggil setelah user diupdate)"""
+        user_cache.delete(user_id)
+        if has_request_context():
+            resolved = g.get('_current_user')
+            if resolved is not None and resolved[0] == user_id:
+                g.pop('_current_user')
     
     @staticmethod
     def update_user_profile(user_id, update_data):
@@ -116,6 +151,7 @@ class AuthManager:
         try:
             # Update di MongoDB
             result = mongodb.update_user(user_id, update_data)
+            AuthManager.invalidate_user(user_id)
             
             # Update di Neo4j jika ada perubahan nama atau email
             if 'name' in update_data or 'email' in update_data:
@@ -132,7 +168,11 @@ class AuthManager:
             return {'error': f'Gagal update profil: {str(e)}'}, 500
 
 class UserActivityTracker:
-    """Kelas untuk melacak aktivitas user"""
+    """Kelas untuk melacak aktivitas user.
+
+    Event dimasukkan ke pipeline write-behind (`src.events.activity_events`);
+    penulisan ke MongoDB, leaderboard, dan Neo4j terjadi di background thread.
+    """
     
     @staticmethod
     def track_product_view(product_id, view_data=None):
@@ -143,47 +183,41 @@ class UserActivityTracker:
         try:
             user_id = session['user_id']
             
-            # Simpan di MongoDB
-            mongodb.save_product_view(user_id, product_id, view_data)
-            
-            # Buat relasi di Neo4j
-            neo4j_db.create_viewed_relationship(user_id, product_id)
+            # Antrikan penyimpanan di MongoDB dan relasi VIEWED di Neo4j
+            activity_events.submit('view', user_id, product_id,
+                                   mongodb.build_product_view(user_id, product_id, view_data))
             
         except Exception as e:
-            print(f"Error tracking product view: {e}")
+            log.error("Error tracking product view: %s", e)
     
     @staticmethod
     def track_like(user_id, product_id, like_data=None):
         """Melacak saat user menyukai produk"""
         try:
-            # Simpan interaksi di MongoDB
-            mongodb.save_interaction(user_id, product_id, 'like', like_data)
-            
-            # Buat relasi di Neo4j
-            neo4j_db.create_likes_relationship(user_id, product_id)
+            # Antrikan interaksi MongoDB, counter leaderboard, dan relasi LIKES di Neo4j
+            activity_events.submit('like', user_id, product_id,
+                                   mongodb.build_interaction(user_id, product_id, 'like', like_data))
             
         except Exception as e:
-            print(f"Error tracking like: {e}")
+            log.error("Error tracking like: %s", e)
 
     @staticmethod
     def track_add_to_cart(user_id, product_id, cart_data=None):
         """Melacak saat user menambahkan produk ke keranjang"""
         try:
-            # Simpan interaksi di MongoDB
-            mongodb.save_interaction(user_id, product_id, 'add_to_cart', cart_data)
-            
-            # Buat relasi di Neo4j
-            neo4j_db.create_in_cart_relationship(user_id, product_id)
+            # Antrikan interaksi MongoDB dan relasi IN_CART di Neo4j
+            activity_events.submit('add_to_cart', user_id, product_id,
+                                   mongodb.build_interaction(user_id, product_id, 'add_to_cart', cart_data))
             
         except Exception as e:
-            print(f"Error tracking add_to_cart: {e}")
+            log.error("Error tracking add_to_cart: %s", e)
     
     @staticmethod
     def track_purchase(user_id, product_id, purchase_data):
         """Melacak pembelian user"""
         try:
             # Ambil data produk jika perlu
-            product = mongodb.get_collection('products').find_one({'id': int(product_id)})
+            product = product_catalog.get(product_id)
             # Siapkan data pembelian yang lengkap
             safe_purchase = {
                 'user_id': user_id,
@@ -194,12 +228,24 @@ class UserActivityTracker:
                 'total_amount': purchase_data.get('total_amount') if purchase_data.get('total_amount') is not None else (product['price'] * purchase_data.get('quantity', 1) if product else 0),
                 'purchase_date': purchase_data.get('purchase_date') or datetime.now(),
             }
-            # Simpan di MongoDB
-            mongodb.save_purchase_history(user_id, safe_purchase)
-            # Buat relasi di Neo4j
-            neo4j_db.create_purchased_relationship(user_id, product_id, safe_purchase)
+            # Antrikan riwayat pembelian, counter leaderboard, dan relasi PURCHASED di Neo4j
+            purchase_doc = mongodb.build_purchase(user_id, safe_purchase)
+            activity_events.submit('purchase', user_id, product_id, purchase_doc, {
+                'purchase_id': purchase_doc['purchase_id'],
+                'quantity': purchase_doc['quantity'],
+                'price': purchase_doc['price'],
+            })
+        except Exception as e:
+            log.error("Error tracking purchase: %s", e)
+
+    @staticmethod
+    def track_order(user_id, order_doc):
+        """Melacak pesanan dari checkout (dokumen pesanan sudah tersimpan)"""
+        try:
+            # Antrikan counter "sering dibeli bersama"; pesanan jadi satu keranjang baru
+            activity_events.submit('order', user_id, None, order_doc)
         except Exception as e:
-            print(f"Error tracking purchase: {e}")
+            log.error("Error tracking order: %s", e)
     
     @staticmethod
     def get_user_activity(user_id):
@@ -221,7 +267,7 @@ class UserActivityTracker:
             }
             
         except Exception as e:
-            print(f"Error getting user activity: {e}")
+            log.error("Error getting user activity: %s", e)
             return None
     
     @staticmethod
@@ -230,5 +276,16 @@ class UserActivityTracker:
         try:
             return neo4j_db.get_user_recommendations(user_id, limit)
         except Exception as e:
-            print(f"Error getting recommendations: {e}")
-            return [] 
\ No newline at end of file
+            log.error("Error getting recommendations: %s", e)
+            return [] 
+
+def _invalidate_recommendations(batch):
+    """Subscriber pipeline event: membuang rekomendasi graph yang terdampak satu batch"""
+    viewers = {event['user_id'] for event in batch if event['kind'] == 'view'}
+    earlier_views = mongodb.recent_viewed_product_ids(viewers, Config.RECOMMENDATION_INVALIDATION_VIEWS)
+    recommendation_cache.invalidate_for_events(
+        ((event['kind'], event['user_id'], event['product_id']) for event in batch),
+        earlier_views
+    )
+
+activity_events.subscribe('recommendation_cache', _invalidate_recommendations)
@@ -0,0 +1,323 @@
+"""
+Modul "sering dibeli bersama" berbasis aturan asosiasi (support, confidence, lift)
+"""
+
+from collections import Counter
+from datetime import datetime
+from itertools import combinations
+from pymongo import ReturnDocument, UpdateOne
+from config import Config
+from src.cache import cached_recommendation, recommendation_cache
+from src.database import mongodb, product_catalog
+from src.events import activity_events
+from src.schema import MONGO_INDEXES
+
+def _basket(product_ids):
+    """Himpunan ID produk (string) dalam satu keranjang"""
+    return {str(pid) for pid in product_ids if pid is not None}
+
+def _pair(a, b):
+    """Kunci pasangan produk yang urutannya tetap (a < b)"""
+    return (a, b) if a < b else (b, a)
+
+class BoughtTogetherEngine:
+    """Menambang pasangan produk yang sering dibeli bersama.
+
+    Keranjang (transaksi) berasal dari dua sumber: setiap pesanan di `orders`
+    adalah satu keranjang, dan seluruh pembelian satuan (`purchases`) milik
+    satu user dianggap satu keranjang user tersebut. Jumlah keranjang per
+    produk dan per pasangan disimpan sebagai counter di MongoDB dan dinaikkan
+    secara incremental setiap ada pesanan/pembelian baru.
+
+    Untuk produk A dan pasangan B:
+      support    = jumlah keranjang yang memuat A dan B
+      confidence = support / jumlah keranjang yang memuat A
+      lift       = confidence / (jumlah keranjang memuat B / total keranjang)
+    Pasangan yang lolos ambang batas disimpan sebagai top-K per produk di
+    `fbt_companions`, jadi halaman produk cukup membaca satu dokumen.
+
+    Update incremental menghitung ulang produk di keranjang beserta
+    pasangannya. Lift juga bergantung pada total keranjang, yang naik setiap
+    ada keranjang baru; produk lain tidak dihitung ulang untuk itu, jadi
+    lift-nya sedikit tertinggal sampai `rebuild()` berikutnya (jadwalkan
+    `python manage.py rebuild-bought-together` secara berkala).
+    """
+
+    ITEMS = 'fbt_item_counts'
+    PAIRS = 'fbt_pair_counts'
+    USER_BASKETS = 'fbt_user_baskets'
+    COMPANIONS = 'fbt_companions'
+    META = 'fbt_meta'
+
+    def __init__(self, db, min_support=None, min_confidence=None, min_lift=None, top_k=None):
+        self.mongodb = db
+        self.min_support = min_support or Config.FBT_MIN_SUPPORT
+        self.min_confidence = Config.FBT_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        self.min_lift = Config.FBT_MIN_LIFT if min_lift is None else min_lift
+        self.top_k = top_k or Config.FBT_TOP_K
+        self._available = False
+
+    def _collection(self, name):
+        """Mendapatkan collection engine (index dideklarasikan di src.schema)"""
+        return self.mongodb.get_collection(name)
+
+    def _basket_total(self):
+        meta = self._collection(self.META).find_one({'_id': 'baskets'})
+        return meta['count'] if meta else 0
+
+    @property
+    def available(self):
+        """True jika counter sudah pernah dibangun (rebuild atau event pertama)"""
+        if not self._available:
+            self._available = self._basket_total() > 0
+        return self._available
+
+    # --- Perhitungan aturan asosiasi ---
+
+    def _rank(self, item_count, partners, item_counts, baskets):
+        """Menyaring dan mengurutkan pasangan satu produk: {partner: support}"""
+        companions = []
+        for partner, support in partners.items():
+            partner_count = item_counts.get(partner, 0)
+            if support < self.min_support or not item_count or not partner_count:
+                continue
+            confidence = support / item_count
+            lift = confidence * baskets / partner_count
+            if confidence < self.min_confidence or lift < self.min_lift:
+                continue
+            companions.append({
+                'product_id': partner,
+                'support': support,
+                'confidence': round(confidence, 4),
+                'lift': round(lift, 4),
+            })
+        companions.sort(key=lambda c: (-c['confidence'], -c['lift'], -c['support'], c['product_id']))
+        return companions[:self.top_k]
+
+    def _companion_update(self, product_id, companions, now):
+        return UpdateOne(
+            {'product_id': product_id},
+            {'$set': {'companions': companions, 'updated_at': now}},
+            upsert=True
+        )
+
+    def _partners(self, product_ids):
+        """Pasangan yang lolos min_support untuk beberapa produk: {product_id: {partner: support}}"""
+        product_ids = list(product_ids)
+        partners = {pid: {} for pid in product_ids}
+        cursor = self._collection(self.PAIRS).find(
+            {'$or': [{'a': {'$in': product_ids}}, {'b': {'$in': product_ids}}],
+             'count': {'$gte': self.min_support}},
+            {'_id': 0, 'a': 1, 'b': 1, 'count': 1}
+        )
+        for pair in cursor:
+            if pair['a'] in partners:
+                partners[pair['a']][pair['b']] = pair['count']
+            if pair['b'] in partners:
+                partners[pair['b']][pair['a']] = pair['count']
+        return partners
+
+    def _recompute(self, product_ids):
+        """Menghitung ulang tabel companions untuk produk yang counternya berubah dan pasangannya.
+
+        Confidence dan lift pasangan ikut bergantung pada jumlah keranjang
+        produk yang berubah, jadi baris pasangan juga ditulis ulang.
+        Mengembalikan ID produk yang barisnya ditulis ulang.
+        """
+        product_ids = set(product_ids)
+        if not product_ids:
+            return []
+        partners = self._partners(product_ids)
+        linked = set()
+        for found in partners.values():
+            linked.update(found)
+        linked -= product_ids
+        if linked:
+            partners.update(self._partners(linked))
+        needed = set(partners)
+        for found in partners.values():
+            needed.update(found)
+        item_counts = {
+            row['product_id']: row['count']
+            for row in self._collection(self.ITEMS).find(
+                {'product_id': {'$in': list(needed)}}, {'_id': 0, 'product_id': 1, 'count': 1}
+            )
+        }
+        baskets = self._basket_total()
+        now = datetime.now()
+        operations = [
+            self._companion_update(pid, self._rank(item_counts.get(pid, 0), found, item_counts, baskets), now)
+            for pid, found in partners.items()
+        ]
+        self._collection(self.COMPANIONS).bulk_write(operations, ordered=False)
+        return list(partners)
+
+    def _invalidate(self, product_ids):
+        """Membuang hasil `companions()` yang di-cache untuk produk yang barisnya berubah"""
+        if product_ids:
+            recommendation_cache.invalidate_for_events(('purchase', None, pid) for pid in product_ids)
+
+    # --- Update incremental ---
+
+    def _add_to_basket(self, new_items, existing_items=(), new_basket=True):
+        """Menambah produk baru ke sebuah keranjang dan menaikkan counter terkait"""
+        new_items = sorted(new_items)
+        if not new_items:
+            return []
+        pair_counts = Counter(_pair(a, b) for a, b in combinations(new_items, 2))
+        pair_counts.update(_pair(a, b) for a in new_items for b in existing_items if a != b)
+        self._collection(self.ITEMS).bulk_write([
+            UpdateOne({'product_id': pid}, {'$inc': {'count': 1}}, upsert=True)
+            for pid in new_items
+        ], ordered=False)
+        if pair_counts:
+            self._collection(self.PAIRS).bulk_write([
+                UpdateOne({'a': a, 'b': b}, {'$inc': {'count': count}}, upsert=True)
+                for (a, b), count in pair_counts.items()
+            ], ordered=False)
+        if new_basket:
+            self._collection(self.META).update_one({'_id': 'baskets'}, {'$inc': {'count': 1}}, upsert=True)
+        return new_items + [pid for pid in existing_items if pid not in new_items]
+
+    def record_order(self, items):
+        """Mencatat satu pesanan (list item dengan `product_id`) sebagai keranjang baru"""
+        affected = self._add_to_basket(_basket(item.get('product_id') for item in items))
+        self._invalidate(self._recompute(affected))
+        return affected
+
+    def record_purchases(self, purchases):
+        """Mencatat pembelian satuan [(user_id, product_id)] ke keranjang milik user"""
+        baskets = self._collection(self.USER_BASKETS)
+        affected = set()
+        for user_id, product_id in purchases:
+            if user_id is None or product_id is None:
+                continue
+            product_id = str(product_id)
+            before = baskets.find_one_and_update(
+                {'user_id': str(user_id)},
+                {'$addToSet': {'products': product_id}},
+                projection={'_id': 0, 'products': 1},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+            existing = (before or {}).get('products', [])
+            if product_id in existing:
+                continue
+            affected.update(self._add_to_basket([product_id], existing, new_basket=before is None))
+        self._invalidate(self._recompute(affected))
+        return list(affected)
+
+    def record_events(self, batch):
+        """Subscriber pipeline event: mencatat pesanan dan pembelian satuan dalam satu batch"""
+        purchases = []
+        for event in batch:
+            if event['kind'] == 'order':
+                self.record_order(event['document'].get('items') or [])
+            elif event['kind'] == 'purchase':
+                purchases.append((event['user_id'], event['product_id']))
+        if purchases:
+            self.record_purchases(purchases)
+
+    # --- Rebuild penuh ---
+
+    def _iter_baskets(self):
+        """Menghasilkan (user_id atau None, keranjang) dari orders dan purchases"""
+        for order in self.mongodb.get_collection('orders').find({}, {'_id': 0, 'items.product_id': 1}):
+            yield None, _basket(item.get('product_id') for item in order.get('items') or [])
+        per_user = self.mongodb.get_collection('purchases').aggregate([
+            {'$match': {'product_id': {'$ne': None}}},
+            {'$group': {'_id': '$user_id', 'products': {'$addToSet': '$product_id'}}},
+        ])
+        for row in per_user:
+            yield row['_id'], _basket(row['products'])
+
+    def _swap_in(self, name, documents):
+        """Menulis dokumen ke koleksi sementara lalu menggantikan koleksi `name` lewat renameCollection"""
+        temp = self.mongodb.get_collection(f'{name}_rebuild')
+        temp.drop()
+        temp.create_indexes(MONGO_INDEXES[name])
+        if documents:
+            temp.insert_many(documents, ordered=False)
+        temp.rename(name, dropTarget=True)
+
+    def rebuild(self):
+        """Menghitung ulang semua counter dan tabel companions dari riwayat.
+
+        Dipakai untuk backfill data lama atau setelah mengubah ambang batas.
+        Setiap koleksi dibangun di koleksi sementara lalu ditukar dengan
+        renameCollection, jadi pembaca tidak pernah melihat koleksi kosong.
+        """
+        item_counts = Counter()
+        pair_counts = Counter()
+        user_baskets = []
+        baskets = 0
+        for user_id, basket in self._iter_baskets():
+            if not basket:
+                continue
+            baskets += 1
+            item_counts.update(basket)
+            pair_counts.update(combinations(sorted(basket), 2))
+            if user_id is not None:
+                user_baskets.append({'user_id': str(user_id), 'products': sorted(basket)})
+
+        partners = {}
+        for (a, b), support in pair_counts.items():
+            if support >= self.min_support:
+                partners.setdefault(a, {})[b] = support
+                partners.setdefault(b, {})[a] = support
+        now = datetime.now()
+
+        self._swap_in(self.ITEMS, [{'product_id': pid, 'count': count} for pid, count in item_counts.items()])
+        self._swap_in(self.PAIRS, [{'a': a, 'b': b, 'count': count} for (a, b), count in pair_counts.items()])
+        self._swap_in(self.USER_BASKETS, user_baskets)
+        self._collection(self.META).replace_one({'_id': 'baskets'}, {'count': baskets}, upsert=True)
+        self._swap_in(self.COMPANIONS, [
+            {'product_id': pid, 'companions': self._rank(item_counts[pid], found, item_counts, baskets),
+             'updated_at': now}
+            for pid, found in partners.items()
+        ])
+        return {'baskets': baskets, 'products': len(item_counts), 'pairs': len(pair_counts)}
+
+    # --- Query ---
+
+    @cached_recommendation('bought_together')
+    def companions(self, product_id, limit=5):
+        """Produk yang sering dibeli bersama (format sama dengan Neo4jDB.get_frequently_bought_together)"""
+        entry = self._collection(self.COMPANIONS).find_one(
+            {'product_id': str(product_id)}, {'_id': 0, 'companions': 1}
+        )
+        candidates = (entry or {}).get('companions', [])
+        products = product_catalog.get_many(c['product_id'] for c in candidates)
+        result = []
+        for companion in candidates:
+            try:
+                product = products.get(int(companion['product_id']))
+            except (TypeError, ValueError):
+                product = None
+            if product is None:
+                continue
+            result.append({
+                'id': product['id'],
+                'name': product.get('name'),
+                'image': product.get('image'),
+                'price': product.get('price'),
+                'frequency': companion['support'],
+                'confidence': companion['confidence'],
+                'lift': companion['lift'],
+            })
+            if len(result) >= limit:
+                break
+        return result
+
+    def stats(self):
+        """Statistik engine: jumlah keranjang, produk, pasangan"""
+        return {
+            'baskets': self._basket_total(),
+            'products': self._collection(self.ITEMS).estimated_document_count(),
+            'pairs': self._collection(self.PAIRS).estimated_document_count(),
+            'companion_rows': self._collection(self.COMPANIONS).estimated_document_count(),
+        }
+
+# Instance engine sering dibeli bersama
+bought_together = BoughtTogetherEngine(mongodb)
+activity_events.subscribe('associations', bought_together.record_events)
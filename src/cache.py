@@ -0,0 +1,296 @@
+"""
+Modul cache in-process: TTL + LRU, cache hasil rekomendasi, dan cache user
+"""
+
+from collections import Counter, OrderedDict
+from functools import wraps
+import threading
+import time
+from config import Config
+
+_MISSING = object()
+
+class TTLCache:
+    """Cache key-value thread-safe dengan masa berlaku (TTL) dan batas ukuran LRU.
+
+    Entri boleh diberi tag saat `set`; `delete_tagged` menghapus semua entri
+    dengan tag tertentu lewat index tag -> key, tanpa memindai seluruh cache.
+
+    Pemanggil yang menghitung nilai di luar lock memakai `begin()` untuk
+    mendapat token, `set(..., since=token)`, lalu `end(token)`. Selama ada
+    perhitungan berjalan, setiap tag yang di-invalidasi dicatat nomor
+    urutnya; `set` menolak nilai jika salah satu tag entri itu (atau seluruh
+    cache lewat `clear`) di-invalidasi setelah token dibuat. Invalidasi tag
+    lain tidak membuang hasil perhitungan.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._tags = {}
+        self._key_tags = {}
+        self._lock = threading.Lock()
+        # Nomor urut invalidasi, tag -> nomor invalidasi terakhirnya, dan token yang sedang berjalan
+        self._sequence = 0
+        self._cleared_at = 0
+        self._invalidated = {}
+        self._inflight = Counter()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_writes = 0
+
+    def _forget(self, key):
+        """Melepas key dari index tag; dipanggil dengan `_lock`"""
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key, default=None):
+        """Mengambil nilai; entri yang kedaluwarsa dianggap tidak ada"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self._forget(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def begin(self):
+        """Token untuk nilai yang mulai dihitung; wajib ditutup dengan `end(token)`"""
+        with self._lock:
+            token = self._sequence
+            self._inflight[token] += 1
+            return token
+
+    def end(self, token):
+        """Menutup token `begin`; catatan invalidasi dibuang jika tidak ada lagi yang membutuhkan"""
+        with self._lock:
+            self._inflight[token] -= 1
+            if self._inflight[token] <= 0:
+                del self._inflight[token]
+            if not self._inflight:
+                self._invalidated.clear()
+            elif len(self._invalidated) > self.maxsize:
+                oldest = min(self._inflight)
+                self._invalidated = {
+                    tag: sequence for tag, sequence in self._invalidated.items() if sequence > oldest
+                }
+
+    def _is_stale(self, tags, since):
+        """Apakah ada invalidasi atas `tags` setelah token `since`; dipanggil dengan `_lock`"""
+        if self._cleared_at > since:
+            return True
+        return any(self._invalidated.get(tag, since) > since for tag in tags)
+
+    def set(self, key, value, ttl=None, tags=(), since=None):
+        """Menyimpan nilai; entri paling lama tidak dipakai dibuang jika penuh.
+
+        Jika `since` (token `begin`) diisi dan salah satu `tags` sudah
+        di-invalidasi sejak token dibuat, nilai tidak disimpan.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if since is not None and self._is_stale(tags, since):
+                self.stale_writes += 1
+                return False
+            self._forget(key)
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            if tags:
+                tags = tuple(set(tags))
+                self._key_tags[key] = tags
+                for tag in tags:
+                    self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                self._forget(evicted)
+                self.evictions += 1
+            return True
+
+    def delete(self, key):
+        """Menghapus satu entri"""
+        with self._lock:
+            self._forget(key)
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def delete_tagged(self, tags):
+        """Menghapus semua entri yang punya salah satu tag; mengembalikan jumlahnya"""
+        with self._lock:
+            tags = tuple(tags)
+            if self._inflight:
+                self._sequence += 1
+                for tag in tags:
+                    self._invalidated[tag] = self._sequence
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.get(tag, ()))
+            for key in keys:
+                del self._data[key]
+                self._forget(key)
+            return len(keys)
+
+    def clear(self):
+        """Mengosongkan cache"""
+        with self._lock:
+            if self._inflight:
+                self._sequence += 1
+                self._cleared_at = self._sequence
+            self._data.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+
+    def stats(self):
+        """Statistik cache: ukuran, hit, miss, eviction"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'stale_writes': self.stale_writes,
+        }
+
+# Strategi rekomendasi yang subjeknya produk (bukan user)
+PRODUCT_STRATEGIES = ('similar', 'content', 'bought_together')
+
+def _tags(strategy, subject_id, value):
+    """Tag entri rekomendasi: subjeknya dan setiap produk yang ditampilkan"""
+    tags = [(strategy, subject_id)]
+    for item in value or []:
+        product_id = item.get('id', item.get('product_id'))
+        if product_id is not None:
+            tags.append(('product', str(product_id)))
+    return tags
+
+class RecommendationCache:
+    """Cache hasil rekomendasi dengan kunci (strategi, id subjek, limit).
+
+    Entri kedaluwarsa setelah TTL dan dibatasi LRU. Event tracking menghapus
+    entri yang terdampak saja (misal view oleh user X menghapus rekomendasi
+    user X), perubahan/penghapusan produk menghapus entri milik produk itu
+    dan entri yang menampilkannya. Setiap entri di-tag dengan subjek dan
+    produk yang ditampilkannya, jadi invalidasi tidak memindai seluruh cache.
+    `generation` naik setiap ada invalidasi sehingga bisa dipakai sebagai
+    versi untuk cache turunan.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self._cache = TTLCache(
+            maxsize or Config.RECOMMENDATION_CACHE_SIZE,
+            Config.RECOMMENDATION_CACHE_TTL if ttl is None else ttl
+        )
+        self.generation = 0
+
+    def get_or_compute(self, strategy, subject_id, limit, compute):
+        """Mengambil hasil dari cache, atau menghitung dan menyimpannya"""
+        key = (strategy, str(subject_id), limit)
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            # Hasil yang tag-nya di-invalidasi di tengah perhitungan tidak disimpan
+            token = self._cache.begin()
+            try:
+                value = compute()
+                self._cache.set(key, value, tags=_tags(strategy, key[1], value), since=token)
+            finally:
+                self._cache.end(token)
+        return list(value)
+
+    def _invalidate(self, tags):
+        removed = self._cache.delete_tagged(tags)
+        if removed:
+            self.generation += 1
+        return removed
+
+    def invalidate_user(self, user_id):
+        """Menghapus rekomendasi milik satu user"""
+        return self._invalidate([('user', str(user_id))])
+
+    def invalidate_product(self, product_id):
+        """Menghapus rekomendasi untuk produk dan entri lain yang menampilkan produk tersebut"""
+        product_id = str(product_id)
+        return self._invalidate(
+            [(strategy, product_id) for strategy in PRODUCT_STRATEGIES] + [('product', product_id)]
+        )
+
+    def invalidate_for_events(self, events, earlier_views=None):
+        """Invalidasi selektif setelah batch event (kind, user_id, product_id) ditulis ke graph.
+
+        View oleh user U atas produk X mengubah rekomendasi U, produk serupa
+        (co-view) X, dan produk serupa setiap produk yang sebelumnya dilihat U
+        (`earlier_views`: {user_id: [product_id, ...]}). Pembelian mengubah
+        "sering dibeli bersama" produk itu; produk lain di keranjang pembeli
+        di-invalidasi oleh `BoughtTogetherEngine` setelah menghitung ulang.
+
+        Rekomendasi user lain yang pernah melihat X (atau produk yang dilihat
+        U) juga bisa berubah, tapi tidak di-invalidasi karena jumlahnya tidak
+        terbatas; untuk entri itu kebasian hanya dibatasi TTL
+        (`RECOMMENDATION_CACHE_TTL`).
+        """
+        earlier_views = earlier_views or {}
+        stale = set()
+        for kind, user_id, product_id in events:
+            if kind == 'view':
+                stale.add(('user', str(user_id)))
+                stale.add(('similar', str(product_id)))
+                for viewed in earlier_views.get(str(user_id), ()):
+                    stale.add(('similar', str(viewed)))
+            elif kind == 'purchase':
+                stale.add(('bought_together', str(product_id)))
+        if not stale:
+            return 0
+        return self._invalidate(stale)
+
+    def clear(self):
+        """Mengosongkan seluruh cache rekomendasi"""
+        self._cache.clear()
+        self.generation += 1
+
+    # Listener ProductCatalog: perubahan katalog ikut meng-invalidasi rekomendasi
+    def reset(self, products):
+        self.clear()
+
+    def upsert(self, product):
+        self.invalidate_product(product.get('id'))
+
+    def remove(self, product_id):
+        self.invalidate_product(product_id)
+
+    def stats(self):
+        """Statistik cache rekomendasi"""
+        stats = self._cache.stats()
+        stats['generation'] = self.generation
+        return stats
+
+def cached_recommendation(strategy):
+    """Decorator untuk method Neo4jDB `method(self, subject_id, limit=5)` agar hasilnya di-cache"""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, subject_id, limit=5):
+            return recommendation_cache.get_or_compute(
+                strategy, subject_id, limit, lambda: method(self, subject_id, limit)
+            )
+        return wrapper
+    return decorator
+
+# Instance cache rekomendasi
+recommendation_cache = RecommendationCache()
+
+# Instance cache dokumen user per user_id (TTL pendek, di-invalidate saat user diupdate)
+user_cache = TTLCache(Config.USER_CACHE_SIZE, Config.USER_CACHE_TTL)
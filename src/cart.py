@@ -0,0 +1,56 @@
+"""
+Modul keranjang belanja: hidrasi produk dan perhitungan total
+"""
+
+from src.database import mongodb, product_catalog
+
+def hydrate_cart(cart, fetch_products=None, fetch_missing=None):
+    """Mengambil semua produk di keranjang sekaligus lalu menghitung subtotal dan total.
+
+    `cart` adalah dict {product_id: {'quantity': n}} dari session.
+    `fetch_products(ids)` mengembalikan produk per ID dalam satu panggilan
+    (default dari cache katalog). ID yang tidak ada di cache (misal produk
+    baru yang belum sampai ke proses ini) dicari sekali lagi lewat
+    `fetch_missing(ids)`, default `mongodb.get_products_by_ids` (satu query
+    `$in`). Jadi jumlah round trip tidak bergantung pada jumlah baris
+    keranjang. Produk yang sudah tidak ada dilewati.
+    """
+    if not cart:
+        return [], 0
+    fetch_products = fetch_products or product_catalog.get_many
+    fetch_missing = fetch_missing or mongodb.get_products_by_ids
+    products = fetch_products(cart.keys())
+    missing = [pid for pid in cart if str(pid).isdigit() and int(pid) not in products]
+    if missing:
+        products.update(fetch_missing(missing))
+    cart_items = []
+    total = 0
+    for product_id, item in cart.items():
+        try:
+            product = products.get(int(product_id))
+        except (TypeError, ValueError):
+            continue
+        if not product:
+            continue
+        quantity = item.get('quantity', 1)
+        subtotal = product['price'] * quantity
+        total += subtotal
+        cart_items.append({
+            'product': product,
+            'quantity': quantity,
+            'subtotal': subtotal
+        })
+    return cart_items, total
+
+def build_order_items(cart_items):
+    """Mengubah item keranjang ter-hidrasi menjadi item pesanan"""
+    return [
+        {
+            'product_id': item['product']['id'],
+            'name': item['product']['name'],
+            'price': item['product']['price'],
+            'quantity': item['quantity'],
+            'subtotal': item['subtotal']
+        }
+        for item in cart_items
+    ]
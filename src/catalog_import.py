@@ -0,0 +1,419 @@
+"""
+Modul import katalog massal: parsing CSV/JSONL secara streaming, alokasi ID per
+blok, upsert `bulk_write` per potongan, dan sinkronisasi node Product ke Neo4j
+"""
+
+import csv
+from datetime import datetime
+import gzip
+import json
+import logging
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from config import Config
+from src.database import mongodb, neo4j_db, product_catalog, product_ids
+
+log = logging.getLogger(__name__)
+
+FEED_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+# Nilai default untuk produk baru jika kolom tidak ada di feed
+PRODUCT_DEFAULTS = {'category': '', 'description': '', 'tags': [], 'image': None}
+
+# Harga dengan pemisah ribuan, misal "1.250.000" atau "Rp 1,250,000"
+_THOUSANDS_RE = re.compile(r'^\d{1,3}([.,]\d{3})+$')
+
+def feed_format(filename, fmt=None):
+    """Format feed dari argumen atau ekstensi file (.csv, .jsonl/.ndjson, boleh diakhiri .gz)"""
+    if fmt:
+        if fmt not in ('csv', 'jsonl'):
+            raise ValueError(f"Format tidak didukung: {fmt}")
+        return fmt
+    name = filename[:-3] if filename.endswith('.gz') else filename
+    fmt = FEED_FORMATS.get(os.path.splitext(name)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Format feed tidak dikenali dari nama file: {filename}")
+    return fmt
+
+def iter_feed(path, fmt=None):
+    """Membaca feed baris demi baris: menghasilkan (nomor baris, record) atau (nomor baris, error)"""
+    fmt = feed_format(path, fmt)
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8-sig', newline='') as f:
+        if fmt == 'csv':
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_no, e
+                    continue
+                yield line_no, record if isinstance(record, dict) else ValueError("Baris bukan objek JSON")
+
+def _parse_price(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    text = str(value or '').replace('Rp', '').replace(' ', '').strip()
+    if _THOUSANDS_RE.match(text):
+        text = text.replace('.', '').replace(',', '')
+    return int(float(text))
+
+def normalize_record(record):
+    """Mengubah satu record feed menjadi field produk; ValueError jika tidak valid"""
+    def value(key):
+        item = record.get(key)
+        return item.strip() if isinstance(item, str) else item
+
+    name = value('name')
+    if not name:
+        raise ValueError("Kolom name wajib diisi")
+    if value('price') in (None, ''):
+        raise ValueError("Kolom price wajib diisi")
+    try:
+        price = _parse_price(value('price'))
+    except (TypeError, ValueError):
+        raise ValueError(f"Harga tidak valid: {record.get('price')!r}")
+    if price < 0:
+        raise ValueError("Harga tidak boleh negatif")
+
+    product = {'name': name, 'price': price}
+    for key in ('category', 'description', 'image'):
+        if value(key) not in (None, ''):
+            product[key] = value(key)
+    tags = record.get('tags')
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in re.split(r'[,|]', tags) if tag.strip()]
+    if tags:
+        product['tags'] = list(tags)
+    if value('sku') not in (None, ''):
+        product['sku'] = str(value('sku'))
+    if value('id') not in (None, ''):
+        try:
+            product['id'] = int(value('id'))
+        except (TypeError, ValueError):
+            raise ValueError(f"ID tidak valid: {record.get('id')!r}")
+    return product
+
+def _identity(product):
+    """Kunci idempoten produk dalam feed: SKU, lalu ID, lalu nama"""
+    if 'sku' in product:
+        return ('sku', product['sku'])
+    if 'id' in product:
+        return ('id', product['id'])
+    return ('name', product['name'])
+
+class ImportJob:
+    """Status dan progres satu proses import"""
+
+    MAX_ERRORS = 50
+
+    def __init__(self, source):
+        self.id = uuid.uuid4().hex[:12]
+        self.source = source
+        self.status = 'pending'
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.invalid = 0
+        self.failed = 0
+        self.graph_synced = 0
+        self.graph_failed = 0
+        self.errors = []
+        self.started_at = None
+        self.finished_at = None
+        # Proses yang menjalankan job (host:pid), untuk mendeteksi job yatim
+        self.owner = None
+
+    def error(self, line, message):
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append({'line': line, 'error': str(message)})
+
+    def to_document(self):
+        """Dokumen koleksi `import_jobs` (`updated_at` dipakai index TTL dan sebagai heartbeat)"""
+        return dict(self.to_dict(), _id=self.id, owner=self.owner, updated_at=datetime.now())
+
+    def to_dict(self):
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        return {
+            'id': self.id,
+            'source': self.source,
+            'status': self.status,
+            'rows': self.rows,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'invalid': self.invalid,
+            'failed': self.failed,
+            'graph_synced': self.graph_synced,
+            'graph_failed': self.graph_failed,
+            'rows_per_second': round(self.rows / elapsed, 1) if elapsed else 0.0,
+            'elapsed_seconds': round(elapsed, 3),
+            'errors': list(self.errors),
+        }
+
+class CatalogImporter:
+    """Import produk massal dari feed supplier.
+
+    Feed dibaca per baris dan diproses per potongan `chunk_size` record:
+    produk yang sudah ada dicari dengan satu query (kunci SKU, ID, atau nama),
+    produk baru mendapat ID dari satu blok `IdAllocator`, lalu semuanya
+    di-upsert dengan satu `bulk_write` dan node Product-nya ditulis ke Neo4j
+    dengan satu batch UNWIND. Menjalankan ulang feed yang sama memperbarui
+    produk yang sama (tidak membuat duplikat). Versi katalog dinaikkan sekali
+    setiap `IMPORT_CATALOG_BUMP_CHUNKS` potongan dan di akhir import: dengan
+    ID produk yang berubah jika jumlahnya kecil, atau satu penanda muat ulang
+    penuh, supaya log perubahan katalog tidak dibanjiri ID per produk.
+
+    Status job disimpan di koleksi `import_jobs` setiap potongan, sehingga
+    progres bisa dibaca dari proses/worker mana pun. Job yang masih
+    `running` tapi prosesnya sudah mati atau tidak memperbarui status selama
+    `IMPORT_JOB_STALE_SECONDS` ditandai `failed` saat dibaca.
+    """
+
+    JOBS = 'import_jobs'
+
+    def __init__(self, db, graph, catalog, ids, chunk_size=None, bump_chunks=None):
+        self.mongodb = db
+        self.graph = graph
+        self.catalog = catalog
+        self.ids = ids
+        self.chunk_size = chunk_size or Config.IMPORT_CHUNK_SIZE
+        self.bump_chunks = bump_chunks or Config.IMPORT_CATALOG_BUMP_CHUNKS
+
+    # --- Proses import ---
+
+    def run(self, path, fmt=None, graph=True, progress=None, job=None):
+        """Menjalankan import secara sinkron; `progress(job)` dipanggil setiap potongan"""
+        job = job or ImportJob(os.path.basename(path))
+        job.status = 'running'
+        job.owner = _process_owner()
+        job.started_at = time.time()
+        self._save_job(job)
+        chunk = []
+        changed = set()
+        chunks = 0
+        try:
+            for line, record in iter_feed(path, fmt):
+                job.rows += 1
+                try:
+                    if isinstance(record, Exception):
+                        raise record
+                    chunk.append((line, normalize_record(record)))
+                except ValueError as e:
+                    job.invalid += 1
+                    job.error(line, e)
+                if len(chunk) >= self.chunk_size:
+                    changed.update(self._import_chunk(chunk, job, graph))
+                    chunk = []
+                    chunks += 1
+                    if chunks % self.bump_chunks == 0:
+                        self._publish(changed)
+                    self._save_job(job)
+                    if progress:
+                        progress(job)
+            if chunk:
+                changed.update(self._import_chunk(chunk, job, graph))
+            job.status = 'done'
+        except Exception as e:
+            job.status = 'failed'
+            job.error(None, e)
+            log.exception("Catalog import %s failed", job.id)
+        finally:
+            # Produk yang sudah tertulis tetap diumumkan walau import gagal di tengah jalan
+            self._publish(changed)
+            job.finished_at = time.time()
+            self._save_job(job)
+            if progress:
+                progress(job)
+        return job
+
+    def _publish(self, changed):
+        """Menaikkan versi katalog sekali untuk produk `changed` lalu mengosongkannya.
+
+        Di atas batas incremental katalog cukup satu penanda muat ulang penuh
+        (`bump_version()` tanpa ID) daripada mencatat ribuan ID di log perubahan.
+        """
+        if not changed:
+            return
+        try:
+            if len(changed) > self.catalog.incremental_limit:
+                self.catalog.bump_version()
+            else:
+                self.catalog.bump_version(sorted(changed))
+        except Exception as e:
+            log.error("Error bumping catalog version after import: %s", e)
+        changed.clear()
+
+    def _save_job(self, job):
+        """Menyimpan status job ke `import_jobs`; kegagalan hanya di-log agar import tetap jalan"""
+        try:
+            self.mongodb.get_collection(self.JOBS).replace_one({'_id': job.id}, job.to_document(), upsert=True)
+        except Exception as e:
+            log.error("Error saving catalog import job %s: %s", job.id, e)
+
+    def _existing(self, products):
+        """Produk yang sudah ada untuk kunci-kunci di potongan ini: {kunci: dokumen}"""
+        keys = {'sku': [], 'id': [], 'name': []}
+        for kind, key in products:
+            keys[kind].append(key)
+        clauses = [{kind: {'$in': values}} for kind, values in keys.items() if values]
+        if keys['sku']:
+            # `$type` agar index parsial `sku_unique` bisa dipakai
+            clauses[0]['sku']['$type'] = 'string'
+        existing = {}
+        projection = {'_id': 0, 'id': 1, 'sku': 1, 'name': 1, 'category': 1, 'tags': 1}
+        for doc in self.mongodb.get_collection('products').find({'$or': clauses}, projection):
+            for kind in ('sku', 'id', 'name'):
+                if doc.get(kind) is not None:
+                    existing.setdefault((kind, doc[kind]), doc)
+        return existing
+
+    def _import_chunk(self, chunk, job, graph):
+        # Record dengan kunci sama di satu potongan: yang terakhir dipakai
+        products = {}
+        lines = {}
+        for line, product in chunk:
+            identity = _identity(product)
+            products[identity] = product
+            lines[identity] = line
+        existing = self._existing(products)
+
+        new_keys = [identity for identity, product in products.items()
+                    if identity not in existing and 'id' not in product]
+        allocated = iter(self.ids.allocate(len(new_keys))) if new_keys else iter(())
+        explicit_ids = [product['id'] for identity, product in products.items()
+                        if identity not in existing and 'id' in product]
+        if explicit_ids:
+            self.ids.observe(max(explicit_ids))
+
+        now = datetime.now()
+        operations, documents, order = [], [], []
+        for identity, product in products.items():
+            current = existing.get(identity)
+            if current is not None:
+                product_id = current['id']
+            elif 'id' in product:
+                product_id = product['id']
+            else:
+                product_id = next(allocated)
+            fields = dict(product, id=product_id, updated_at=now)
+            on_insert = {key: default for key, default in PRODUCT_DEFAULTS.items() if key not in fields}
+            on_insert['created_at'] = now
+            operations.append(UpdateOne({'id': product_id}, {'$set': fields, '$setOnInsert': on_insert}, upsert=True))
+            documents.append(dict(current or {}, **fields))
+            order.append(identity)
+
+        failed = set()
+        try:
+            result = self.mongodb.get_collection('products').bulk_write(operations, ordered=False)
+            upserted, matched = result.upserted_count, result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            upserted, matched = details.get('nUpserted', 0), details.get('nMatched', 0)
+            for write_error in details.get('writeErrors', []):
+                identity = order[write_error['index']]
+                failed.add(identity)
+                job.error(lines[identity], write_error.get('errmsg'))
+        job.inserted += upserted
+        job.updated += matched
+        job.failed += len(failed)
+        changed = [doc['id'] for identity, doc in zip(order, documents) if identity not in failed]
+
+        if graph:
+            rows = [
+                {'product_id': str(doc['id']), 'name': doc.get('name'),
+                 'category': doc.get('category'), 'tags': doc.get('tags')}
+                for identity, doc in zip(order, documents) if identity not in failed
+            ]
+            try:
+                job.graph_synced += self.graph.create_product_nodes(rows)
+            except Exception as e:
+                job.graph_failed += len(rows)
+                job.error(lines[order[0]], f"Neo4j: {e}")
+                log.error("Error syncing %d imported products to Neo4j: %s", len(rows), e)
+        return changed
+
+    # --- Job background (endpoint admin) ---
+
+    def save_upload(self, upload):
+        """Menyimpan file upload ke file sementara (streaming) dan mengembalikan path-nya"""
+        suffix = '.gz' if upload.filename.endswith('.gz') else ''
+        name = upload.filename[:-3] if suffix else upload.filename
+        handle, path = tempfile.mkstemp(prefix='catalog-import-', suffix=os.path.splitext(name)[1] + suffix)
+        with os.fdopen(handle, 'wb') as f:
+            upload.save(f)
+        return path
+
+    def start(self, path, fmt=None, graph=True, source=None, remove_source=False):
+        """Menjalankan import di background thread; mengembalikan job untuk dipantau"""
+        job = ImportJob(source or os.path.basename(path))
+        job.owner = _process_owner()
+
+        def work():
+            try:
+                self.run(path, fmt, graph=graph, job=job)
+            finally:
+                if remove_source:
+                    os.remove(path)
+
+        self._save_job(job)
+        threading.Thread(target=work, name=f'catalog-import-{job.id}', daemon=True).start()
+        return job
+
+    def get_job(self, job_id):
+        """Status job import (dict seperti `ImportJob.to_dict`) dari `import_jobs`, atau None.
+
+        Job `pending`/`running` yang prosesnya sudah mati ditandai `failed` di sini.
+        """
+        jobs = self.mongodb.get_collection(self.JOBS)
+        document = jobs.find_one({'_id': job_id}, {'_id': 0})
+        if document is None:
+            return None
+        reason = _orphan_reason(document) if document.get('status') in ('pending', 'running') else None
+        if reason:
+            error = {'line': None, 'error': reason}
+            # Hanya jika belum diperbarui sejak dibaca (proses pemilik bisa saja baru menyimpan progres)
+            result = jobs.update_one(
+                {'_id': job_id, 'status': document['status'], 'updated_at': document.get('updated_at')},
+                {'$set': {'status': 'failed'}, '$push': {'errors': error}}
+            )
+            if result.modified_count:
+                document['status'] = 'failed'
+                document['errors'] = list(document.get('errors') or []) + [error]
+        document.pop('updated_at', None)
+        document.pop('owner', None)
+        return document
+
+def _process_owner():
+    """Identitas proses yang menjalankan job: host:pid"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+def _orphan_reason(document):
+    """Alasan job `running` dianggap yatim, atau None jika prosesnya mungkin masih berjalan"""
+    owner = document.get('owner') or ''
+    host, _, pid = owner.rpartition(':')
+    if host == socket.gethostname() and pid.isdigit():
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return f"Proses import {owner} sudah berhenti"
+        except OSError:
+            pass
+    updated_at = document.get('updated_at')
+    if updated_at is not None and (datetime.now() - updated_at).total_seconds() > Config.IMPORT_JOB_STALE_SECONDS:
+        return f"Tidak ada progres sejak {updated_at.isoformat(timespec='seconds')}"
+    return None
+
+# Instance importer katalog
+catalog_importer = CatalogImporter(mongodb, neo4j_db, product_catalog, product_ids)
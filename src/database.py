@@ -2,18 +2,106 @@
 Modul database untuk koneksi MongoDB dan Neo4j
 """
 
-from pymongo import MongoClient
-from neo4j import GraphDatabase
+from pymongo import MongoClient, ReturnDocument
 from datetime import datetime
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import chain, islice
+import base64
+import json
+import logging
+import threading
+import time
 import uuid
 from config import Config
+from src.cache import cached_recommendation, recommendation_cache, user_cache
+from src.metrics import metrics
+from src.pools import mongo_pool_listener, neo4j_pool_monitor
+
+log = logging.getLogger(__name__)
+
+def retryable_neo4j_errors():
+    """Error Neo4j yang aman untuk dicoba ulang (package neo4j di-import saat dibutuhkan)"""
+    from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+    return (TransientError, ServiceUnavailable, SessionExpired)
+
+def mongo_client_options():
+    """Opsi pool dan timeout MongoClient dari Config, plus listener telemetri pool"""
+    options = {
+        'maxPoolSize': Config.MONGODB_MAX_POOL_SIZE,
+        'minPoolSize': Config.MONGODB_MIN_POOL_SIZE,
+        'maxIdleTimeMS': Config.MONGODB_MAX_IDLE_TIME_MS or None,
+        'connectTimeoutMS': Config.MONGODB_CONNECT_TIMEOUT_MS or None,
+        'socketTimeoutMS': Config.MONGODB_SOCKET_TIMEOUT_MS or None,
+        'serverSelectionTimeoutMS': Config.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        'waitQueueTimeoutMS': Config.MONGODB_WAIT_QUEUE_TIMEOUT_MS or None,
+        'event_listeners': [mongo_pool_listener, metrics.mongo_listener],
+    }
+    mongo_pool_listener.max_pool_size = Config.MONGODB_MAX_POOL_SIZE
+    return options
 
 class MongoDB:
-    """Kelas untuk mengelola koneksi dan operasi MongoDB"""
+    """Kelas untuk mengelola koneksi dan operasi MongoDB.
+
+    `MongoClient` baru dibuat saat `client`/`db` pertama kali dipakai (atau
+    saat `warm_up()`), bukan saat modul di-import, sehingga import aplikasi,
+    perintah CLI, dan fork worker tidak menunggu koneksi database.
+    """
     
     def __init__(self):
-        self.client = MongoClient(Config.MONGODB_URI)
-        self.db = self.client[Config.MONGODB_DB]
+        self._client = None
+        self._db = None
+        self._lock = threading.Lock()
+        self.connect_seconds = None
+
+    def _connect(self):
+        with self._lock:
+            if self._db is None:
+                started = time.perf_counter()
+                client = self._client or MongoClient(Config.MONGODB_URI, **mongo_client_options())
+                self._db = client[Config.MONGODB_DB]
+                self._client = client
+                self.connect_seconds = time.perf_counter() - started
+        return self._db
+
+    @property
+    def client(self):
+        """MongoClient (dibuat saat pertama dipakai)"""
+        if self._client is None:
+            self._connect()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+        self._db = None
+
+    @property
+    def db(self):
+        """Database aplikasi (dibuat saat pertama dipakai)"""
+        return self._db if self._db is not None else self._connect()
+
+    @db.setter
+    def db(self, db):
+        self._db = db
+
+    @property
+    def connected(self):
+        """True jika client sudah dibuat"""
+        return self._client is not None
+
+    def warm_up(self):
+        """Membuat client dan memastikan server bisa dijangkau (ping); mengembalikan durasi detik"""
+        started = time.perf_counter()
+        self.client.admin.command('ping')
+        return time.perf_counter() - started
+
+    def close(self):
+        """Menutup koneksi MongoDB (client dibuat ulang jika dipakai lagi)"""
+        with self._lock:
+            client, self._client, self._db = self._client, None, None
+        if client is not None:
+            client.close()
         
     def get_collection(self, collection_name):
         """Mendapatkan collection MongoDB"""
@@ -28,6 +116,39 @@ class MongoDB:
         result = users.insert_one(user_data)
         return user_data['user_id']
     
+    def iter_products(self, after=None, batch_size=500):
+        """Iterasi produk terurut (nama, id) langsung dari cursor MongoDB.
+
+        `after` adalah kunci (nama, id) terakhir yang sudah dikirim; iterasi
+        dimulai setelahnya (keyset pagination) tanpa memuat semua produk ke memori.
+        """
+        query = {}
+        if after is not None:
+            name, product_id = after
+            query = {'$or': [
+                {'name': {'$gt': name}},
+                {'name': name, 'id': {'$gt': product_id}},
+            ]}
+        cursor = self.get_collection('products').find(query).sort([('name', 1), ('id', 1)]).batch_size(batch_size)
+        for product in cursor:
+            if '_id' in product:
+                product['_id'] = str(product['_id'])
+            yield product
+
+    def get_products_by_ids(self, product_ids):
+        """Mengambil banyak produk sekaligus dengan satu query `$in`, dikunci per ID (ID tidak valid dilewati)"""
+        ids = set()
+        for pid in product_ids:
+            try:
+                ids.add(int(pid))
+            except (TypeError, ValueError):
+                continue
+        ids = list(ids)
+        if not ids:
+            return {}
+        products = self.get_collection('products').find({'id': {'$in': ids}})
+        return {p['id']: p for p in products}
+
     def get_user_by_id(self, user_id):
         """Mendapatkan user berdasarkan ID"""
         users = self.get_collection('users')
@@ -42,27 +163,32 @@ class MongoDB:
         """Update data user"""
         users = self.get_collection('users')
         update_data['updated_at'] = datetime.now()
-        return users.update_one(
+        result = users.update_one(
             {'user_id': user_id},
             {'$set': update_data}
         )
+        user_cache.delete(user_id)
+        return result
     
-    def save_purchase_history(self, user_id, purchase_data):
-        """Menyimpan riwayat pembelian"""
-        purchases = self.get_collection('purchases')
+    def build_purchase(self, user_id, purchase_data):
+        """Menyiapkan dokumen riwayat pembelian (tanpa menyimpan)"""
         purchase_data['user_id'] = user_id
         purchase_data['purchase_id'] = str(uuid.uuid4())
         purchase_data['purchase_date'] = datetime.now()
-        return purchases.insert_one(purchase_data)
+        return purchase_data
+
+    def save_purchase_history(self, user_id, purchase_data):
+        """Menyimpan riwayat pembelian"""
+        purchases = self.get_collection('purchases')
+        return purchases.insert_one(self.build_purchase(user_id, purchase_data))
     
     def get_purchase_history(self, user_id):
         """Mendapatkan riwayat pembelian user"""
         purchases = self.get_collection('purchases')
         return list(purchases.find({'user_id': user_id}).sort('purchase_date', -1))
     
-    def save_product_view(self, user_id, product_id, view_data=None):
-        """Menyimpan data produk yang dilihat"""
-        views = self.get_collection('product_views')
+    def build_product_view(self, user_id, product_id, view_data=None):
+        """Menyiapkan dokumen produk yang dilihat (tanpa menyimpan)"""
         view_data = view_data or {}
         view_data.update({
             'user_id': user_id,
@@ -70,12 +196,32 @@ class MongoDB:
             'view_id': str(uuid.uuid4()),
             'viewed_at': datetime.now()
         })
-        return views.insert_one(view_data)
+        return view_data
+
+    def save_product_view(self, user_id, product_id, view_data=None):
+        """Menyimpan data produk yang dilihat"""
+        views = self.get_collection('product_views')
+        return views.insert_one(self.build_product_view(user_id, product_id, view_data))
     
     def get_product_views(self, user_id, limit=10):
         """Mendapatkan produk yang pernah dilihat user"""
         views = self.get_collection('product_views')
         return list(views.find({'user_id': user_id}).sort('viewed_at', -1).limit(limit))
+
+    def recent_viewed_product_ids(self, user_ids, limit=50):
+        """ID produk yang terakhir dilihat beberapa user: {user_id (str): [product_id, ...]}"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        cursor = self.get_collection('product_views').find(
+            {'user_id': {'$in': user_ids}}, {'_id': 0, 'user_id': 1, 'product_id': 1}
+        ).sort('viewed_at', -1).limit(limit * len(user_ids))
+        viewed = {}
+        for view in cursor:
+            products = viewed.setdefault(str(view['user_id']), [])
+            if len(products) < limit and view.get('product_id') is not None:
+                products.append(view['product_id'])
+        return viewed
     
     def save_user_preference(self, user_id, preference_data):
         """Menyimpan preferensi user"""
@@ -95,9 +241,8 @@ class MongoDB:
         preferences = self.get_collection('user_preferences')
         return preferences.find_one({'user_id': user_id})
 
-    def save_interaction(self, user_id, product_id, interaction_type, interaction_data=None):
-        """Menyimpan interaksi user dengan produk"""
-        interactions = self.get_collection('user_interactions')
+    def build_interaction(self, user_id, product_id, interaction_type, interaction_data=None):
+        """Menyiapkan dokumen interaksi user dengan produk (tanpa menyimpan)"""
         interaction_data = interaction_data or {}
         interaction_data.update({
             'user_id': user_id,
@@ -106,91 +251,702 @@ class MongoDB:
             'interaction_id': str(uuid.uuid4()),
             'interacted_at': datetime.now()
         })
-        return interactions.insert_one(interaction_data)
+        return interaction_data
+
+    def save_interaction(self, user_id, product_id, interaction_type, interaction_data=None):
+        """Menyimpan interaksi user dengan produk"""
+        interactions = self.get_collection('user_interactions')
+        return interactions.insert_one(self.build_interaction(user_id, product_id, interaction_type, interaction_data))
+
+def encode_cursor(key):
+    """Mengubah kunci (nama, id) menjadi token cursor yang aman untuk URL"""
+    raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """Mengubah token cursor kembali menjadi kunci (nama, id); None jika tidak valid"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        name, product_id = json.loads(raw.decode('utf-8'))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(name, str) or not isinstance(product_id, int):
+        return None
+    return (name, product_id)
+
+def _product_sort_key(product):
+    """Kunci urutan katalog: (nama, id), sama seperti sort('name', 1) di MongoDB"""
+    name = product.get('name')
+    product_id = product.get('id')
+    return (
+        name if isinstance(name, str) else '',
+        product_id if isinstance(product_id, int) else 0
+    )
+
+class IdAllocator:
+    """Alokasi ID numerik berurutan dari counter atomik di koleksi `counters`.
+
+    `allocate(n)` memesan satu blok n ID dengan satu `find_one_and_update($inc)`,
+    jadi aman dipakai banyak proses sekaligus tanpa menebak ID terakhir.
+    Saat pertama dipakai, counter dinaikkan (`$max`) ke ID terbesar yang
+    sudah ada; ID yang diisi manual dilaporkan lewat `observe()`.
+    """
+
+    def __init__(self, db, name, collection_name, field='id'):
+        self.mongodb = db
+        self.name = name
+        self.collection_name = collection_name
+        self.field = field
+        self._seeded = False
+
+    def _counters(self):
+        return self.mongodb.get_collection('counters')
+
+    def _seed(self):
+        if self._seeded:
+            return
+        last = self.mongodb.get_collection(self.collection_name).find_one(
+            {self.field: {'$type': 'number'}}, {'_id': 0, self.field: 1}, sort=[(self.field, -1)])
+        self.observe(last[self.field] if last else 0)
+        self._seeded = True
+
+    def observe(self, value):
+        """Memastikan counter tidak lebih kecil dari ID yang sudah dipakai"""
+        self._counters().update_one({'_id': self.name}, {'$max': {'value': int(value)}}, upsert=True)
+
+    def allocate(self, count=1):
+        """Memesan `count` ID berurutan; mengembalikan range ID tersebut"""
+        self._seed()
+        counter = self._counters().find_one_and_update(
+            {'_id': self.name},
+            {'$inc': {'value': count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return range(counter['value'] - count + 1, counter['value'] + 1)
+
+class _CatalogSnapshot:
+    """Isi katalog pada satu versi: per ID dan terurut (nama, id).
+
+    Snapshot tidak pernah diubah setelah dipasang; perubahan membuat snapshot
+    baru (copy-on-write), jadi pembaca cukup mengambil satu referensi tanpa lock.
+    """
+
+    __slots__ = ('by_id', 'by_name', 'name_keys')
+
+    def __init__(self, products=()):
+        products = sorted(products, key=_product_sort_key)
+        self.by_id = {p.get('id'): p for p in products}
+        self.by_name = products
+        self.name_keys = [_product_sort_key(p) for p in products]
+
+    def with_changes(self, upserts=(), removals=()):
+        """Snapshot baru dengan produk `upserts` disimpan dan ID `removals` dihapus"""
+        by_id = dict(self.by_id)
+        by_name = list(self.by_name)
+        name_keys = list(self.name_keys)
+        for product_id in chain(removals, (p.get('id') for p in upserts)):
+            old = by_id.pop(product_id, None)
+            if old is None:
+                continue
+            key = _product_sort_key(old)
+            index = bisect_left(name_keys, key)
+            while index < len(by_name) and name_keys[index] == key:
+                if by_name[index] is old:
+                    del by_name[index]
+                    del name_keys[index]
+                    break
+                index += 1
+        for product in upserts:
+            key = _product_sort_key(product)
+            index = bisect_left(name_keys, key)
+            by_name.insert(index, product)
+            name_keys.insert(index, key)
+            by_id[product.get('id')] = product
+        snapshot = _CatalogSnapshot()
+        snapshot.by_id, snapshot.by_name, snapshot.name_keys = by_id, by_name, name_keys
+        return snapshot
+
+class ProductCatalog:
+    """Cache katalog produk in-process dengan invalidasi berbasis versi.
+
+    Produk disimpan per ID dan dalam urutan nama di snapshot yang tidak
+    pernah diubah; perubahan memasang snapshot baru, jadi pembaca tidak
+    pernah menunggu lock. Setiap perubahan katalog menaikkan versi di koleksi
+    `catalog_meta` dan mencatat ID produknya di log perubahan singkat. Proses
+    lain mendeteksi versi baru paling lambat `Config.CATALOG_VERSION_CHECK_SECONDS`
+    kemudian dan hanya mengambil ulang produk yang berubah; katalog dimuat
+    ulang penuh hanya jika log tidak mencukupi (perubahan massal). Setelah
+    pemuatan pertama, pembaruan berjalan di thread background: request yang
+    mendeteksi versi baru langsung dilayani snapshot lama, dan snapshot baru
+    baru dipasang setelah index turunan selesai diperbarui.
+    Dokumen dari `all()` dipakai bersama, jadi jangan diubah oleh pemanggil.
+
+    Index turunan (misal index pencarian) dapat didaftarkan lewat `subscribe()`
+    dan akan menerima `reset(products)`, `upsert(product)` dan `remove(product_id)`.
+    Jika lebih dari `incremental_limit` produk berubah sekaligus, listener
+    menerima satu `reset` alih-alih upsert per produk. Notifikasi dikirim
+    berurutan setelah lock katalog dilepas, jadi listener yang lambat tidak
+    menahan pembaca katalog.
+    """
+
+    META_ID = 'products'
+
+    def __init__(self, db, check_interval=None, change_log_size=None, incremental_limit=None):
+        self.mongodb = db
+        self.check_interval = Config.CATALOG_VERSION_CHECK_SECONDS if check_interval is None else check_interval
+        self.change_log_size = change_log_size or Config.CATALOG_CHANGE_LOG_SIZE
+        self.incremental_limit = incremental_limit or Config.CATALOG_INCREMENTAL_LIMIT
+        # _lock: pemasangan snapshot/versi; _refresh_lock: hanya satu thread memuat ulang;
+        # _listener_lock: notifikasi listener satu per satu sesuai urutan perubahan
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._listener_lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+        self._checked_at = float('-inf')
+        self._invalidations = 0
+        self._reloads = 0
+        self._incremental_reloads = 0
+        self._listeners = ()
+        self._pending = deque()
+
+    def subscribe(self, listener):
+        """Mendaftarkan index turunan yang mengikuti perubahan katalog"""
+        with self._lock:
+            self._listeners += (listener,)
+            if self._snapshot is not None:
+                self._pending.append(((listener,), 'reset', self._snapshot.by_name))
+        self._deliver()
+
+    def _deliver(self):
+        """Mengirim notifikasi tertunda ke listener, di luar `_lock` dan sesuai urutan"""
+        with self._listener_lock:
+            while self._pending:
+                listeners, event, payload = self._pending.popleft()
+                for listener in listeners:
+                    try:
+                        getattr(listener, event)(payload)
+                    except Exception as e:
+                        log.error("Error updating catalog listener %r: %s", listener, e)
+
+    def _meta(self):
+        return self.mongodb.get_collection('catalog_meta')
+
+    def _bump_remote_version(self, product_ids):
+        """Menaikkan versi satu kali per ID yang berubah dan mencatat ID-nya (None = perubahan massal)"""
+        meta = self._meta().find_one_and_update(
+            {'_id': self.META_ID},
+            {
+                '$inc': {'version': len(product_ids)},
+                '$set': {'updated_at': datetime.now()},
+                '$push': {'changes': {'$each': list(product_ids), '$slice': -self.change_log_size}},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return meta['version']
+
+    @staticmethod
+    def _prepare(product):
+        """Salinan dokumen produk yang aman untuk di-cache dan di-serialize ke JSON"""
+        product = dict(product)
+        if '_id' in product:
+            product['_id'] = str(product['_id'])
+        return product
+
+    def _changed_ids(self, meta, version):
+        """ID produk yang berubah sejak `version` menurut log perubahan, atau None jika perlu muat ulang penuh"""
+        if version is None:
+            return None
+        missing = meta.get('version', 0) - version
+        changes = meta.get('changes') or []
+        if missing <= 0 or missing > len(changes):
+            return None
+        changed = changes[-missing:]
+        if any(product_id is None for product_id in changed):
+            return None
+        return set(changed)
+
+    def _refresh(self):
+        """Mengecek versi remote, memperbarui listener, lalu memasang snapshot baru.
+
+        Dipanggil dengan `_refresh_lock`; pembaca tetap memakai snapshot lama
+        sampai listener selesai diperbarui.
+        """
+        checked_at = time.monotonic()
+        invalidations = self._invalidations
+        base, version = self._snapshot, self._version
+        meta = self._meta().find_one({'_id': self.META_ID}) or {}
+        remote_version = meta.get('version', 0)
+        events = []
+        full_reload = False
+        if remote_version == version:
+            snapshot = base
+        else:
+            changed = self._changed_ids(meta, version)
+            if changed is None:
+                snapshot = _CatalogSnapshot(self._prepare(p) for p in self.mongodb.get_collection('products').find())
+                events.append(('reset', snapshot.by_name))
+                full_reload = True
+            else:
+                upserts = [self._prepare(p) for p in self.mongodb.get_collection('products').find({'id': {'$in': list(changed)}})]
+                removals = changed - {p.get('id') for p in upserts}
+                snapshot = base.with_changes(upserts, removals)
+                if len(changed) > self.incremental_limit:
+                    # Satu rebuild listener lebih murah daripada ratusan upsert
+                    events.append(('reset', snapshot.by_name))
+                else:
+                    events.extend(('upsert', p) for p in upserts)
+                    events.extend(('remove', product_id) for product_id in removals)
+        if events:
+            with self._lock:
+                if self._snapshot is not base:
+                    return
+                self._pending.extend((self._listeners, event, payload) for event, payload in events)
+            self._deliver()
+        with self._lock:
+            if self._snapshot is not base:
+                # Perubahan lokal terpasang selama memuat: cek ulang pada pembacaan berikutnya
+                return
+            if snapshot is not base:
+                self._snapshot = snapshot
+                self._version = remote_version
+                if full_reload:
+                    self._reloads += 1
+                else:
+                    self._incremental_reloads += 1
+            if invalidations == self._invalidations:
+                self._checked_at = checked_at
+
+    def _refresh_in_background(self):
+        """Badan thread pembaruan katalog; `_refresh_lock` sudah diambil oleh pemanggil"""
+        try:
+            if time.monotonic() - self._checked_at >= self.check_interval:
+                self._refresh()
+        except Exception as e:
+            log.error("Error refreshing product catalog: %s", e)
+        finally:
+            self._refresh_lock.release()
+
+    def refresh(self, wait=False):
+        """Memastikan cache (dan index turunannya) mengikuti versi katalog terbaru.
+
+        Tanpa `wait`, pembaruan setelah pemuatan pertama berjalan di background.
+        """
+        self._ensure_fresh(wait)
+
+    def _ensure_fresh(self, wait=False):
+        """Memperbarui katalog jika versi lokal mungkin sudah kedaluwarsa"""
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        # Jika thread lain sedang memuat ulang, layani snapshot lama (kecuali belum ada sama sekali)
+        wait = wait or self._snapshot is None
+        if not self._refresh_lock.acquire(blocking=wait):
+            return
+        if not wait:
+            try:
+                threading.Thread(target=self._refresh_in_background, name='catalog-refresh', daemon=True).start()
+            except Exception:
+                self._refresh_lock.release()
+                raise
+            return
+        try:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return
+            self._refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def _current(self):
+        self._ensure_fresh()
+        return self._snapshot or _EMPTY_SNAPSHOT
+
+    @property
+    def version(self):
+        """Versi katalog yang sedang dilayani cache"""
+        self._ensure_fresh()
+        return self._version
+
+    def get(self, product_id):
+        """Mendapatkan salinan satu produk berdasarkan ID (None jika tidak ada)"""
+        snapshot = self._current()
+        try:
+            product = snapshot.by_id.get(int(product_id))
+        except (TypeError, ValueError):
+            return None
+        return dict(product) if product else None
+
+    def get_many(self, product_ids):
+        """Mendapatkan salinan banyak produk sekaligus, dikunci per ID (int)"""
+        snapshot = self._current()
+        products = {}
+        for product_id in product_ids:
+            try:
+                product = snapshot.by_id.get(int(product_id))
+            except (TypeError, ValueError):
+                continue
+            if product:
+                products[product['id']] = dict(product)
+        return products
+
+    def all(self):
+        """Mendapatkan semua produk terurut nama (list bersama, read-only)"""
+        return self._current().by_name
+
+    def page(self, limit, after=None, before=None):
+        """Mengambil satu halaman katalog dengan keyset pagination pada (nama, id).
+
+        Mengembalikan (produk, kunci_next, kunci_prev); kunci bernilai None jika
+        tidak ada halaman berikutnya/sebelumnya.
+        """
+        snapshot = self._current()
+        keys = snapshot.name_keys
+        if before is not None:
+            end = bisect_left(keys, before)
+            start = max(0, end - limit)
+        else:
+            start = bisect_right(keys, after) if after is not None else 0
+            end = min(len(keys), start + limit)
+        products = snapshot.by_name[start:end]
+        next_key = keys[end - 1] if end < len(keys) and end > start else None
+        prev_key = keys[start] if start > 0 and end > start else None
+        return products, next_key, prev_key
+
+    def _mark_stale(self):
+        """Memaksa pengecekan versi pada pembacaan berikutnya; dipanggil dengan `_lock`"""
+        self._checked_at = float('-inf')
+        self._invalidations += 1
+
+    def _apply_local_change(self, upserts=(), removals=()):
+        """Menaikkan versi katalog lalu memasang snapshot baru dengan perubahan ini.
+
+        Jika proses lain ikut mengubah katalog di antaranya, perubahan tidak
+        dipasang langsung; pembacaan berikutnya mengambilnya dari log perubahan.
+        """
+        with self._lock:
+            previous_version = self._version
+            new_version = self._bump_remote_version([p.get('id') for p in upserts] + list(removals))
+            if self._snapshot is None or new_version != previous_version + len(upserts) + len(removals):
+                self._mark_stale()
+            else:
+                self._snapshot = self._snapshot.with_changes(upserts, removals)
+                self._version = new_version
+                self._checked_at = time.monotonic()
+                self._pending.extend((self._listeners, 'upsert', p) for p in upserts)
+                self._pending.extend((self._listeners, 'remove', product_id) for product_id in removals)
+        self._deliver()
+        return new_version
+
+    def upsert(self, product):
+        """Menyimpan produk baru/terubah ke cache dan menaikkan versi katalog"""
+        return self._apply_local_change(upserts=[self._prepare(product)])
+
+    def remove(self, product_id):
+        """Menghapus produk dari cache dan menaikkan versi katalog"""
+        return self._apply_local_change(removals=[product_id])
+
+    def invalidate(self):
+        """Memaksa pengecekan versi (dan pemuatan ulang jika perlu) pada pembacaan berikutnya"""
+        with self._lock:
+            self._mark_stale()
+
+    def bump_version(self, product_ids=None):
+        """Menaikkan versi katalog setelah perubahan langsung di MongoDB.
+
+        Jika `product_ids` diberikan (dan muat di log perubahan), semua proses
+        hanya mengambil ulang produk tersebut; tanpa itu katalog dimuat ulang penuh.
+        """
+        product_ids = list(product_ids) if product_ids is not None else [None]
+        if len(product_ids) > self.change_log_size:
+            product_ids = [None]
+        with self._lock:
+            self._mark_stale()
+            return self._bump_remote_version(product_ids)
+
+    def stats(self):
+        """Statistik cache katalog"""
+        snapshot = self._snapshot or _EMPTY_SNAPSHOT
+        return {
+            'version': self._version,
+            'products': len(snapshot.by_id),
+            'reloads': self._reloads,
+            'incremental_reloads': self._incremental_reloads,
+            'pending_notifications': len(self._pending),
+        }
+
+_EMPTY_SNAPSHOT = _CatalogSnapshot()
+
+# Statement Cypher penulisan aktivitas user (juga diverifikasi query plan-nya oleh src.schema)
+ACTIVITY_CYPHER = {
+    'viewed': """
+        UNWIND $rows AS row
+        MATCH (u:User {user_id: row.user_id})
+        MATCH (p:Product {product_id: row.product_id})
+        MERGE (u)-[:VIEWED {viewed_at: coalesce(datetime(row.at), datetime())}]->(p)
+    """,
+    'likes': """
+        UNWIND $rows AS row
+        MATCH (u:User {user_id: row.user_id})
+        MATCH (p:Product {product_id: row.product_id})
+        MERGE (u)-[:LIKES {liked_at: coalesce(datetime(row.at), datetime())}]->(p)
+    """,
+    'in_cart': """
+        UNWIND $rows AS row
+        MATCH (u:User {user_id: row.user_id})
+        MATCH (p:Product {product_id: row.product_id})
+        MERGE (u)-[:IN_CART {added_at: coalesce(datetime(row.at), datetime())}]->(p)
+    """,
+    'purchased': """
+        UNWIND $rows AS row
+        MATCH (u:User {user_id: row.user_id})
+        MATCH (p:Product {product_id: row.product_id})
+        MERGE (u)-[:PURCHASED {
+            purchase_id: row.purchase_id,
+            quantity: row.quantity,
+            price: row.price,
+            purchased_at: coalesce(datetime(row.at), datetime())
+        }]->(p)
+    """,
+    'batch': """
+        UNWIND $rows AS row
+        MATCH (u:User {user_id: row.user_id})
+        MATCH (p:Product {product_id: row.product_id})
+        FOREACH (_ IN CASE WHEN row.kind = 'view' THEN [1] ELSE [] END |
+            MERGE (u)-[:VIEWED {viewed_at: datetime(row.at)}]->(p))
+        FOREACH (_ IN CASE WHEN row.kind = 'like' THEN [1] ELSE [] END |
+            MERGE (u)-[:LIKES {liked_at: datetime(row.at)}]->(p))
+        FOREACH (_ IN CASE WHEN row.kind = 'add_to_cart' THEN [1] ELSE [] END |
+            MERGE (u)-[:IN_CART {added_at: datetime(row.at)}]->(p))
+        FOREACH (_ IN CASE WHEN row.kind = 'purchase' THEN [1] ELSE [] END |
+            MERGE (u)-[:PURCHASED {
+                purchase_id: row.purchase_id,
+                quantity: row.quantity,
+                price: row.price,
+                purchased_at: datetime(row.at)
+            }]->(p))
+    """,
+}
 
 class Neo4jDB:
-    """Kelas untuk mengelola koneksi dan operasi Neo4j"""
+    """Kelas untuk mengelola koneksi dan operasi Neo4j.
+
+    Package `neo4j` dan driver-nya baru dimuat saat `driver` pertama kali
+    dipakai (atau saat `warm_up()`), jadi Neo4j yang lambat tidak menahan
+    startup aplikasi.
+    """
     
     def __init__(self):
-        self.driver = GraphDatabase.driver(
-            Config.NEO4J_URI,
-            auth=(Config.NEO4J_USER, Config.NEO4J_PASSWORD)
-        )
+        self._driver = None
+        self._lock = threading.Lock()
+        self.connect_seconds = None
+
+    @property
+    def driver(self):
+        """Driver Neo4j (dibuat saat pertama dipakai)"""
+        if self._driver is None:
+            with self._lock:
+                if self._driver is None:
+                    started = time.perf_counter()
+                    from neo4j import GraphDatabase
+                    driver = GraphDatabase.driver(
+                        Config.NEO4J_URI,
+                        auth=(Config.NEO4J_USER, Config.NEO4J_PASSWORD),
+                        max_connection_pool_size=Config.NEO4J_MAX_POOL_SIZE,
+                        connection_timeout=Config.NEO4J_CONNECTION_TIMEOUT,
+                        connection_acquisition_timeout=Config.NEO4J_ACQUISITION_TIMEOUT,
+                        max_connection_lifetime=Config.NEO4J_MAX_CONNECTION_LIFETIME,
+                        liveness_check_timeout=Config.NEO4J_MAX_IDLE_TIME,
+                    )
+                    neo4j_pool_monitor.instrument(driver, Config.NEO4J_MAX_POOL_SIZE)
+                    self._driver = driver
+                    self.connect_seconds = time.perf_counter() - started
+        return self._driver
+
+    @driver.setter
+    def driver(self, driver):
+        self._driver = driver
+
+    @property
+    def connected(self):
+        """True jika driver sudah dibuat"""
+        return self._driver is not None
+
+    def warm_up(self):
+        """Membuat driver dan memverifikasi koneksi ke server; mengembalikan durasi detik"""
+        started = time.perf_counter()
+        self.driver.verify_connectivity()
+        return time.perf_counter() - started
     
     def close(self):
-        """Menutup koneksi Neo4j"""
-        self.driver.close()
+        """Menutup koneksi Neo4j (driver dibuat ulang jika dipakai lagi)"""
+        with self._lock:
+            driver, self._driver = self._driver, None
+        if driver is not None:
+            driver.close()
     
+    def _write_batches(self, query, rows, chunk_size=None):
+        """Menjalankan query `UNWIND $rows` per potongan di dalam managed write transaction.
+
+        Setiap potongan berisi maksimal `chunk_size` row (default
+        `Config.NEO4J_BATCH_SIZE`). Error sementara (transient, koneksi putus)
+        dicoba ulang hingga `Config.NEO4J_WRITE_RETRIES` kali dengan backoff.
+        `rows` boleh berupa iterator (misal cursor MongoDB), tidak dimuat sekaligus.
+        Mengembalikan jumlah row yang ditulis.
+        """
+        rows = iter(rows)
+        chunk_size = chunk_size or Config.NEO4J_BATCH_SIZE
+        retryable = retryable_neo4j_errors()
+        written = 0
+
+        def run_chunk(tx, chunk):
+            tx.run(query, rows=chunk).consume()
+
+        with self.driver.session(database=Config.NEO4J_DATABASE) as session:
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                attempt = 0
+                while True:
+                    try:
+                        session.execute_write(run_chunk, chunk)
+                        break
+                    except retryable:
+                        attempt += 1
+                        if attempt > Config.NEO4J_WRITE_RETRIES:
+                            raise
+                        time.sleep(Config.NEO4J_RETRY_BACKOFF * (2 ** (attempt - 1)))
+                written += len(chunk)
+        return written
+
+    @metrics.timed_neo4j
+    def create_user_nodes(self, users, chunk_size=None):
+        """Membuat/memperbarui banyak node user sekaligus.
+
+        Setiap row: {'user_id', 'name', 'email'}.
+        """
+        rows = (
+            {'user_id': u.get('user_id'), 'name': u.get('name'), 'email': u.get('email')}
+            for u in users
+        )
+        return self._write_batches("""
+            UNWIND $rows AS row
+            MERGE (u:User {user_id: row.user_id})
+            ON CREATE SET u.created_at = datetime()
+            SET u.name = row.name,
+                u.email = row.email
+        """, rows, chunk_size)
+
+    @metrics.timed_neo4j
+    def create_product_nodes(self, products, chunk_size=None):
+        """Membuat/memperbarui banyak node product sekaligus.
+
+        Setiap row: {'product_id', 'name', 'category', 'tags'}.
+        """
+        rows = (
+            {
+                'product_id': str(p.get('product_id')),
+                'name': p.get('name'),
+                'category': p.get('category'),
+                'tags': p.get('tags') or [],
+            }
+            for p in products
+        )
+        return self._write_batches("""
+            UNWIND $rows AS row
+            MERGE (p:Product {product_id: row.product_id})
+            SET p.name = row.name,
+                p.category = row.category,
+                p.tags = row.tags
+        """, rows, chunk_size)
+
+    @staticmethod
+    def _relationship_rows(rows, *extra_fields):
+        """Menyiapkan row relasi: id sebagai string dan waktu sebagai ISO string"""
+        for row in rows:
+            at = row.get('at')
+            item = {
+                'user_id': row.get('user_id'),
+                'product_id': str(row.get('product_id')),
+                'at': at.isoformat() if isinstance(at, datetime) else at,
+            }
+            for field in extra_fields:
+                item[field] = row.get(field)
+            yield item
+
+    @metrics.timed_neo4j
+    def create_viewed_relationships(self, rows, chunk_size=None):
+        """Membuat banyak relasi VIEWED. Row: {'user_id', 'product_id', 'at' (opsional)}"""
+        return self._write_batches(ACTIVITY_CYPHER['viewed'], self._relationship_rows(rows), chunk_size)
+
+    @metrics.timed_neo4j
+    def create_likes_relationships(self, rows, chunk_size=None):
+        """Membuat banyak relasi LIKES. Row: {'user_id', 'product_id', 'at' (opsional)}"""
+        return self._write_batches(ACTIVITY_CYPHER['likes'], self._relationship_rows(rows), chunk_size)
+
+    @metrics.timed_neo4j
+    def create_in_cart_relationships(self, rows, chunk_size=None):
+        """Membuat banyak relasi IN_CART. Row: {'user_id', 'product_id', 'at' (opsional)}"""
+        return self._write_batches(ACTIVITY_CYPHER['in_cart'], self._relationship_rows(rows), chunk_size)
+
+    @metrics.timed_neo4j
+    def create_purchased_relationships(self, rows, chunk_size=None):
+        """Membuat banyak relasi PURCHASED.
+
+        Row: {'user_id', 'product_id', 'purchase_id', 'quantity', 'price', 'at' (opsional)}.
+        """
+        prepared = (
+            dict(row, quantity=1) if row['quantity'] is None else row
+            for row in self._relationship_rows(rows, 'purchase_id', 'quantity', 'price')
+        )
+        return self._write_batches(ACTIVITY_CYPHER['purchased'], prepared, chunk_size)
+
     def create_user_node(self, user_id, user_data):
         """Membuat node user di Neo4j"""
-        with self.driver.session(database=Config.NEO4J_DATABASE) as session:
-            session.run("""
-                CREATE (u:User {
-                    user_id: $user_id,
-                    name: $name,
-                    email: $email,
-                    created_at: datetime()
-                })
-            """, user_id=user_id, name=user_data.get('name'), email=user_data.get('email'))
+        self.create_user_nodes([dict(user_data, user_id=user_id)])
     
     def create_product_node(self, product_id, product_data):
         """Membuat node product di Neo4j"""
-        with self.driver.session(database=Config.NEO4J_DATABASE) as session:
-            session.run("""
-                MERGE (p:Product {product_id: $product_id})
-                SET p.name = $name,
-                    p.category = $category,
-                    p.tags = $tags
-            """, product_id=product_id, 
-                 name=product_data.get('name'), 
-                 category=product_data.get('category'),
-                 tags=product_data.get('tags', []))
+        self.create_product_nodes([dict(product_data, product_id=product_id)])
     
     def create_viewed_relationship(self, user_id, product_id):
         """Membuat relasi VIEWED antara user dan product"""
-        with self.driver.session(database=Config.NEO4J_DATABASE) as session:
-            session.run("""
-                MATCH (u:User {user_id: $user_id})
-                MATCH (p:Product {product_id: $product_id})
-                MERGE (u)-[r:VIEWED {viewed_at: datetime()}]->(p)
-                MERGE (u)-[r:IN_CART {added_at: datetime()}]->(p)
-            """, user_id=user_id, product_id=product_id)
+        self.create_viewed_relationships([{'user_id': user_id, 'product_id': product_id}])
     
     def create_purchased_relationship(self, user_id, product_id, purchase_data):
         """Membuat relasi PURCHASED antara user dan product"""
-        with self.driver.session(database=Config.NEO4J_DATABASE) as session:
-            session.run("""
-                MATCH (u:User {user_id: $user_id})
-                MATCH (p:Product {product_id: $product_id})
-                MERGE (u)-[r:PURCHASED {
-                    purchase_id: $purchase_id,
-                    quantity: $quantity,
-                    price: $price,
-                    purchased_at: datetime()
-                }]->(p)
-            """, user_id=user_id, product_id=product_id, 
-                 purchase_id=purchase_data.get('purchase_id'),
-                 quantity=purchase_data.get('quantity', 1),
-                 price=purchase_data.get('price'))
+        self.create_purchased_relationships([{
+            'user_id': user_id,
+            'product_id': product_id,
+            'purchase_id': purchase_data.get('purchase_id'),
+            'quantity': purchase_data.get('quantity', 1),
+            'price': purchase_data.get('price'),
+        }])
     
     def create_likes_relationship(self, user_id, product_id):
         """Membuat relasi LIKES antara user dan product"""
-        with self.driver.session(database=Config.NEO4J_DATABASE) as session:
-            session.run("""
-                MATCH (u:User {user_id: $user_id})
-                MATCH (p:Product {product_id: $product_id})
-                MERGE (u)-[r:LIKES {liked_at: datetime()}]->(p)
-            """, user_id=user_id, product_id=product_id)
+        self.create_likes_relationships([{'user_id': user_id, 'product_id': product_id}])
     
     def create_in_cart_relationship(self, user_id, product_id):
         """Membuat relasi IN_CART antara user dan product"""
-        with self.driver.session(database=Config.NEO4J_DATABASE) as session:
-            session.run("""
-                MATCH (u:User {user_id: $user_id})
-                MATCH (p:Product {product_id: $product_id})
-                MERGE (u)-[r:IN_CART {added_at: datetime()}]->(p)
-            """, user_id=user_id, product_id=product_id)
-    
+        self.create_in_cart_relationships([{'user_id': user_id, 'product_id': product_id}])
+
+    @metrics.timed_neo4j
+    def write_activity_batch(self, rows):
+        """Menulis sekumpulan aktivitas user (view/like/add_to_cart/purchase) dalam satu statement.
+
+        Setiap row: {'kind', 'user_id', 'product_id', 'at' (ISO datetime)} dan untuk
+        purchase juga 'purchase_id', 'quantity', 'price'.
+        """
+        if not rows:
+            return 0
+        return self._write_batches(ACTIVITY_CYPHER['batch'], rows)
+
+    @cached_recommendation('user')
+    @metrics.timed_neo4j
     def get_user_recommendations(self, user_id, limit=5):
         """Mendapatkan rekomendasi produk berdasarkan preferensi user"""
         with self.driver.session(database=Config.NEO4J_DATABASE) as session:
@@ -206,6 +962,8 @@ class Neo4jDB:
             """, user_id=user_id, limit=limit)
             return [record.data() for record in result]
     
+    @cached_recommendation('similar')
+    @metrics.timed_neo4j
     def get_similar_products(self, product_id, limit=5):
         """Mendapatkan produk yang mirip berdasarkan user yang sama"""
         with self.driver.session(database=Config.NEO4J_DATABASE) as session:
@@ -219,6 +977,8 @@ class Neo4jDB:
             """, product_id=product_id, limit=limit)
             return [record.data() for record in result]
     
+    @cached_recommendation('bought_together')
+    @metrics.timed_neo4j
     def get_frequently_bought_together(self, product_id, limit=5):
         """
         Mendapatkan produk yang sering dibeli bersama dengan produk tertentu.
@@ -234,6 +994,8 @@ class Neo4jDB:
             """, product_id=product_id, limit=limit)
             return [dict(record) for record in result]
 
+    @cached_recommendation('content')
+    @metrics.timed_neo4j
     def get_content_based_similar_products(self, product_id, limit=5):
         """
         Mendapatkan produk serupa berdasarkan kategori dan tag yang sama.
@@ -252,6 +1014,7 @@ class Neo4jDB:
             """, product_id=product_id, limit=limit)
             return [dict(record) for record in result]
 
+    @metrics.timed_neo4j
     def delete_product_node(self, product_id):
         """Menghapus node produk dan semua relasinya di Neo4j"""
         with self.driver.session(database=Config.NEO4J_DATABASE) as session:
@@ -260,6 +1023,25 @@ class Neo4jDB:
                 DETACH DELETE p
             """, product_id=product_id)
 
-# Instance database
+# Instance database (koneksi dibuat saat pertama dipakai, lihat warm_up_databases)
 mongodb = MongoDB()
-neo4j_db = Neo4jDB() 
\ No newline at end of file
+neo4j_db = Neo4jDB()
+product_catalog = ProductCatalog(mongodb)
+product_catalog.subscribe(recommendation_cache)
+product_ids = IdAllocator(mongodb, 'products', 'products')
+
+def warm_up_databases(mongo=True, neo4j=True):
+    """Membuka koneksi MongoDB/Neo4j lebih awal (pre-warm terkontrol).
+
+    Mengembalikan {nama: durasi detik atau pesan error}; kegagalan satu
+    database tidak menghentikan yang lain.
+    """
+    results = {}
+    for name, enabled, handle in (('mongodb', mongo, mongodb), ('neo4j', neo4j, neo4j_db)):
+        if not enabled:
+            continue
+        try:
+            results[name] = handle.warm_up()
+        except Exception as e:
+            results[name] = str(e)
+    return results
@@ -0,0 +1,391 @@
+"""
+Modul pipeline event aktivitas user (write-behind ke MongoDB dan Neo4j)
+"""
+
+from collections import Counter
+from datetime import datetime
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from bson import json_util
+from pymongo.errors import BulkWriteError
+from config import Config
+from src.database import mongodb, neo4j_db
+
+log = logging.getLogger(__name__)
+
+# Koleksi MongoDB tujuan untuk setiap jenis event
+# ('order' tidak ada di sini: dokumen pesanan sudah ditulis saat checkout, event hanya untuk subscriber)
+EVENT_COLLECTIONS = {
+    'view': 'product_views',
+    'like': 'user_interactions',
+    'add_to_cart': 'user_interactions',
+    'purchase': 'purchases',
+}
+
+# Event yang tidak boleh dibuang saat antrian penuh atau saat penulisan gagal
+CRITICAL_EVENTS = {'purchase', 'order'}
+
+# Kode error MongoDB untuk _id ganda: dokumen sudah tersimpan oleh percobaan sebelumnya
+_DUPLICATE_KEY = 11000
+
+_STOP = object()
+
+class ActivityEventPipeline:
+    """Antrian in-process untuk event tracking yang ditulis secara batch di background.
+
+    Request cukup memasukkan event ke antrian (`submit`). Worker thread
+    mengambil hingga `batch_size` event atau menunggu `flush_interval`, lalu
+    menulis satu `insert_many` per koleksi dan satu statement Neo4j untuk
+    seluruh batch. Turunan event (leaderboard, counter "sering dibeli
+    bersama", invalidasi cache rekomendasi) mendaftar lewat `subscribe()`
+    dan menerima batch yang sama setelah ditulis.
+
+    Saat antrian penuh, event telemetri mengikuti `queue_full_policy`
+    (`drop_newest`, `drop_oldest`, `block`), sedangkan event pembelian
+    ditulis langsung secara sinkron agar tidak pernah hilang. Jika MongoDB
+    menolak penulisan, event pembelian dicoba ulang `write_retries` kali lalu
+    disimpan ke `spill_path` (JSONL) untuk `replay_spilled()`. Subscriber
+    hanya menerima event yang dokumennya benar-benar tersimpan.
+    """
+
+    def __init__(self, db, graph, maxsize=None, batch_size=None, flush_interval=None,
+                 workers=None, queue_full_policy=None, block_timeout=None, enabled=None,
+                 write_retries=None, spill_path=None):
+        self.mongodb = db
+        self.graph = graph
+        self.write_retries = Config.EVENT_WRITE_RETRIES if write_retries is None else write_retries
+        self.spill_path = spill_path or Config.EVENT_SPILL_PATH
+        self._spill_lock = threading.Lock()
+        self._subscribers = ()
+        self.maxsize = maxsize or Config.EVENT_QUEUE_SIZE
+        self.batch_size = batch_size or Config.EVENT_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else Config.EVENT_FLUSH_INTERVAL
+        self.worker_count = workers or Config.EVENT_WORKERS
+        self.queue_full_policy = queue_full_policy or Config.EVENT_QUEUE_FULL_POLICY
+        self.block_timeout = block_timeout if block_timeout is not None else Config.EVENT_BLOCK_TIMEOUT
+        self.enabled = Config.ACTIVITY_WRITE_BEHIND if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._queue = None
+        self._workers = []
+        self._pid = None
+        self._pending = 0
+        self._idle = threading.Condition(self._lock)
+        self._counters = Counter()
+        self._stats_lock = threading.Lock()
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+
+    def subscribe(self, name, callback):
+        """Mendaftarkan `callback(batch)` yang dijalankan setelah batch ditulis ke MongoDB dan Neo4j.
+
+        Error callback dihitung sebagai `<name>_errors` dan tidak menghentikan subscriber lain.
+        """
+        with self._lock:
+            self._subscribers += ((name, callback),)
+
+    # --- Siklus hidup worker ---
+
+    def start(self):
+        """Menjalankan worker thread (otomatis dipanggil saat event pertama masuk)"""
+        with self._lock:
+            # Setelah fork (misal gunicorn --preload) thread induk tidak ikut, jadi buat ulang
+            if self._workers and self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.maxsize)
+            self._pending = 0
+            self._pid = os.getpid()
+            self._workers = []
+            for i in range(self.worker_count):
+                worker = threading.Thread(target=self._run, name=f'activity-events-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def flush(self, timeout=5.0):
+        """Menunggu sampai semua event di antrian selesai ditulis"""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def shutdown(self, timeout=5.0):
+        """Menulis sisa event lalu menghentikan worker (dipanggil saat proses berhenti)"""
+        with self._lock:
+            workers, event_queue = self._workers, self._queue
+            if not workers or self._pid != os.getpid():
+                return
+            self._workers = []
+        self.flush(timeout)
+        for _ in workers:
+            try:
+                event_queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                break
+        for worker in workers:
+            worker.join(timeout)
+
+    # --- Producer ---
+
+    def submit(self, kind, user_id, product_id, document, graph_row=None):
+        """Memasukkan satu event ke antrian; mengembalikan False jika event dibuang"""
+        event = {
+            'kind': kind,
+            'user_id': user_id,
+            'product_id': product_id,
+            'document': document,
+            'graph_row': graph_row or {},
+            'at': datetime.now().isoformat(),
+            'enqueued_at': time.monotonic(),
+        }
+        if not self.enabled:
+            self._write_batch([event])
+            return True
+        if not self._workers or self._pid != os.getpid():
+            self.start()
+
+        with self._lock:
+            self._pending += 1
+        if self._enqueue(event):
+            self._count('enqueued')
+            return True
+        self._done(1)
+
+        if kind in CRITICAL_EVENTS:
+            # Backpressure: event penting ditulis langsung di thread pemanggil
+            self._count('written_sync')
+            self._write_batch([event])
+            return True
+        self._count(f'dropped_{kind}')
+        self._count('dropped')
+        return False
+
+    def _enqueue(self, event):
+        try:
+            if self.queue_full_policy == 'block' or event['kind'] in CRITICAL_EVENTS:
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            pass
+        if self.queue_full_policy == 'drop_oldest':
+            try:
+                oldest = self._queue.get_nowait()
+            except queue.Empty:
+                oldest = None
+            if oldest is not None and oldest is not _STOP:
+                if oldest['kind'] in CRITICAL_EVENTS:
+                    # Jangan korbankan pembelian: tulis sinkron lalu beri tempat
+                    self._count('written_sync')
+                    self._write_batch([oldest])
+                else:
+                    self._count(f"dropped_{oldest['kind']}")
+                    self._count('dropped')
+                self._done(1)
+            try:
+                self._queue.put_nowait(event)
+                return True
+            except queue.Full:
+                return False
+        return False
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._counters[name] += amount
+
+    def _done(self, count):
+        with self._idle:
+            self._pending -= count
+            if self._pending <= 0:
+                self._pending = 0
+                self._idle.notify_all()
+
+    # --- Consumer ---
+
+    def _run(self):
+        event_queue = self._queue
+        while True:
+            batch = []
+            try:
+                first = event_queue.get()
+            except Exception:
+                continue
+            if first is _STOP:
+                return
+            batch.append(first)
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    event = event_queue.get(timeout=remaining) if remaining > 0 else event_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event is _STOP:
+                    stop = True
+                    break
+                batch.append(event)
+            try:
+                self._write_batch(batch)
+            finally:
+                self._done(len(batch))
+            if stop:
+                return
+
+    def _insert(self, collection_name, events):
+        """`insert_many` dokumen event; mengembalikan event yang gagal ditulis.
+
+        Jika ada event penting, yang gagal dicoba ulang dengan jeda bertambah.
+        """
+        attempts = 1 + (self.write_retries if any(e['kind'] in CRITICAL_EVENTS for e in events) else 0)
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(0.1 * 2 ** (attempt - 1))
+            try:
+                self.mongodb.get_collection(collection_name).insert_many(
+                    [event['document'] for event in events], ordered=False
+                )
+                return []
+            except BulkWriteError as e:
+                failed_indexes = {
+                    error['index'] for error in e.details.get('writeErrors', [])
+                    if error.get('code') != _DUPLICATE_KEY
+                }
+                events = [event for index, event in enumerate(events) if index in failed_indexes]
+                error = e
+            except Exception as e:
+                error = e
+            if not events:
+                return []
+            self._count('mongo_errors')
+            log.error("Error writing %d events to %s (attempt %d/%d): %s",
+                      len(events), collection_name, attempt + 1, attempts, error)
+        return events
+
+    def _spill(self, events):
+        """Menyimpan event penting yang gagal ditulis ke file JSONL untuk di-replay"""
+        try:
+            os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+            with self._spill_lock, open(self.spill_path, 'a', encoding='utf-8') as f:
+                for event in events:
+                    fields = {key: event[key] for key in ('kind', 'user_id', 'product_id', 'document', 'graph_row', 'at')}
+                    f.write(json_util.dumps(fields) + '\n')
+            self._count('spilled', len(events))
+            log.warning("Spilled %d critical events to %s", len(events), self.spill_path)
+        except Exception:
+            self._count('lost', len(events))
+            log.exception("Error spilling %d critical events", len(events))
+
+    def _write_batch(self, batch):
+        """Menulis satu batch event ke MongoDB dan Neo4j, lalu menjalankan subscriber untuk event yang tersimpan"""
+        grouped = {}
+        for event in batch:
+            if event['kind'] in EVENT_COLLECTIONS:
+                grouped.setdefault(EVENT_COLLECTIONS[event['kind']], []).append(event)
+
+        failed = []
+        for collection_name, events in grouped.items():
+            failed.extend(self._insert(collection_name, events))
+        if failed:
+            critical = [event for event in failed if event['kind'] in CRITICAL_EVENTS]
+            if critical:
+                self._spill(critical)
+            dropped = len(failed) - len(critical)
+            if dropped:
+                self._count('write_failed', dropped)
+            failed_ids = {id(event) for event in failed}
+            # Event tanpa koleksi ('order') sudah tersimpan sebelum masuk antrian
+            stored = [event for event in batch if id(event) not in failed_ids]
+        else:
+            stored = batch
+
+        graph_rows = []
+        for event in stored:
+            if event['kind'] not in EVENT_COLLECTIONS:
+                continue
+            row = {
+                'kind': event['kind'],
+                'user_id': event['user_id'],
+                'product_id': event['product_id'],
+                'at': event['at'],
+            }
+            row.update(event['graph_row'])
+            graph_rows.append(row)
+        try:
+            self.graph.write_activity_batch(graph_rows)
+        except Exception as e:
+            self._count('neo4j_errors')
+            log.error("Error writing %d events to Neo4j: %s", len(graph_rows), e)
+        if stored:
+            for name, callback in self._subscribers:
+                try:
+                    callback(stored)
+                except Exception:
+                    self._count(f'{name}_errors')
+                    log.exception("Error in activity event subscriber %s", name)
+
+        now = time.monotonic()
+        lag = max(now - event['enqueued_at'] for event in batch)
+        self._last_lag = lag
+        self._max_lag = max(self._max_lag, lag)
+        self._count('written', len(stored))
+        self._count('batches')
+
+    def replay_spilled(self, batch_size=None):
+        """Menulis ulang event dari file spill; yang masih gagal ditulis ke file spill baru.
+
+        Mengembalikan jumlah event yang dibaca dari file.
+        """
+        replaying = f'{self.spill_path}.replaying'
+        with self._spill_lock:
+            if not os.path.exists(replaying):
+                if not os.path.exists(self.spill_path):
+                    return 0
+                os.replace(self.spill_path, replaying)
+        batch_size = batch_size or self.batch_size
+        total = 0
+        batch = []
+        with open(replaying, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                event = json_util.loads(line)
+                event['enqueued_at'] = time.monotonic()
+                batch.append(event)
+                if len(batch) >= batch_size:
+                    self._write_batch(batch)
+                    total += len(batch)
+                    batch = []
+        if batch:
+            self._write_batch(batch)
+            total += len(batch)
+        os.remove(replaying)
+        return total
+
+    # --- Metrics ---
+
+    def stats(self):
+        """Statistik pipeline: kedalaman antrian, lag, jumlah event ditulis/dibuang"""
+        with self._stats_lock:
+            stats = dict(self._counters)
+        stats.update({
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'queue_capacity': self.maxsize,
+            'pending': self._pending,
+            'workers': len(self._workers),
+            'last_batch_lag_seconds': round(self._last_lag, 6),
+            'max_batch_lag_seconds': round(self._max_lag, 6),
+        })
+        return stats
+
+# Instance pipeline event aktivitas
+# (leaderboard, bought_together, dan auth mendaftarkan subscriber masing-masing)
+activity_events = ActivityEventPipeline(mongodb, neo4j_db)
+atexit.register(activity_events.shutdown)
@@ -0,0 +1,95 @@
+"""
+Modul eksekusi paralel sumber rekomendasi dengan batas waktu (latency budget)
+"""
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+import logging
+import threading
+import time
+from config import Config
+from src.logs import log_warning
+
+log = logging.getLogger(__name__)
+
+class FanOut:
+    """Menjalankan beberapa sumber data sekaligus di executor bersama.
+
+    Semua sumber dijalankan paralel dan ditunggu maksimal `budget` detik secara
+    keseluruhan. Sumber yang belum selesai saat batas waktu habis, atau yang
+    error, mengembalikan nilai default (list kosong) dan dicatat di statistik.
+    Dengan begitu latensi halaman dibatasi oleh sumber paling lambat atau
+    budget, mana yang lebih kecil.
+    """
+
+    def __init__(self, max_workers=None, thread_name_prefix='fanout'):
+        self.max_workers = max_workers or Config.RECOMMENDATION_WORKERS
+        self.thread_name_prefix = thread_name_prefix
+        self._executor = None
+        self._lock = threading.Lock()
+        self._counters = Counter()
+        self._latency = Counter()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=self.thread_name_prefix
+                    )
+        return self._executor
+
+    def _timed(self, name, fn):
+        started = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._latency[name] += time.perf_counter() - started
+
+    def _count(self, name, outcome):
+        with self._lock:
+            self._counters[(name, outcome)] += 1
+
+    def gather(self, sources, budget=None, default=list):
+        """Menjalankan `sources` ({nama: callable}) paralel dalam batas `budget` detik.
+
+        Mengembalikan {nama: hasil}; sumber yang timeout/error bernilai `default()`.
+        """
+        budget = Config.RECOMMENDATION_BUDGET_MS / 1000.0 if budget is None else budget
+        executor = self._get_executor()
+        futures = {executor.submit(self._timed, name, fn): name for name, fn in sources.items()}
+        done, not_done = wait(futures, timeout=budget)
+
+        results = {}
+        for future, name in futures.items():
+            if future in not_done:
+                # Tidak bisa menghentikan query yang sedang berjalan, tapi yang
+                # belum mulai dibatalkan agar tidak menahan worker
+                future.cancel()
+                self._count(name, 'timeout')
+                log_warning(log, f'fanout_timeout:{name}', "Recommendation source '%s' exceeded %.0fms budget", name, budget * 1000)
+                results[name] = default()
+                continue
+            try:
+                results[name] = future.result()
+                self._count(name, 'ok')
+            except Exception as e:
+                self._count(name, 'error')
+                log_warning(log, f'fanout_error:{name}', "Recommendation source '%s' failed: %s", name, e)
+                results[name] = default()
+        return results
+
+    def stats(self):
+        """Statistik per sumber: jumlah ok/timeout/error dan total waktu eksekusi"""
+        with self._lock:
+            stats = {}
+            for (name, outcome), count in self._counters.items():
+                stats.setdefault(name, {'ok': 0, 'timeout': 0, 'error': 0})[outcome] = count
+            for name, seconds in self._latency.items():
+                stats.setdefault(name, {'ok': 0, 'timeout': 0, 'error': 0})['seconds_total'] = round(seconds, 6)
+            return stats
+
+# Executor bersama untuk sumber rekomendasi di halaman produk
+recommendation_fanout = FanOut(thread_name_prefix='recommendations')
@@ -0,0 +1,85 @@
+"""
+Modul cache fragmen template Jinja: tag {% cache key, ttl %} ... {% endcache %}
+"""
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from config import Config
+from src.cache import TTLCache
+
+class FragmentCache:
+    """Menyimpan hasil render potongan template yang sama untuk banyak request.
+
+    Kunci fragmen selalu digabung dengan versi dari `version_source` (versi
+    katalog), jadi perubahan produk otomatis membuat fragmen lama tidak
+    terpakai lagi dan terbuang oleh LRU/TTL. Isi fragmen tidak boleh
+    bergantung pada user yang login; bagian seperti itu tetap di luar blok.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self._cache = TTLCache(
+            maxsize or Config.FRAGMENT_CACHE_SIZE,
+            Config.FRAGMENT_CACHE_TTL if ttl is None else ttl
+        )
+        self.version_source = lambda: None
+        self.renders = 0
+
+    def init_app(self, app, version_source=None):
+        """Memasang extension `{% cache %}` ke environment Jinja aplikasi"""
+        if version_source is not None:
+            self.version_source = version_source
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.fragment_cache = self
+
+    def _key(self, key):
+        return repr((key, self.version_source()))
+
+    def render(self, key, ttl, render):
+        """Mengambil fragmen dari cache, atau me-render lalu menyimpannya"""
+        full_key = self._key(key)
+        value = self._cache.get(full_key)
+        if value is None:
+            value = render()
+            self.renders += 1
+            self._cache.set(full_key, value, ttl)
+        return value
+
+    def clear(self):
+        """Mengosongkan cache fragmen"""
+        self._cache.clear()
+
+    def stats(self):
+        """Statistik cache fragmen"""
+        stats = self._cache.stats()
+        stats['renders'] = self.renders
+        return stats
+
+class FragmentCacheExtension(Extension):
+    """Tag `{% cache key[, ttl] %}...{% endcache %}`.
+
+    `key` bisa berupa tuple, misal `('grid', products|map(attribute='id')|join(','))`;
+    `ttl` (detik) opsional, default `FRAGMENT_CACHE_TTL`.
+    """
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_cache_support', args), [], [], body
+        ).set_lineno(lineno)
+
+    def _cache_support(self, key, ttl, caller):
+        fragment_cache = getattr(self.environment, 'fragment_cache', None)
+        if fragment_cache is None:
+            return caller()
+        return fragment_cache.render(key, ttl, caller)
+
+# Instance cache fragmen template
+fragment_cache = FragmentCache()
@@ -0,0 +1,265 @@
+"""
+Modul pipeline gambar upload: penyimpanan berbasis hash konten dan varian ukuran (thumbnail)
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from config import Config
+
+log = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps
+    PILLOW_AVAILABLE = True
+except ImportError:
+    Image = ImageOps = None
+    PILLOW_AVAILABLE = False
+
+# Nama file original: <hash>.<ext>, varian: <hash>_<lebar>w.<ext>
+_ORIGINAL_RE = re.compile(r'^([0-9a-f]{32})\.([a-z0-9]+)$')
+_URL_RE = re.compile(r'^(.*/)([0-9a-f]{32})\.([a-z0-9]+)$')
+_EXTENSION_ALIASES = {'jpeg': 'jpg'}
+
+class ImagePipeline:
+    """Menyimpan gambar upload satu kali per konten dan membuat varian ukurannya.
+
+    File disimpan dengan nama hash SHA-256 isinya, jadi upload gambar yang
+    sama (byte identik) memakai file yang sudah ada. Varian `thumb`, `card`,
+    dan `large` dibuat dengan Pillow di thread pool, di luar thread request;
+    template memakai `variant_url`/`variants`, yang kembali ke gambar original
+    selama varian belum selesai dibuat.
+    """
+
+    VARIANTS = {'thumb': 160, 'card': 400, 'large': 800}
+    # Gambar tanpa varian di disk tidak dicek ulang sebelum selang ini (detik)
+    MISSING_RECHECK_SECONDS = 60
+
+    def __init__(self, upload_folder=None, workers=None, quality=None, static_folder='static', static_url_path='/static'):
+        self.upload_folder = upload_folder or Config.UPLOAD_FOLDER
+        self.workers = workers or Config.IMAGE_WORKERS
+        self.quality = quality or Config.IMAGE_JPEG_QUALITY
+        # Path upload relatif terhadap folder static, misal 'uploads' untuk 'static/uploads'
+        self.static_prefix = os.path.relpath(
+            os.path.abspath(self.upload_folder), os.path.abspath(static_folder)
+        ).replace(os.sep, '/')
+        self.url_prefix = f"{static_url_path}/{self.static_prefix}/"
+        self._executor = None
+        self._lock = threading.Lock()
+        self._ready = {}
+        self._missing = {}
+        self._pending = set()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-variants')
+        return self._executor
+
+    # --- Penyimpanan ---
+
+    @staticmethod
+    def _extension(filename):
+        extension = os.path.splitext(filename or '')[1].lstrip('.').lower() or 'jpg'
+        return _EXTENSION_ALIASES.get(extension, extension)
+
+    def store_bytes(self, data, original_name):
+        """Menyimpan isi file dengan nama hash konten; mengembalikan (nama file, baru disimpan?)"""
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        filename = f"{digest}.{self._extension(original_name)}"
+        os.makedirs(self.upload_folder, exist_ok=True)
+        path = os.path.join(self.upload_folder, filename)
+        if os.path.exists(path):
+            return filename, False
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return filename, True
+
+    def save_upload(self, file_storage):
+        """Menyimpan file upload (werkzeug FileStorage) dan menjadwalkan pembuatan varian.
+
+        Mengembalikan path relatif terhadap folder static, misal `uploads/<hash>.jpg`.
+        """
+        filename, _ = self.store_bytes(file_storage.read(), file_storage.filename)
+        self.schedule_variants(filename)
+        return f"{self.static_prefix}/{filename}"
+
+    # --- Varian ---
+
+    def _variant_filename(self, digest, extension, width):
+        return f"{digest}_{width}w.{extension}"
+
+    def generate_variants(self, filename):
+        """Membuat semua varian untuk satu file original (sinkron); mengembalikan [(lebar, nama file)]"""
+        match = _ORIGINAL_RE.match(filename)
+        if not match or not PILLOW_AVAILABLE:
+            return []
+        digest, extension = match.groups()
+        source = os.path.join(self.upload_folder, filename)
+        created = []
+        with Image.open(source) as image:
+            image_format = image.format
+            image = ImageOps.exif_transpose(image)
+            for width in sorted(self.VARIANTS.values()):
+                if width >= image.width:
+                    break
+                target = os.path.join(self.upload_folder, self._variant_filename(digest, extension, width))
+                if not os.path.exists(target):
+                    variant = image.copy()
+                    variant.thumbnail((width, width * 4))
+                    if extension == 'jpg' and variant.mode not in ('RGB', 'L'):
+                        variant = variant.convert('RGB')
+                    tmp_path = f"{target}.{threading.get_ident()}.tmp"
+                    variant.save(tmp_path, format=image_format, quality=self.quality, optimize=True)
+                    os.replace(tmp_path, target)
+                created.append((width, self._variant_filename(digest, extension, width)))
+            # Original ikut dicantumkan sebagai ukuran terbesar di srcset
+            created.append((image.width, filename))
+        with self._lock:
+            self._ready[digest] = created
+            self._missing.pop(digest, None)
+        return created
+
+    def _generate_safely(self, filename):
+        try:
+            return self.generate_variants(filename)
+        except Exception as e:
+            log.error("Error generating image variants for %s: %s", filename, e)
+            return []
+        finally:
+            with self._lock:
+                self._pending.discard(filename)
+
+    def schedule_variants(self, filename):
+        """Menjadwalkan pembuatan varian di thread pool (tidak menunggu)"""
+        if not PILLOW_AVAILABLE:
+            return None
+        with self._lock:
+            if filename in self._pending:
+                return None
+            self._pending.add(filename)
+        return self._get_executor().submit(self._generate_safely, filename)
+
+    def _available_variants(self, digest, extension):
+        """Varian yang sudah ada di disk untuk satu hash.
+
+        Hasil positif di-memo permanen; hasil kosong di-memo selama
+        `MISSING_RECHECK_SECONDS` agar render halaman tidak memanggil
+        `os.path.exists` berulang untuk gambar yang belum punya varian.
+        """
+        ready = self._ready.get(digest)
+        if ready is not None:
+            return ready
+        checked_at = self._missing.get(digest)
+        now = time.monotonic()
+        if checked_at is not None and now - checked_at < self.MISSING_RECHECK_SECONDS:
+            return []
+        found = []
+        for width in sorted(self.VARIANTS.values()):
+            name = self._variant_filename(digest, extension, width)
+            if os.path.exists(os.path.join(self.upload_folder, name)):
+                found.append((width, name))
+        if not found:
+            with self._lock:
+                self._missing[digest] = now
+            return found
+        if PILLOW_AVAILABLE:
+            # Varian dibuat proses lain: baca lebar original dari header file saja
+            original = f"{digest}.{extension}"
+            try:
+                with Image.open(os.path.join(self.upload_folder, original)) as image:
+                    found.append((image.width, original))
+            except OSError:
+                pass
+        with self._lock:
+            self._ready[digest] = found
+            self._missing.pop(digest, None)
+        return found
+
+    def variants(self, image_url):
+        """[(lebar, url)] varian yang tersedia untuk URL gambar original"""
+        match = _URL_RE.match(image_url or '')
+        if not match:
+            return []
+        prefix, digest, extension = match.groups()
+        return [(width, prefix + name) for width, name in self._available_variants(digest, extension)]
+
+    def variant_url(self, image_url, name):
+        """URL varian terkecil yang lebarnya >= ukuran varian `name`, atau URL original"""
+        target = self.VARIANTS[name]
+        for width, url in self.variants(image_url):
+            if width >= target:
+                return url
+        return image_url
+
+    # --- Backfill ---
+
+    def backfill(self, prune=False):
+        """Memindahkan upload lama ke nama hash konten, memperbarui produk, dan membuat varian.
+
+        Dengan `prune`, file lama (nama acak) dihapus setelah URL produk di
+        database diperbarui, jadi produk tidak pernah menunjuk ke file yang
+        sudah hilang.
+        """
+        from src.database import mongodb, product_catalog
+
+        renamed = {}
+        originals = set()
+        os.makedirs(self.upload_folder, exist_ok=True)
+        for name in sorted(os.listdir(self.upload_folder)):
+            path = os.path.join(self.upload_folder, name)
+            if not os.path.isfile(path) or name.endswith('.tmp'):
+                continue
+            if _ORIGINAL_RE.match(name):
+                originals.add(name)
+                continue
+            if re.match(r'^[0-9a-f]{32}_\d+w\.', name):
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            filename, _ = self.store_bytes(data, name)
+            originals.add(filename)
+            renamed[name] = filename
+
+        products = mongodb.get_collection('products')
+        updated = 0
+        url_map = {}
+        for old, new in renamed.items():
+            url_map[self.url_prefix + old] = self.url_prefix + new
+        if url_map:
+            for product in products.find({'image': {'$in': list(url_map)}}):
+                products.update_one({'_id': product['_id']}, {'$set': {'image': url_map[product['image']]}})
+                product['image'] = url_map[product['image']]
+                product_catalog.upsert(product)
+                updated += 1
+        if prune:
+            for old in renamed:
+                os.remove(os.path.join(self.upload_folder, old))
+
+        futures = [self._get_executor().submit(self._generate_safely, name) for name in sorted(originals)]
+        wait(futures)
+        return {
+            'files': len(renamed),
+            'unique_images': len(originals),
+            'products_updated': updated,
+            'variants': sum(len(future.result()) for future in futures),
+        }
+
+    def stats(self):
+        """Statistik pipeline gambar"""
+        return {
+            'ready': len(self._ready),
+            'missing': len(self._missing),
+            'pending': len(self._pending),
+            'pillow': PILLOW_AVAILABLE,
+        }
+
+# Instance pipeline gambar upload
+image_pipeline = ImagePipeline()
@@ -0,0 +1,180 @@
+"""
+Modul leaderboard produk unggulan (counter pembelian + like per produk)
+"""
+
+from datetime import datetime
+import logging
+import threading
+import time
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from config import Config
+from src.database import mongodb
+from src.events import activity_events
+from src.schema import MONGO_INDEXES
+
+log = logging.getLogger(__name__)
+
+class FeaturedLeaderboard:
+    """Kelas untuk mengelola counter pembelian & like per produk.
+
+    Setiap event pembelian/like menaikkan counter di koleksi `product_stats`
+    secara incremental, sehingga halaman utama cukup membaca N dokumen teratas
+    lewat index `score` tanpa mengagregasi seluruh riwayat.
+
+    `top_product_ids` (halaman utama) dibaca dari salinan top-N di memori
+    proses, tanpa query per request. Salinan dibaca ulang oleh subscriber
+    event setelah menaikkan counter (di thread pipeline event), dan di thread
+    background setelah `cache_seconds` agar counter dari proses lain ikut
+    terlihat; selama itu salinan lama tetap dilayani.
+    """
+
+    COLLECTION = 'product_stats'
+
+    def __init__(self, db, cache_size=None, cache_seconds=None):
+        self.mongodb = db
+        self.cache_size = cache_size or Config.LEADERBOARD_CACHE_SIZE
+        self.cache_seconds = Config.LEADERBOARD_CACHE_SECONDS if cache_seconds is None else cache_seconds
+        self._top = None
+        self._loaded_at = float('-inf')
+        self._load_lock = threading.Lock()
+
+    def _collection(self):
+        """Mendapatkan collection leaderboard (index dideklarasikan di src.schema)"""
+        return self.mongodb.get_collection(self.COLLECTION)
+
+    def record_many(self, counts):
+        """Menambah counter banyak produk sekaligus: {product_id: (pembelian, like)}"""
+        now = datetime.now()
+        operations = [
+            UpdateOne(
+                {'product_id': str(product_id)},
+                {
+                    '$inc': {
+                        'purchase_count': purchases,
+                        'like_count': likes,
+                        'score': purchases + likes,
+                    },
+                    '$set': {'updated_at': now},
+                },
+                upsert=True
+            )
+            for product_id, (purchases, likes) in counts.items()
+            if purchases or likes
+        ]
+        if not operations:
+            return None
+        return self._collection().bulk_write(operations, ordered=False)
+
+    def record_events(self, batch):
+        """Subscriber pipeline event: menaikkan counter dari event pembelian dan like dalam satu batch"""
+        counts = {}
+        for event in batch:
+            if event['kind'] not in ('purchase', 'like'):
+                continue
+            purchases, likes = counts.get(event['product_id'], (0, 0))
+            if event['kind'] == 'purchase':
+                purchases += 1
+            else:
+                likes += 1
+            counts[event['product_id']] = (purchases, likes)
+        result = self.record_many(counts)
+        if result is not None:
+            self._reload_top()
+        return result
+
+    def remove(self, product_id):
+        """Menghapus produk dari leaderboard (misal saat produk dihapus)"""
+        result = self._collection().delete_one({'product_id': str(product_id)})
+        self._reload_top()
+        return result
+
+    def top(self, limit=5):
+        """Mendapatkan produk dengan skor tertinggi (pembelian + like)"""
+        cursor = self._collection().find(
+            {'score': {'$gt': 0}},
+            {'_id': 0, 'product_id': 1, 'purchase_count': 1, 'like_count': 1, 'score': 1}
+        ).sort([('score', DESCENDING), ('product_id', ASCENDING)]).limit(limit)
+        return list(cursor)
+
+    def _reload_top(self):
+        """Membaca ulang salinan top-N di memori; kegagalan hanya di-log, salinan lama tetap dipakai"""
+        with self._load_lock:
+            try:
+                self._top = self.top(self.cache_size)
+                self._loaded_at = time.monotonic()
+            except Exception as e:
+                log.error("Error loading featured leaderboard: %s", e)
+
+    def _reload_in_background(self):
+        if time.monotonic() - self._loaded_at < self.cache_seconds or self._load_lock.locked():
+            return
+        threading.Thread(target=self._reload_top, name='leaderboard-reload', daemon=True).start()
+
+    def _cached_top(self):
+        """Salinan top-N di memori; hanya pembacaan pertama yang menunggu query"""
+        top = self._top
+        if top is None:
+            self._reload_top()
+            return self._top or []
+        self._reload_in_background()
+        return top
+
+    def top_product_ids(self, limit=5):
+        """Mendapatkan ID produk (int) teratas sesuai urutan skor, dari salinan top-N di memori"""
+        entries = self._cached_top() if limit <= self.cache_size else self.top(limit)
+        ids = []
+        for entry in entries[:limit]:
+            try:
+                ids.append(int(entry['product_id']))
+            except (KeyError, TypeError, ValueError):
+                continue
+        return ids
+
+    def rebuild(self):
+        """Menghitung ulang seluruh counter dari riwayat `purchases` dan `user_interactions`.
+
+        Dipakai untuk backfill data lama. Counter dibangun di koleksi
+        sementara lalu menggantikan `product_stats` lewat renameCollection,
+        jadi pembaca tidak melihat tabel setengah jadi. Counter yang dinaikkan
+        event selama rebuild berjalan ikut tertimpa, jadi jalankan saat sepi.
+        """
+        counts = {}
+        purchases = self.mongodb.get_collection('purchases').aggregate([
+            {"$group": {"_id": "$product_id", "count": {"$sum": 1}}},
+        ])
+        for row in purchases:
+            if row['_id'] is None:
+                continue
+            counts.setdefault(str(row['_id']), [0, 0])[0] += row['count']
+        likes = self.mongodb.get_collection('user_interactions').aggregate([
+            {"$match": {"interaction_type": "like"}},
+            {"$group": {"_id": "$product_id", "count": {"$sum": 1}}},
+        ])
+        for row in likes:
+            if row['_id'] is None:
+                continue
+            counts.setdefault(str(row['_id']), [0, 0])[1] += row['count']
+
+        now = datetime.now()
+        temp = self.mongodb.get_collection(f'{self.COLLECTION}_rebuild')
+        temp.drop()
+        temp.create_indexes(MONGO_INDEXES[self.COLLECTION])
+        documents = [
+            {
+                'product_id': product_id,
+                'purchase_count': purchase_count,
+                'like_count': like_count,
+                'score': purchase_count + like_count,
+                'updated_at': now,
+            }
+            for product_id, (purchase_count, like_count) in counts.items()
+        ]
+        if documents:
+            temp.insert_many(documents, ordered=False)
+        temp.rename(self.COLLECTION, dropTarget=True)
+        self._reload_top()
+        return len(counts)
+
+# Instance leaderboard
+featured_leaderboard = FeaturedLeaderboard(mongodb)
+activity_events.subscribe('leaderboard', featured_leaderboard.record_events)
@@ -0,0 +1,227 @@
+"""
+Modul logging terstruktur non-blocking: record JSON dengan request id yang
+ditulis thread background lewat antrian, plus pembatas laju untuk log di jalur sibuk
+"""
+
+from datetime import datetime, timezone
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from config import Config
+
+# Logger aplikasi yang levelnya diatur LOG_LEVEL; logger library lain minimal WARNING
+APP_LOGGERS = ('src', 'app_web', 'benchmarks')
+
+# Atribut bawaan LogRecord; atribut lain (dari `extra=`) ditulis sebagai field JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+def current_request_id():
+    """Request id milik request Flask yang sedang berjalan, atau None di luar request"""
+    from flask import g, has_request_context
+    if not has_request_context():
+        return None
+    return g.get('request_id')
+
+class RequestIdFilter(logging.Filter):
+    """Menempelkan request id ke record di thread pemanggil (sebelum masuk antrian)"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = current_request_id() or '-'
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Satu baris JSON per record: waktu, level, logger, pesan, request id, dan field `extra`"""
+
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if getattr(record, 'request_id', '-') != '-':
+            data['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    """Format teks untuk development"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s')
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler dengan antrian terbatas: record dibuang (dan dihitung) saat antrian penuh.
+
+    Pemanggil tidak pernah menunggu I/O; format dan penulisan terjadi di
+    thread listener. Pesan sudah digabung dengan argumennya di sini agar
+    objek yang berubah setelahnya tidak mengubah isi log.
+    """
+
+    def __init__(self, log_queue, on_fork=None):
+        super().__init__(log_queue)
+        self.on_fork = on_fork
+        self.pid = os.getpid()
+        self.enqueued = 0
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.pid != os.getpid() and self.on_fork is not None:
+            # Thread listener tidak ikut ke proses anak hasil fork: jalankan ulang
+            self.on_fork()
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+class RateLimiter:
+    """Membatasi record per kunci hingga `rate` per detik.
+
+    `allow(key)` mengembalikan None jika record harus dibuang, atau jumlah
+    record yang dibuang sejak record terakhir yang lolos (untuk field `suppressed`).
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._windows = {}
+        self.suppressed = 0
+
+    def allow(self, key):
+        second = int(time.monotonic())
+        with self._lock:
+            window, count, suppressed = self._windows.get(key, (second, 0, 0))
+            if window != second:
+                window, count = second, 0
+            if count >= self.rate:
+                self._windows[key] = (window, count, suppressed + 1)
+                self.suppressed += 1
+                return None
+            self._windows[key] = (window, count + 1, 0)
+            return suppressed
+
+class StructuredLogging:
+    """Konfigurasi logging aplikasi.
+
+    Semua record masuk ke antrian terbatas (`DroppingQueueHandler`) dan ditulis
+    ke stderr oleh `QueueListener` di background, jadi worker request tidak
+    saling menunggu lock stdout. Level dicek oleh `logging` sebelum record
+    dibuat, sehingga log debug yang dimatikan hampir tanpa biaya.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handler = None
+        self._listener = None
+        self._output = None
+        self.limiter = RateLimiter(Config.LOG_RATE_LIMIT)
+        self.sample_rate = Config.LOG_DEBUG_SAMPLE_RATE
+
+    def configure(self, level=None, fmt=None, stream=None):
+        """Memasang handler antrian pada root logger (idempoten)"""
+        with self._lock:
+            if self._handler is not None:
+                return
+            self._output = logging.StreamHandler(stream or sys.stderr)
+            self._output.setFormatter(TextFormatter() if (fmt or Config.LOG_FORMAT) == 'text' else JsonFormatter())
+            self._handler = DroppingQueueHandler(queue.Queue(maxsize=Config.LOG_QUEUE_SIZE), on_fork=self._restart)
+            self._handler.addFilter(RequestIdFilter())
+            root = logging.getLogger()
+            root.addHandler(self._handler)
+            root.setLevel(logging.WARNING)
+            for name in APP_LOGGERS:
+                logging.getLogger(name).setLevel((level or Config.LOG_LEVEL).upper())
+            # Access log server development tetap ditampilkan
+            logging.getLogger('werkzeug').setLevel(logging.INFO)
+            self._start_listener()
+        atexit.register(self.shutdown)
+
+    def _start_listener(self):
+        self._handler.pid = os.getpid()
+        self._listener = logging.handlers.QueueListener(self._handler.queue, self._output, respect_handler_level=True)
+        self._listener.start()
+
+    def _restart(self):
+        with self._lock:
+            if self._handler.pid != os.getpid():
+                # Antrian induk bisa tertinggal dalam keadaan terkunci: buat yang baru
+                self._handler.queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+                self._start_listener()
+
+    def shutdown(self):
+        """Menulis sisa record di antrian lalu menghentikan listener"""
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None and self._handler.pid == os.getpid():
+            listener.stop()
+
+    def init_app(self, app):
+        """Memasang logging dan request id (header X-Request-ID dipakai jika dikirim proxy)"""
+        from flask import g, request
+
+        self.configure()
+
+        @app.before_request
+        def _assign_request_id():
+            g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+
+        @app.after_request
+        def _return_request_id(response):
+            request_id = g.get('request_id')
+            if request_id:
+                response.headers.setdefault('X-Request-ID', request_id)
+            return response
+
+    def limited(self, logger, level, key, msg, *args, **fields):
+        """Log untuk jalur sibuk: dicek level dulu, lalu sampling (debug) dan batas laju per `key`"""
+        if not logger.isEnabledFor(level):
+            return
+        if level <= logging.DEBUG and self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        suppressed = self.limiter.allow(key)
+        if suppressed is None:
+            return
+        if suppressed:
+            fields['suppressed'] = suppressed
+        logger.log(level, msg, *args, extra=fields)
+
+    def stats(self):
+        """Statistik antrian log: terkirim, dibuang karena penuh, dan ditahan oleh batas laju"""
+        handler = self._handler
+        return {
+            'queue_depth': handler.queue.qsize() if handler else 0,
+            'queue_capacity': Config.LOG_QUEUE_SIZE,
+            'enqueued': handler.enqueued if handler else 0,
+            'dropped': handler.dropped if handler else 0,
+            'rate_limited': self.limiter.suppressed,
+        }
+
+# Instance konfigurasi logging
+app_logging = StructuredLogging()
+
+def log_debug(logger, key, msg, *args, **fields):
+    """Log debug ber-sampling dan dibatasi laju per `key` (untuk route sibuk)"""
+    app_logging.limited(logger, logging.DEBUG, key, msg, *args, **fields)
+
+def log_warning(logger, key, msg, *args, **fields):
+    """Log warning yang dibatasi laju per `key` (misal timeout berulang di setiap request)"""
+    app_logging.limited(logger, logging.WARNING, key, msg, *args, **fields)
@@ -0,0 +1,214 @@
+"""
+Modul metrik aplikasi: latensi request per route, command MongoDB, query Neo4j,
+dan statistik komponen (cache, pool, pipeline), diekspor dalam format Prometheus
+"""
+
+from functools import wraps
+import math
+import re
+import threading
+import time
+from pymongo import monitoring
+from config import Config
+from src.pools import LatencyStats
+
+_NAME_RE = re.compile(r'[^a-zA-Z0-9_]')
+
+def _metric_name(*parts):
+    return _NAME_RE.sub('_', '_'.join(str(part) for part in parts if part != ''))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+def _number(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+class HistogramFamily:
+    """Kumpulan histogram latensi yang dibedakan oleh nilai label"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series = {}
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, seconds, failed=False):
+        """Mencatat satu durasi untuk kombinasi label tertentu"""
+        series = self._series.get(label_values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(label_values, LatencyStats())
+        series.observe(seconds)
+        if failed:
+            with self._lock:
+                self._failures[label_values] = self._failures.get(label_values, 0) + 1
+
+    def snapshot(self):
+        """{label: stats} untuk dipakai laporan lain (misal benchmark)"""
+        with self._lock:
+            items = list(self._series.items())
+        return {labels: series.stats() for labels, series in items}
+
+    def render(self, prefix):
+        name = f"{prefix}_{self.name}"
+        lines = [f"# HELP {name} {self.help_text}", f"# TYPE {name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+            failures = sorted(self._failures.items())
+        for label_values, series in items:
+            stats = series.stats()
+            labels = list(zip(self.label_names, label_values))
+            for bound, count in stats['buckets'].items():
+                lines.append(f"{name}_bucket{_labels(labels + [('le', _number(float(bound)))])} {count}")
+            lines.append(f"{name}_bucket{_labels(labels + [('le', '+Inf')])} {stats['count']}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(stats['sum_seconds'])}")
+            lines.append(f"{name}_count{_labels(labels)} {stats['count']}")
+        if failures:
+            failure_name = f"{name.rsplit('_duration_seconds', 1)[0]}_failures_total"
+            lines.append(f"# TYPE {failure_name} counter")
+            for label_values, count in failures:
+                lines.append(f"{failure_name}{_labels(list(zip(self.label_names, label_values)))} {count}")
+        return lines
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Mengukur durasi command MongoDB per (koleksi, operasi) dari event command pymongo"""
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ''
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (collection, event.command_name)
+
+    def _finish(self, event, failed):
+        with self._lock:
+            labels = self._started.pop((event.connection_id, event.request_id), None)
+        if labels is None:
+            labels = ('', event.command_name)
+        self.histogram.observe(labels, event.duration_micros / 1e6, failed)
+
+    def succeeded(self, event):
+        self._finish(event, False)
+
+    def failed(self, event):
+        self._finish(event, True)
+
+class Metrics:
+    """Registry metrik aplikasi.
+
+    Latensi request, command MongoDB, dan query Neo4j disimpan sebagai
+    histogram per label. Statistik komponen lain (cache, pool, pipeline
+    event, fan-out) dibaca dari `stats()` masing-masing lewat collector
+    yang didaftarkan dengan `register()`, saat `/metrics` di-scrape.
+    """
+
+    PREFIX = 'toko'
+
+    def __init__(self):
+        self.requests = HistogramFamily(
+            'http_request_duration_seconds', 'Latensi request per endpoint', ('endpoint', 'method', 'status'))
+        self.mongo_commands = HistogramFamily(
+            'mongo_command_duration_seconds', 'Durasi command MongoDB', ('collection', 'command'))
+        self.neo4j_queries = HistogramFamily(
+            'neo4j_query_duration_seconds', 'Durasi method Neo4jDB', ('method',))
+        self.mongo_listener = MongoCommandListener(self.mongo_commands)
+        self._collectors = []
+
+    def register(self, name, stats):
+        """Mendaftarkan fungsi `stats()` komponen; nilai numeriknya diekspor sebagai gauge"""
+        self._collectors.append((name, stats))
+
+    def timed_neo4j(self, method):
+        """Decorator method Neo4jDB untuk mengukur durasi query per method"""
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = method(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self.neo4j_queries.observe((method.__name__,), time.perf_counter() - started, failed)
+        return wrapper
+
+    # --- Integrasi Flask ---
+
+    def init_app(self, app):
+        """Memasang pengukuran latensi request dan route `/metrics`"""
+        from flask import Response, abort, g, request
+
+        @app.before_request
+        def _start_timer():
+            g._metrics_started = time.perf_counter()
+
+        @app.after_request
+        def _record_request(response):
+            started = g.pop('_metrics_started', None)
+            if started is not None:
+                self.requests.observe(
+                    (request.endpoint or 'unmatched', request.method, str(response.status_code)),
+                    time.perf_counter() - started
+                )
+            return response
+
+        @app.route('/metrics')
+        def metrics_endpoint():
+            if Config.METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {Config.METRICS_TOKEN}":
+                abort(403)
+            return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+    # --- Ekspor ---
+
+    def _flatten(self, name, value, labels):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if isinstance(key, str) and key.isidentifier():
+                    yield from self._flatten(_metric_name(name, key), item, labels)
+                else:
+                    yield from self._flatten(name, item, labels + [('key', key)])
+        elif isinstance(value, (bool, int, float)):
+            yield name, labels, value
+
+    def _render_collectors(self):
+        lines = []
+        declared = set()
+        for component, stats in self._collectors:
+            try:
+                samples = list(self._flatten(_metric_name(self.PREFIX, component), stats(), []))
+            except Exception as e:
+                lines.append(f"# collector {component} gagal: {_escape(e)}")
+                continue
+            for name, labels, value in samples:
+                if name not in declared:
+                    declared.add(name)
+                    lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return lines
+
+    def render(self):
+        """Semua metrik dalam format teks Prometheus"""
+        lines = []
+        for family in (self.requests, self.mongo_commands, self.neo4j_queries):
+            lines.extend(family.render(self.PREFIX))
+        lines.extend(self._render_collectors())
+        return '\n'.join(lines) + '\n'
+
+# Instance registry metrik
+metrics = Metrics()
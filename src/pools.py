@@ -0,0 +1,200 @@
+"""
+Modul telemetri connection pool MongoDB dan Neo4j
+"""
+
+from collections import Counter
+import threading
+import time
+from pymongo import monitoring
+
+# Batas atas bucket latensi pengambilan koneksi (detik)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class LatencyStats:
+    """Histogram latensi kumulatif (count, sum, max, bucket) yang thread-safe"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counts = [0] * len(buckets)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        """Mencatat satu pengukuran"""
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self._counts[i] += 1
+                    break
+
+    def stats(self):
+        """Ringkasan: jumlah, rata-rata, maksimum, dan bucket kumulatif {batas: jumlah}"""
+        with self._lock:
+            cumulative = {}
+            running = 0
+            for bound, count in zip(self.buckets, self._counts):
+                running += count
+                cumulative[bound] = running
+            return {
+                'count': self.count,
+                'sum_seconds': round(self.total, 6),
+                'avg_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+                'max_ms': round(self.max * 1000, 3),
+                'buckets': cumulative,
+            }
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """Mengikuti event CMAP pymongo untuk menghitung kondisi pool secara live.
+
+    Didaftarkan lewat `MongoClient(event_listeners=[...])`. `in_use` adalah
+    koneksi yang sedang dipinjam, `available` koneksi terbuka yang menganggur,
+    `wait_queue` request yang sedang menunggu koneksi.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.max_pool_size = None
+        self.counters = Counter()
+        self.checkout_latency = LatencyStats()
+
+    def _change(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def pool_created(self, event):
+        self.max_pool_size = (event.options or {}).get('maxPoolSize', self.max_pool_size)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.counters['pool_cleared'] += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.counters['created'] += 1
+        self._change(open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.counters[f'closed_{event.reason}'] += 1
+        self._change(open=-1)
+
+    def connection_check_out_started(self, event):
+        self._change(waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self.counters[f'checkout_failed_{event.reason}'] += 1
+        self._change(waiting=-1)
+
+    def connection_checked_out(self, event):
+        self._change(waiting=-1, in_use=1)
+        if event.duration is not None:
+            self.checkout_latency.observe(event.duration)
+
+    def connection_checked_in(self, event):
+        self._change(in_use=-1)
+
+    def stats(self):
+        """Kondisi pool MongoDB saat ini"""
+        with self._lock:
+            return {
+                'max_size': self.max_pool_size,
+                'open': self.open,
+                'in_use': self.in_use,
+                'available': max(0, self.open - self.in_use),
+                'wait_queue': self.waiting,
+                'events': dict(self.counters),
+                'acquisition': self.checkout_latency.stats(),
+            }
+
+class Neo4jPoolMonitor:
+    """Telemetri pool koneksi driver Neo4j.
+
+    Driver Python Neo4j tidak menyediakan listener event pool, jadi
+    `instrument()` membungkus `acquire` pada pool driver untuk mengukur
+    latensi dan antrian, dan kondisi koneksi (in_use/idle) dibaca dari pool
+    saat `stats()` dipanggil. Jika struktur internal driver berubah, monitor
+    dilewati dan hanya konfigurasi yang dilaporkan.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+        self.max_pool_size = None
+        self.waiting = 0
+        self.failures = 0
+        self.acquire_latency = LatencyStats()
+
+    def instrument(self, driver, max_pool_size=None):
+        """Memasang pengukuran pada pool driver; False jika pool tidak bisa diakses"""
+        self.max_pool_size = max_pool_size
+        pool = getattr(driver, '_pool', None)
+        acquire = getattr(pool, 'acquire', None)
+        if acquire is None:
+            return False
+
+        def timed_acquire(*args, **kwargs):
+            started = time.perf_counter()
+            with self._lock:
+                self.waiting += 1
+            try:
+                connection = acquire(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failures += 1
+                raise
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+            self.acquire_latency.observe(time.perf_counter() - started)
+            return connection
+
+        pool.acquire = timed_acquire
+        self._pool = pool
+        return True
+
+    def _connections(self):
+        connections = getattr(self._pool, 'connections', None)
+        if connections is None:
+            return None
+        try:
+            return [connection for queue in list(connections.values()) for connection in list(queue)]
+        except Exception:
+            return None
+
+    def stats(self):
+        """Kondisi pool Neo4j saat ini"""
+        connections = self._connections()
+        in_use = sum(1 for c in connections if getattr(c, 'in_use', False)) if connections is not None else None
+        with self._lock:
+            return {
+                'max_size': self.max_pool_size,
+                'open': len(connections) if connections is not None else None,
+                'in_use': in_use,
+                'available': len(connections) - in_use if connections is not None else None,
+                'wait_queue': self.waiting,
+                'events': {'acquire_failed': self.failures},
+                'acquisition': self.acquire_latency.stats(),
+            }
+
+# Instance telemetri pool (dipasang oleh MongoDB/Neo4jDB saat koneksi dibuat)
+mongo_pool_listener = MongoPoolListener()
+neo4j_pool_monitor = Neo4jPoolMonitor()
+
+def pool_stats():
+    """Statistik semua connection pool"""
+    return {'mongodb': mongo_pool_listener.stats(), 'neo4j': neo4j_pool_monitor.stats()}
@@ -0,0 +1,265 @@
+"""
+Modul pengelolaan index MongoDB dan constraint Neo4j, beserta verifikasi query plan
+"""
+
+import logging
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+from config import Config
+from src.database import ACTIVITY_CYPHER, mongodb, neo4j_db
+
+log = logging.getLogger(__name__)
+
+# Index yang dibutuhkan query aplikasi, per koleksi
+MONGO_INDEXES = {
+    'users': [
+        IndexModel([('user_id', ASCENDING)], name='user_id_unique', unique=True),
+        IndexModel([('email', ASCENDING)], name='email_unique', unique=True),
+    ],
+    'products': [
+        IndexModel([('id', ASCENDING)], name='id_unique', unique=True),
+        IndexModel([('name', ASCENDING), ('id', ASCENDING)], name='name_id'),
+        # SKU dari feed supplier (kunci idempoten import); produk tanpa SKU tidak masuk index
+        IndexModel([('sku', ASCENDING)], name='sku_unique', unique=True,
+                   partialFilterExpression={'sku': {'$type': 'string'}}),
+    ],
+    'purchases': [
+        IndexModel([('user_id', ASCENDING), ('purchase_date', DESCENDING)], name='user_purchase_date'),
+        IndexModel([('product_id', ASCENDING)], name='product_id'),
+    ],
+    'product_views': [
+        IndexModel([('user_id', ASCENDING), ('viewed_at', DESCENDING)], name='user_viewed_at'),
+        IndexModel([('viewed_at', ASCENDING)], name='viewed_at'),
+    ],
+    'user_interactions': [
+        IndexModel([('user_id', ASCENDING), ('interacted_at', DESCENDING)], name='user_interacted_at'),
+        IndexModel([('interaction_type', ASCENDING), ('product_id', ASCENDING)], name='type_product'),
+    ],
+    'user_preferences': [
+        IndexModel([('user_id', ASCENDING)], name='user_id_unique', unique=True),
+    ],
+    'orders': [
+        IndexModel([('user_id', ASCENDING), ('status', ASCENDING), ('created_at', DESCENDING)], name='user_status_created'),
+        IndexModel([('created_at', DESCENDING)], name='created_at'),
+    ],
+    # Leaderboard produk unggulan
+    'product_stats': [
+        IndexModel([('product_id', ASCENDING)], name='product_id_unique', unique=True),
+        IndexModel([('score', DESCENDING), ('product_id', ASCENDING)], name='score_product'),
+    ],
+    # Counter "sering dibeli bersama"
+    'fbt_item_counts': [
+        IndexModel([('product_id', ASCENDING)], name='product_id_unique', unique=True),
+    ],
+    'fbt_pair_counts': [
+        IndexModel([('a', ASCENDING), ('b', ASCENDING)], name='pair_unique', unique=True),
+        IndexModel([('b', ASCENDING)], name='b'),
+    ],
+    'fbt_user_baskets': [
+        IndexModel([('user_id', ASCENDING)], name='user_id_unique', unique=True),
+    ],
+    'fbt_companions': [
+        IndexModel([('product_id', ASCENDING)], name='product_id_unique', unique=True),
+    ],
+    # Status job import katalog, dihapus otomatis setelah masa simpan
+    'import_jobs': [
+        IndexModel([('updated_at', ASCENDING)], name='updated_at_ttl',
+                   expireAfterSeconds=Config.IMPORT_JOB_RETENTION_SECONDS),
+    ],
+    # Dokumen tunggal per kunci, hanya dibaca lewat _id (index bawaan)
+    'fbt_meta': [],
+    'counters': [],
+    'catalog_meta': [],
+}
+
+# Constraint unik juga membuat index untuk lookup node berdasarkan ID
+NEO4J_SCHEMA = [
+    'CREATE CONSTRAINT user_id_unique IF NOT EXISTS FOR (u:User) REQUIRE u.user_id IS UNIQUE',
+    'CREATE CONSTRAINT product_id_unique IF NOT EXISTS FOR (p:Product) REQUIRE p.product_id IS UNIQUE',
+    'CREATE INDEX product_category IF NOT EXISTS FOR (p:Product) ON (p.category)',
+]
+
+# Query yang sering dijalankan: (nama, koleksi, filter, sort)
+HOT_MONGO_QUERIES = [
+    ('get_user_by_id', 'users', {'user_id': ''}, None),
+    ('get_user_by_email', 'users', {'email': ''}, None),
+    ('product_by_id', 'products', {'id': 0}, None),
+    ('products_by_ids', 'products', {'id': {'$in': [0, 1]}}, None),
+    ('iter_products', 'products', {'$or': [{'name': {'$gt': ''}}, {'name': '', 'id': {'$gt': 0}}]},
+     [('name', ASCENDING), ('id', ASCENDING)]),
+    ('last_product_id', 'products', {}, [('id', DESCENDING)]),
+    ('products_by_skus', 'products', {'sku': {'$in': ['', 'x'], '$type': 'string'}}, None),
+    ('get_purchase_history', 'purchases', {'user_id': ''}, [('purchase_date', DESCENDING)]),
+    ('get_product_views', 'product_views', {'user_id': ''}, [('viewed_at', DESCENDING)]),
+    ('views_since', 'product_views', {'viewed_at': {'$gt': 0}}, None),
+    ('get_user_preferences', 'user_preferences', {'user_id': ''}, None),
+    ('recent_viewed_product_ids', 'product_views', {'user_id': {'$in': ['', 'x']}}, [('viewed_at', DESCENDING)]),
+    ('user_order_history', 'orders', {'user_id': '', 'status': 'selesai'}, [('created_at', DESCENDING)]),
+    ('admin_orders', 'orders', {}, [('created_at', DESCENDING)]),
+    ('leaderboard_top', 'product_stats', {'score': {'$gt': 0}}, [('score', DESCENDING), ('product_id', ASCENDING)]),
+    ('leaderboard_product', 'product_stats', {'product_id': ''}, None),
+    ('fbt_item_counts', 'fbt_item_counts', {'product_id': {'$in': ['', 'x']}}, None),
+    ('fbt_pair', 'fbt_pair_counts', {'a': '', 'b': ''}, None),
+    ('fbt_partners', 'fbt_pair_counts',
+     {'$or': [{'a': {'$in': ['', 'x']}}, {'b': {'$in': ['', 'x']}}], 'count': {'$gte': 1}}, None),
+    ('fbt_user_basket', 'fbt_user_baskets', {'user_id': ''}, None),
+    ('fbt_companions', 'fbt_companions', {'product_id': ''}, None),
+    ('fbt_meta', 'fbt_meta', {'_id': 'baskets'}, None),
+    ('id_counter', 'counters', {'_id': 'products'}, None),
+    ('catalog_meta', 'catalog_meta', {'_id': 'products'}, None),
+    ('import_job', 'import_jobs', {'_id': ''}, None),
+]
+
+# Query Neo4j yang sering dijalankan: (nama, cypher, parameter)
+HOT_NEO4J_QUERIES = [
+    ('user_by_id', 'MATCH (u:User {user_id: $user_id}) RETURN u', {'user_id': ''}),
+    ('product_by_id', 'MATCH (p:Product {product_id: $product_id}) RETURN p', {'product_id': ''}),
+    # Statement yang benar-benar dijalankan create_*_relationships dan pipeline event
+    *((f'activity_{name}', cypher, {'rows': []}) for name, cypher in ACTIVITY_CYPHER.items()),
+    ('user_recommendations', """
+        MATCH (u:User {user_id: $user_id})-[:VIEWED]->(p1:Product)<-[:VIEWED]-(other:User)-[:VIEWED]->(p2:Product)
+        WHERE p2 <> p1 AND NOT (u)-[:VIEWED]->(p2)
+        RETURN p2.product_id, count(*) LIMIT 5
+    """, {'user_id': ''}),
+    ('similar_products', """
+        MATCH (p1:Product {product_id: $product_id})<-[:VIEWED]-(u:User)-[:VIEWED]->(p2:Product)
+        WHERE p2 <> p1
+        RETURN p2.product_id, count(u) LIMIT 5
+    """, {'product_id': ''}),
+]
+
+# Stage/operator yang menandakan scan penuh
+_MONGO_SCAN_STAGES = {'COLLSCAN'}
+_NEO4J_SCAN_OPERATORS = {'AllNodesScan', 'NodeByLabelScan'}
+
+def _mongo_stages(plan):
+    """Mengumpulkan semua nama stage dari explain() MongoDB (termasuk nested)"""
+    stages = []
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        for value in plan.values():
+            stages.extend(_mongo_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_mongo_stages(value))
+    return stages
+
+def _neo4j_operators(plan):
+    """Mengumpulkan semua operator dari plan EXPLAIN Neo4j"""
+    if not plan:
+        return []
+    operator = plan.get('operatorType', '').split('@')[0]
+    operators = [operator]
+    for child in plan.get('children', []):
+        operators.extend(_neo4j_operators(child))
+    return operators
+
+class SchemaManager:
+    """Mendeklarasikan, menerapkan, dan memverifikasi index/constraint database.
+
+    `apply()` bersifat idempoten: index yang sudah ada dilewati oleh MongoDB
+    dan Neo4j (IF NOT EXISTS), jadi aman dipanggil setiap startup. `verify()`
+    menjalankan explain()/EXPLAIN untuk setiap query penting dan melaporkan
+    query yang masih memakai scan penuh.
+    """
+
+    def __init__(self, db, graph):
+        self.mongodb = db
+        self.graph = graph
+
+    def apply_mongo(self):
+        """Membuat index MongoDB; mengembalikan [(koleksi, nama index, error atau None)]"""
+        results = []
+        for collection_name, indexes in MONGO_INDEXES.items():
+            collection = self.mongodb.get_collection(collection_name)
+            for index in indexes:
+                name = index.document['name']
+                try:
+                    collection.create_indexes([index])
+                    results.append((collection_name, name, None))
+                except PyMongoError as e:
+                    # Misal data lama berisi email ganda: laporkan, lanjut ke index lain
+                    results.append((collection_name, name, str(e)))
+        return results
+
+    def apply_neo4j(self):
+        """Membuat constraint/index Neo4j; mengembalikan [(statement, error atau None)]"""
+        results = []
+        with self.graph.driver.session(database=Config.NEO4J_DATABASE) as session:
+            for statement in NEO4J_SCHEMA:
+                try:
+                    session.run(statement).consume()
+                    results.append((statement, None))
+                except Exception as e:
+                    results.append((statement, str(e)))
+        return results
+
+    def apply(self):
+        """Menerapkan semua index dan constraint; error per item dicetak, tidak menghentikan startup"""
+        failures = 0
+        try:
+            for collection_name, name, error in self.apply_mongo():
+                if error:
+                    failures += 1
+                    log.warning("Index %s.%s gagal dibuat: %s", collection_name, name, error)
+        except Exception as e:
+            failures += 1
+            log.warning("Tidak bisa menerapkan index MongoDB: %s", e)
+        try:
+            for statement, error in self.apply_neo4j():
+                if error:
+                    failures += 1
+                    log.warning("Schema Neo4j gagal: %s: %s", statement, error)
+        except Exception as e:
+            failures += 1
+            log.warning("Tidak bisa menerapkan schema Neo4j: %s", e)
+        return failures == 0
+
+    def verify_mongo(self):
+        """explain() setiap query MongoDB penting"""
+        report = []
+        for name, collection_name, query, sort in HOT_MONGO_QUERIES:
+            cursor = self.mongodb.get_collection(collection_name).find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            try:
+                stages = _mongo_stages(cursor.limit(1).explain().get('queryPlanner', {}))
+            except PyMongoError as e:
+                report.append({'store': 'mongodb', 'query': name, 'ok': False, 'plan': [], 'error': str(e)})
+                continue
+            report.append({
+                'store': 'mongodb',
+                'query': name,
+                'ok': not _MONGO_SCAN_STAGES.intersection(stages),
+                # SORT berarti pengurutan di memori, index belum mencakup urutan
+                'in_memory_sort': 'SORT' in stages,
+                'plan': stages,
+            })
+        return report
+
+    def verify_neo4j(self):
+        """EXPLAIN setiap query Neo4j penting"""
+        report = []
+        with self.graph.driver.session(database=Config.NEO4J_DATABASE) as session:
+            for name, cypher, params in HOT_NEO4J_QUERIES:
+                try:
+                    plan = session.run('EXPLAIN ' + cypher, params).consume().plan
+                except Exception as e:
+                    report.append({'store': 'neo4j', 'query': name, 'ok': False, 'plan': [], 'error': str(e)})
+                    continue
+                operators = _neo4j_operators(plan)
+                report.append({
+                    'store': 'neo4j',
+                    'query': name,
+                    'ok': not _NEO4J_SCAN_OPERATORS.intersection(operators),
+                    'plan': operators,
+                })
+        return report
+
+    def verify(self):
+        """Laporan gabungan; query dengan `ok` False masih memakai scan penuh"""
+        return self.verify_mongo() + self.verify_neo4j()
+
+# Instance pengelola schema
+schema_manager = SchemaManager(mongodb, neo4j_db)
@@ -0,0 +1,365 @@
+"""
+Modul pencarian produk berbasis inverted index
+"""
+
+from bisect import bisect_left, insort
+from functools import lru_cache
+import heapq
+import math
+from itertools import chain, count
+from operator import itemgetter
+import re
+import threading
+import unicodedata
+from src.database import product_catalog
+
+# Kata umum Bahasa Indonesia (dan sedikit Inggris) yang tidak ikut di-index
+STOPWORDS = {
+    'dan', 'yang', 'di', 'ke', 'dari', 'untuk', 'dengan', 'ini', 'itu', 'atau',
+    'pada', 'dalam', 'juga', 'ada', 'akan', 'bisa', 'lebih', 'sangat', 'para',
+    'oleh', 'sebagai', 'serta', 'tanpa', 'the', 'and', 'for', 'with', 'of',
+}
+
+# Partikel dan kata ganti milik yang ditempel di akhir kata (-lah, -nya, ...)
+_PARTICLE_SUFFIXES = ('lah', 'kah', 'tah', 'pun')
+_POSSESSIVE_SUFFIXES = ('nya', 'ku', 'mu')
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+def normalize_text(text):
+    """Mengubah teks menjadi huruf kecil tanpa aksen"""
+    if not isinstance(text, str):
+        return ''
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+@lru_cache(maxsize=65536)
+def stem(token):
+    """Stemming ringan Bahasa Indonesia: buang partikel dan kata ganti milik.
+
+    Sengaja konservatif (tanpa prefiks/sufiks derivasional) supaya nama merek
+    dan model produk tidak ikut terpotong.
+    """
+    for suffix in _PARTICLE_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            break
+    for suffix in _POSSESSIVE_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            break
+    return token
+
+def tokenize(text):
+    """Memecah teks menjadi token ter-normalisasi (tanpa stopword)"""
+    return [t for t in _TOKEN_RE.findall(normalize_text(text)) if t not in STOPWORDS]
+
+class _IndexState:
+    """Isi index pada satu waktu; `reset` membangun state baru lalu menukarnya sekaligus.
+
+    `postings` (term -> {product_id: impact}) diubah langsung oleh writer di
+    bawah lock; query hanya memakainya untuk lookup per produk. Untuk
+    iterasi, query memakai `ranked` (term -> tuple (product_id, impact)
+    terurut dari impact tertinggi) yang immutable dan dibuat ulang saat
+    term itu berubah.
+    """
+
+    __slots__ = ('postings', 'ranked', 'terms', 'expansions', 'doc_terms', 'doc_lengths', 'docs',
+                 'sort_names', 'total_length')
+
+    def __init__(self):
+        self.postings = {}
+        self.ranked = {}
+        self.terms = []
+        self.expansions = {}
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.docs = {}
+        self.sort_names = {}
+        self.total_length = 0.0
+
+class ProductSearchIndex:
+    """Inverted index produk atas nama, deskripsi, kategori dan tag.
+
+    Setiap token di-index dalam bentuk aslinya dan bentuk hasil stemming.
+    Query bersifat AND antar token, token boleh berupa awalan kata (prefix),
+    dan hasil diurutkan dengan skor BM25 berbobot per field. Bagian skor yang
+    hanya bergantung pada dokumen (tf dan normalisasi panjang) dihitung saat
+    produk di-index, jadi query cukup mengalikan dengan idf per term.
+    Index mengikuti `ProductCatalog` lewat `reset`/`upsert`/`remove`.
+
+    `reset` membangun state baru di luar lock lalu menukarnya. `upsert` dan
+    `remove` mengubah posting list langsung di bawah lock (biayanya sebanding
+    jumlah term produk, bukan ukuran posting list) dan membuang tuple
+    `ranked` term yang berubah. Query tidak memakai lock kecuali untuk
+    membuat ulang tuple `ranked` yang sudah dibuang.
+
+    Query mengambil top-k tanpa menilai semua posting: posting dibaca
+    terurut dari impact tertinggi, token lain dinilai lewat lookup, dan
+    pembacaan berhenti begitu skor maksimum sisa posting tidak bisa lagi
+    masuk top-k.
+    """
+
+    FIELD_WEIGHTS = {'name': 3.0, 'tags': 2.0, 'category': 1.5, 'description': 1.0}
+    PREFIX_PENALTY = 0.7
+    # Awalan yang cocok dengan lebih banyak term hanya memakai term dengan
+    # document frequency tertinggi (term langka jarang mengubah hasil teratas)
+    MAX_PREFIX_EXPANSION = 16
+    # Token yang lebih pendek hanya dicocokkan persis, bukan sebagai awalan
+    MIN_PREFIX_LENGTH = 2
+    MAX_CACHED_EXPANSIONS = 10000
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, catalog=None):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._state = _IndexState()
+        if catalog is not None:
+            catalog.subscribe(self)
+
+    @classmethod
+    def _field_terms(cls, product):
+        """Menghitung bobot setiap term dalam satu produk"""
+        weights = {}
+        length = 0.0
+        for field, weight in cls.FIELD_WEIGHTS.items():
+            value = product.get(field)
+            if field == 'tags':
+                value = ' '.join(t for t in (value or []) if isinstance(t, str))
+            for token in tokenize(value):
+                length += weight
+                for term in {token, stem(token)}:
+                    weights[term] = weights.get(term, 0.0) + weight
+        return weights, length
+
+    def _impacts(self, weights, length, average_length):
+        norm = self.K1 * (1 - self.B + self.B * length / (average_length or 1.0))
+        return {term: tf * (self.K1 + 1) / (tf + norm) for term, tf in weights.items()}
+
+    @staticmethod
+    def _add_document(state, product, weights, length):
+        product_id = product.get('id')
+        state.doc_terms[product_id] = tuple(weights)
+        state.doc_lengths[product_id] = length
+        state.docs[product_id] = product
+        state.sort_names[product_id] = normalize_text(product.get('name'))
+        state.total_length += length
+
+    @staticmethod
+    def _terms_changed(state, added=(), removed=()):
+        """Memperbarui daftar term terurut dan cache ekspansi awalan; dipanggil dengan `_lock`"""
+        terms = state.terms
+        for term in removed:
+            index = bisect_left(terms, term)
+            if index < len(terms) and terms[index] == term:
+                del terms[index]
+        for term in added:
+            insort(terms, term)
+        for term in chain(added, removed):
+            for end in range(1, len(term) + 1):
+                state.expansions.pop(term[:end], None)
+
+    def _discard(self, state, product_id, keep=()):
+        """Menghapus posting satu produk (kecuali term di `keep`); mengembalikan term yang kosong.
+
+        Dipanggil dengan `_lock`.
+        """
+        emptied = []
+        for term in state.doc_terms.pop(product_id, ()):
+            if term in keep:
+                continue
+            postings = state.postings.get(term)
+            if postings is None or postings.pop(product_id, None) is None:
+                continue
+            state.ranked.pop(term, None)
+            if not postings:
+                del state.postings[term]
+                emptied.append(term)
+        state.total_length -= state.doc_lengths.pop(product_id, 0.0)
+        state.docs.pop(product_id, None)
+        state.sort_names.pop(product_id, None)
+        return emptied
+
+    def reset(self, products):
+        """Membangun ulang index dari seluruh katalog (di luar lock, lalu ditukar)"""
+        state = _IndexState()
+        field_terms = [self._field_terms(p) for p in products]
+        average_length = sum(length for _, length in field_terms) / len(field_terms) if field_terms else 1.0
+        postings = state.postings
+        for product, (weights, length) in zip(products, field_terms):
+            product_id = product.get('id')
+            for term, impact in self._impacts(weights, length, average_length).items():
+                term_postings = postings.get(term)
+                if term_postings is None:
+                    term_postings = postings[term] = {}
+                term_postings[product_id] = impact
+            self._add_document(state, product, weights, length)
+        state.terms = sorted(postings)
+        with self._lock:
+            self._state = state
+
+    def upsert(self, product):
+        """Menambah atau memperbarui satu produk di index"""
+        weights, length = self._field_terms(product)
+        product_id = product.get('id')
+        with self._lock:
+            state = self._state
+            emptied = self._discard(state, product_id, keep=weights)
+            average_length = (state.total_length + length) / (len(state.docs) + 1)
+            added = []
+            for term, impact in self._impacts(weights, length, average_length).items():
+                postings = state.postings.get(term)
+                if postings is None:
+                    postings = state.postings[term] = {}
+                    added.append(term)
+                postings[product_id] = impact
+                state.ranked.pop(term, None)
+            if added or emptied:
+                self._terms_changed(state, added, emptied)
+            self._add_document(state, product, weights, length)
+
+    def remove(self, product_id):
+        """Menghapus satu produk dari index"""
+        with self._lock:
+            state = self._state
+            emptied = self._discard(state, product_id)
+            if emptied:
+                self._terms_changed(state, removed=emptied)
+
+    def _ranked(self, state, term):
+        """Posting satu term sebagai tuple (product_id, impact) terurut dari impact tertinggi"""
+        ranked = state.ranked.get(term)
+        if ranked is None:
+            with self._lock:
+                ranked = state.ranked.get(term)
+                if ranked is None:
+                    postings = state.postings.get(term, {})
+                    ranked = tuple(sorted(postings.items(), key=itemgetter(1), reverse=True))
+                    state.ranked[term] = ranked
+        return ranked
+
+    def _expand(self, state, token):
+        """Mencari term yang cocok: (term, faktor) untuk exact match dan prefix"""
+        candidates = state.expansions.get(token)
+        if candidates is None:
+            if len(token) < self.MIN_PREFIX_LENGTH:
+                candidates = (token,) if token in state.postings else ()
+            else:
+                terms = state.terms
+                index = bisect_left(terms, token)
+                end = bisect_left(terms, token + '\uffff', index)
+                candidates = terms[index:end]
+                if len(candidates) > self.MAX_PREFIX_EXPANSION:
+                    postings = state.postings
+                    candidates = heapq.nlargest(
+                        self.MAX_PREFIX_EXPANSION, candidates,
+                        key=lambda term: (term == token, len(postings.get(term, ())))
+                    )
+                candidates = tuple(candidates)
+            if len(state.expansions) >= self.MAX_CACHED_EXPANSIONS:
+                state.expansions.clear()
+            state.expansions[token] = candidates
+        matches = [(term, 1.0 if term == token else self.PREFIX_PENALTY) for term in candidates]
+        stemmed = stem(token)
+        if stemmed != token and stemmed in state.postings:
+            matches.append((stemmed, 1.0))
+        return matches
+
+    def _token_matches(self, state, token, total_docs):
+        """Term yang cocok dengan satu token beserta bobotnya (faktor * idf) dan posting-nya"""
+        matches = []
+        for term, factor in self._expand(state, token):
+            postings = state.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            matches.append((term, postings, factor * idf))
+        return matches
+
+    @staticmethod
+    def _lookup_score(matches, product_id):
+        """Skor satu token untuk satu produk: impact * bobot terbesar di antara term yang cocok"""
+        best = 0.0
+        for _, postings, weight in matches:
+            impact = postings.get(product_id)
+            if impact is not None and impact * weight > best:
+                best = impact * weight
+        return best
+
+    def _max_score(self, state, matches):
+        """Skor tertinggi satu token: impact teratas setiap term dikali bobotnya"""
+        best = 0.0
+        for term, _, weight in matches:
+            ranked = self._ranked(state, term)
+            if ranked:
+                best = max(best, ranked[0][1] * weight)
+        return best
+
+    def _stream(self, state, matches):
+        """Posting semua term satu token digabung terurut dari skor tertinggi, tanpa produk ganda"""
+        streams = [
+            ((product_id, impact * weight) for product_id, impact in self._ranked(state, term))
+            for term, _, weight in matches
+        ]
+        seen = set()
+        for product_id, score in heapq.merge(*streams, key=itemgetter(1), reverse=True):
+            if product_id not in seen:
+                seen.add(product_id)
+                yield product_id, score
+
+    def search(self, query, limit=20):
+        """Mencari produk yang cocok dengan query, terurut dari skor tertinggi"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or limit <= 0:
+            return []
+        if self.catalog is not None:
+            self.catalog.refresh()
+        state = self._state
+        total_docs = len(state.docs)
+        if not total_docs:
+            return []
+        token_matches = []
+        for token in tokens:
+            matches = self._token_matches(state, token, total_docs)
+            if not matches:
+                return []
+            token_matches.append(matches)
+        # Token paling jarang menjadi sumber kandidat, token lain dinilai lewat lookup
+        token_matches.sort(key=lambda matches: sum(len(postings) for _, postings, _ in matches))
+        driver, others = token_matches[0], token_matches[1:]
+        # Skor tertinggi yang masih bisa disumbang token lain untuk produk mana pun
+        others_bound = sum(self._max_score(state, matches) for matches in others)
+
+        top = []
+        order = count()
+        for product_id, score in self._stream(state, driver):
+            if len(top) >= limit and top[0][0] >= score + others_bound:
+                break
+            for matches in others:
+                token_score = self._lookup_score(matches, product_id)
+                if not token_score:
+                    break
+                score += token_score
+            else:
+                # Produk yang dihapus di tengah query dilewati
+                product = state.docs.get(product_id)
+                if product is None:
+                    continue
+                entry = (score, next(order), product_id, product)
+                if len(top) < limit:
+                    heapq.heappush(top, entry)
+                elif score > top[0][0]:
+                    heapq.heapreplace(top, entry)
+        top.sort(key=lambda entry: (-entry[0], state.sort_names.get(entry[2], '')))
+        return [product for _, _, _, product in top]
+
+    def stats(self):
+        """Statistik index pencarian"""
+        state = self._state
+        return {'documents': len(state.docs), 'terms': len(state.terms)}
+
+# Instance index pencarian, disinkronkan dengan cache katalog
+product_search = ProductSearchIndex(product_catalog)
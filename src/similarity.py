@@ -0,0 +1,663 @@
+"""
+Modul kemiripan produk item-item: co-view (dihitung offline) dan konten (kategori/tag)
+"""
+
+from datetime import datetime, timedelta
+from importlib.util import find_spec
+from itertools import islice
+import logging
+import os
+import random
+import threading
+import time
+from config import Config
+from src.database import mongodb, product_catalog
+
+log = logging.getLogger(__name__)
+
+# numpy/scipy berat untuk di-import; modul baru dimuat saat store co-view dipakai
+SIMILARITY_AVAILABLE = find_spec('numpy') is not None and find_spec('scipy') is not None
+np = sparse = None
+
+def _import_numpy():
+    """Memuat numpy dan scipy.sparse saat pertama dibutuhkan"""
+    global np, sparse
+    if np is None:
+        import numpy
+        from scipy import sparse as scipy_sparse
+        np, sparse = numpy, scipy_sparse
+
+class CoViewSimilarity:
+    """Top-K produk serupa berdasarkan user yang melihat produk yang sama.
+
+    Builder membaca `product_views` menjadi matriks sparse biner user x item
+    X, lalu menghitung co-occurrence C = X^T X dan skor cosine
+    C_ij / sqrt(n_i * n_j) secara vektor. Untuk setiap produk hanya K tetangga
+    teratas yang disimpan dalam array (neighbors/scores/common) sehingga
+    lookup di halaman produk cukup satu indexing array.
+
+    Hasil disimpan ke file .npz; proses web memuat ulang file tersebut jika
+    berubah. `refresh()` menambah view baru secara incremental:
+    dC = dX^T X + X^T dX + dX^T dX, dan hanya baris produk yang terdampak
+    yang dihitung ulang top-K-nya (skor tetangga lain ikut diperbarui saat
+    build penuh berikutnya).
+    """
+
+    # View yang masuk terlambat (write-behind) tetap terbaca saat refresh;
+    # pasangan yang sudah ada otomatis diabaikan karena matriks biner
+    WATERMARK_OVERLAP = timedelta(minutes=5)
+
+    def __init__(self, db, path=None, top_k=None, min_common=None, check_interval=None):
+        self.mongodb = db
+        self.path = path or Config.SIMILARITY_STORE_PATH
+        self.top_k = top_k or Config.SIMILARITY_TOP_K
+        self.min_common = min_common or Config.SIMILARITY_MIN_COMMON_USERS
+        self.check_interval = Config.SIMILARITY_RELOAD_SECONDS if check_interval is None else check_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._mtime = None
+        self._clear()
+
+    def _clear(self):
+        self._item_ids = []
+        self._item_index = {}
+        self._user_ids = []
+        self._user_index = {}
+        self._views = None        # X: user x item (biner)
+        self._cooccurrence = None  # C: item x item
+        self._neighbors = None
+        self._scores = None
+        self._common = None
+        self.watermark = None
+        self.built_at = None
+        self._serving = None
+
+    def _publish(self):
+        """Mengganti data yang dilayani query dalam satu assignment (aman untuk reader)"""
+        self._serving = (self._item_ids, self._item_index, self._neighbors, self._scores, self._common)
+
+    @property
+    def available(self):
+        """True jika store sudah dibangun dan bisa dipakai"""
+        self._maybe_reload()
+        return self._serving is not None
+
+    # --- Membaca data view ---
+
+    def _read_views(self, since=None):
+        """Membaca pasangan (user, produk) dari MongoDB sebagai array index"""
+        query = {'viewed_at': {'$gt': since}} if since else {}
+        cursor = self.mongodb.get_collection('product_views').find(
+            query, {'_id': 0, 'user_id': 1, 'product_id': 1, 'viewed_at': 1}
+        )
+        rows, cols = [], []
+        watermark = self.watermark
+        for view in cursor:
+            user_id, product_id = view.get('user_id'), view.get('product_id')
+            if user_id is None or product_id is None:
+                continue
+            user_id, product_id = str(user_id), str(product_id)
+            row = self._user_index.get(user_id)
+            if row is None:
+                row = self._user_index[user_id] = len(self._user_ids)
+                self._user_ids.append(user_id)
+            col = self._item_index.get(product_id)
+            if col is None:
+                col = self._item_index[product_id] = len(self._item_ids)
+                self._item_ids.append(product_id)
+            rows.append(row)
+            cols.append(col)
+            viewed_at = view.get('viewed_at')
+            if isinstance(viewed_at, datetime) and (watermark is None or viewed_at > watermark):
+                watermark = viewed_at
+        self.watermark = watermark
+        shape = (len(self._user_ids), len(self._item_ids))
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32))),
+            shape=shape
+        )
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        return matrix
+
+    # --- Perhitungan ---
+
+    def _compute_top_k(self, rows):
+        """Menghitung ulang top-K tetangga untuk baris (produk) tertentu"""
+        cooccurrence = self._cooccurrence
+        counts = cooccurrence.diagonal().astype(np.float64)
+        inv_sqrt = np.zeros_like(counts)
+        nonzero = counts > 0
+        inv_sqrt[nonzero] = 1.0 / np.sqrt(counts[nonzero])
+        indptr, indices, data = cooccurrence.indptr, cooccurrence.indices, cooccurrence.data
+        k = self.top_k
+        for row in rows:
+            start, end = indptr[row], indptr[row + 1]
+            cols, common = indices[start:end], data[start:end]
+            keep = (cols != row) & (common >= self.min_common)
+            cols, common = cols[keep], common[keep]
+            self._neighbors[row] = -1
+            self._scores[row] = 0
+            self._common[row] = 0
+            if not len(cols):
+                continue
+            scores = common * inv_sqrt[row] * inv_sqrt[cols]
+            if len(scores) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(len(scores))
+            # Urut skor tertinggi, seri diurutkan dari jumlah user yang sama
+            top = top[np.lexsort((-common[top], -scores[top]))]
+            self._neighbors[row, :len(top)] = cols[top]
+            self._scores[row, :len(top)] = scores[top]
+            self._common[row, :len(top)] = common[top]
+
+    def _allocate(self, item_count):
+        """Menyiapkan array top-K untuk `item_count` produk (mempertahankan isi lama)"""
+        neighbors = np.full((item_count, self.top_k), -1, dtype=np.int32)
+        scores = np.zeros((item_count, self.top_k), dtype=np.float32)
+        common = np.zeros((item_count, self.top_k), dtype=np.int32)
+        if self._neighbors is not None:
+            old = min(len(self._neighbors), item_count)
+            neighbors[:old] = self._neighbors[:old]
+            scores[:old] = self._scores[:old]
+            common[:old] = self._common[:old]
+        self._neighbors, self._scores, self._common = neighbors, scores, common
+
+    def _build(self):
+        self._clear()
+        views = self._read_views()
+        self._views = views
+        self._cooccurrence = (views.T @ views).tocsr()
+        self._allocate(len(self._item_ids))
+        self._compute_top_k(range(len(self._item_ids)))
+        self.built_at = datetime.now()
+        self._save()
+        self._publish()
+        return self.stats()
+
+    def build(self):
+        """Membangun ulang seluruh store dari semua data view lalu menyimpannya"""
+        _import_numpy()
+        with self._lock:
+            return self._build()
+
+    def refresh(self):
+        """Menambahkan view baru sejak build/refresh terakhir secara incremental"""
+        _import_numpy()
+        with self._lock:
+            if self._views is None and not self._load(full=True):
+                return self._build()
+            old_views = self._views
+            since = self.watermark - self.WATERMARK_OVERLAP if self.watermark else None
+            delta = self._read_views(since)
+            shape = delta.shape
+            old_views.resize(shape)
+            self._cooccurrence.resize((shape[1], shape[1]))
+            # Hanya pasangan (user, produk) yang benar-benar baru
+            delta = (delta - delta.multiply(old_views)).tocsr()
+            delta.eliminate_zeros()
+            if delta.nnz:
+                change = (delta.T @ old_views) + (old_views.T @ delta) + (delta.T @ delta)
+                self._cooccurrence = (self._cooccurrence + change).tocsr()
+                self._views = (old_views + delta).tocsr()
+                self._allocate(shape[1])
+                affected = np.unique(change.tocoo().row)
+                self._compute_top_k(affected)
+                self.built_at = datetime.now()
+                self._save()
+                self._publish()
+            stats = self.stats()
+            stats['new_pairs'] = int(delta.nnz)
+            return stats
+
+    # --- Penyimpanan ---
+
+    def _save(self):
+        """Menyimpan store ke file .npz secara atomik"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                item_ids=np.asarray(self._item_ids, dtype=str),
+                user_ids=np.asarray(self._user_ids, dtype=str),
+                views_indptr=self._views.indptr, views_indices=self._views.indices,
+                views_shape=np.asarray(self._views.shape),
+                cooc_indptr=self._cooccurrence.indptr, cooc_indices=self._cooccurrence.indices,
+                cooc_data=self._cooccurrence.data, cooc_shape=np.asarray(self._cooccurrence.shape),
+                neighbors=self._neighbors, scores=self._scores, common=self._common,
+                watermark=np.asarray(self.watermark.isoformat() if self.watermark else ''),
+                built_at=np.asarray(self.built_at.isoformat()),
+            )
+        os.replace(tmp_path, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+    def _load(self, full=False):
+        """Memuat store dari file; `full` juga memuat matriks untuk refresh incremental"""
+        if not os.path.exists(self.path):
+            return False
+        _import_numpy()
+        with np.load(self.path, allow_pickle=False) as store:
+            item_ids = store['item_ids'].tolist()
+            self._item_ids = item_ids
+            self._item_index = {product_id: i for i, product_id in enumerate(item_ids)}
+            self._neighbors = store['neighbors']
+            self._scores = store['scores']
+            self._common = store['common']
+            watermark = str(store['watermark'])
+            self.watermark = datetime.fromisoformat(watermark) if watermark else None
+            self.built_at = datetime.fromisoformat(str(store['built_at']))
+            if full:
+                self._user_ids = store['user_ids'].tolist()
+                self._user_index = {user_id: i for i, user_id in enumerate(self._user_ids)}
+                indices = store['views_indices']
+                self._views = sparse.csr_matrix(
+                    (np.ones(len(indices), dtype=np.int32), indices, store['views_indptr']),
+                    shape=tuple(store['views_shape'])
+                )
+                self._cooccurrence = sparse.csr_matrix(
+                    (store['cooc_data'], store['cooc_indices'], store['cooc_indptr']),
+                    shape=tuple(store['cooc_shape'])
+                )
+        self._mtime = os.path.getmtime(self.path)
+        self._publish()
+        return True
+
+    def _maybe_reload(self):
+        """Memuat ulang file store jika berubah (dicek paling sering tiap check_interval)"""
+        if not SIMILARITY_AVAILABLE:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            with self._lock:
+                try:
+                    self._load()
+                except Exception as e:
+                    log.error("Error loading similarity store %s: %s", self.path, e)
+
+    # --- Query ---
+
+    def neighbors(self, product_id, limit=5):
+        """Mengembalikan [(product_id, skor, jumlah user sama)] untuk satu produk"""
+        self._maybe_reload()
+        if self._serving is None:
+            return []
+        item_ids, item_index, neighbors, scores, common = self._serving
+        row = item_index.get(str(product_id))
+        if row is None:
+            return []
+        result = []
+        for col, score, count in zip(neighbors[row], scores[row], common[row]):
+            if col < 0 or len(result) >= limit:
+                break
+            result.append((item_ids[col], float(score), int(count)))
+        return result
+
+    def similar_products(self, product_id, limit=5):
+        """Produk serupa (format sama dengan Neo4jDB.get_similar_products) dari store"""
+        candidates = self.neighbors(product_id, self.top_k)
+        products = product_catalog.get_many(pid for pid, _, _ in candidates)
+        result = []
+        for pid, score, count in candidates:
+            product = products.get(int(pid)) if pid.isdigit() else None
+            if product is None:
+                continue
+            result.append({
+                'product_id': pid,
+                'product_name': product.get('name'),
+                'image': product.get('image'),
+                'price': product.get('price'),
+                'common_users': count,
+                'score': round(score, 4),
+            })
+            if len(result) >= limit:
+                break
+        return result
+
+    def stats(self):
+        """Statistik store kemiripan"""
+        return {
+            'available': self._serving is not None,
+            'products': len(self._item_ids),
+            'users': len(self._user_ids),
+            'pairs': int(self._cooccurrence.nnz) if self._cooccurrence is not None else None,
+            'top_k': self.top_k,
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+            'built_at': self.built_at.isoformat() if self.built_at else None,
+        }
+
+class _ContentState:
+    """Isi index kemiripan konten; `reset` membangun state baru lalu menukarnya sekaligus"""
+
+    __slots__ = ('tag_ids', 'docs', 'features', 'categories', 'category_sizes', 'tag_postings',
+                 'band_keys', 'buckets', 'neighbors', 'referenced_by')
+
+    def __init__(self):
+        self.tag_ids = {}
+        self.docs = {}
+        self.features = {}
+        self.categories = {}
+        self.category_sizes = {}
+        self.tag_postings = {}
+        self.band_keys = {}
+        self.buckets = {}
+        self.neighbors = {}
+        self.referenced_by = {}
+
+class ContentSimilarityIndex:
+    """Index kemiripan konten produk (kategori dan tag) di memori.
+
+    Seperti query Neo4j sebelumnya, produk serupa harus sekategori dan punya
+    minimal satu tag yang sama; produk tanpa kategori atau tag tidak punya
+    tetangga. Tag di-encode ke ID integer (dictionary encoding) dan disimpan
+    dalam inverted list per (kategori, tag). Setiap produk juga punya
+    signature MinHash atas ID tag-nya yang dipecah menjadi band (LSH) per
+    kategori, jadi kandidat produk serupa didapat dari bucket band yang sama
+    tanpa memindai seluruh katalog. Kandidat dinilai dengan Jaccard tag yang
+    sebenarnya dan top-K per produk disimpan, sehingga lookup di halaman
+    produk cukup satu baca dict.
+
+    Jumlah kandidat per produk dibatasi: setiap bucket dan inverted list
+    hanya menyumbang maksimal `MAX_BUCKET_CANDIDATES` produk, dan inverted
+    list tag baru dipakai jika LSH menghasilkan terlalu sedikit kandidat.
+    Dengan begitu `reset` tumbuh linear terhadap ukuran katalog, bukan kuadratik.
+
+    Index mengikuti `ProductCatalog` lewat `reset`/`upsert`/`remove`. `reset`
+    membangun state baru di thread background lalu menukarnya; sampai saat
+    itu state lama tetap dilayani, dan perubahan yang masuk selama build
+    diterapkan ke state lama sekaligus diulang pada state baru setelah
+    ditukar. Saat satu produk berubah hanya produk itu dan produk yang
+    menampilkannya yang dihitung ulang.
+    """
+
+    NUM_PERM = 32
+    # 8 band x 4 baris: hanya pasangan dengan Jaccard tinggi yang sering jatuh di bucket yang sama
+    BANDS = 8
+    # Tag yang sangat umum dalam satu kategori tidak dipakai sebagai sumber kandidat langsung
+    MAX_POSTING = 500
+    # Produk maksimal yang diambil dari satu bucket LSH atau inverted list
+    MAX_BUCKET_CANDIDATES = 16
+    _PRIME = (1 << 61) - 1
+
+    def __init__(self, catalog=None, top_k=None):
+        self.catalog = catalog
+        self.top_k = top_k or Config.CONTENT_SIMILARITY_TOP_K
+        rng = random.Random(1009)
+        self._perms = [(rng.randrange(1, self._PRIME), rng.randrange(0, self._PRIME)) for _ in range(self.NUM_PERM)]
+        self._hash_cache = {}
+        self._lock = threading.Lock()
+        self._state = _ContentState()
+        # Build background: nomor reset terakhir, thread-nya, dan perubahan yang masuk selama build
+        self._generation = 0
+        self._builder = None
+        self._backlog = None
+        self._builds = 0
+        self.build_seconds = None
+        if catalog is not None:
+            catalog.subscribe(self)
+
+    @staticmethod
+    def _encode(state, tags):
+        """Mengubah daftar tag menjadi himpunan ID tag"""
+        ids = set()
+        for tag in tags or []:
+            if not isinstance(tag, str) or not tag.strip():
+                continue
+            key = tag.strip().lower()
+            tag_id = state.tag_ids.get(key)
+            if tag_id is None:
+                tag_id = state.tag_ids[key] = len(state.tag_ids)
+            ids.add(tag_id)
+        return frozenset(ids)
+
+    def _tag_hashes(self, tag_id):
+        """Nilai hash satu tag untuk setiap permutasi (di-cache, vocabulary tag kecil)"""
+        hashes = self._hash_cache.get(tag_id)
+        if hashes is None:
+            prime = self._PRIME
+            hashes = self._hash_cache[tag_id] = tuple((a * tag_id + b) % prime for a, b in self._perms)
+        return hashes
+
+    def _signature_bands(self, category, features):
+        """Signature MinHash dipotong per band menjadi kunci bucket LSH dalam satu kategori"""
+        if not features or not category:
+            return ()
+        signature = [min(column) for column in zip(*map(self._tag_hashes, features))]
+        rows = self.NUM_PERM // self.BANDS
+        return tuple(
+            (category, band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.BANDS)
+        )
+
+    def _add(self, state, product):
+        product_id = product.get('id')
+        features = self._encode(state, product.get('tags'))
+        category = (product.get('category') or '').strip().lower()
+        state.docs[product_id] = product
+        state.features[product_id] = features
+        state.categories[product_id] = category
+        if category:
+            state.category_sizes[category] = state.category_sizes.get(category, 0) + 1
+            for tag_id in features:
+                state.tag_postings.setdefault((category, tag_id), set()).add(product_id)
+        band_keys = self._signature_bands(category, features)
+        state.band_keys[product_id] = band_keys
+        for key in band_keys:
+            state.buckets.setdefault(key, set()).add(product_id)
+
+    @staticmethod
+    def _discard(state, product_id):
+        if product_id not in state.docs:
+            return
+        features = state.features.pop(product_id)
+        category = state.categories.pop(product_id)
+        if category:
+            for tag_id in features:
+                postings = state.tag_postings[(category, tag_id)]
+                postings.discard(product_id)
+                if not postings:
+                    del state.tag_postings[(category, tag_id)]
+            state.category_sizes[category] -= 1
+            if not state.category_sizes[category]:
+                del state.category_sizes[category]
+        for key in state.band_keys.pop(product_id):
+            bucket = state.buckets[key]
+            bucket.discard(product_id)
+            if not bucket:
+                del state.buckets[key]
+        for _, other in state.neighbors.pop(product_id, []):
+            state.referenced_by.get(other, set()).discard(product_id)
+        del state.docs[product_id]
+
+    def _candidates(self, state, product_id):
+        """Kandidat produk sekategori dari bucket LSH dan inverted list (jumlahnya dibatasi).
+
+        Bisa memuat produk itu sendiri; produk dengan kategori dan tag yang
+        sama selalu mendapat himpunan kandidat yang sama.
+        """
+        limit = self.MAX_BUCKET_CANDIDATES
+        candidates = set()
+        for key in state.band_keys[product_id]:
+            candidates.update(islice(state.buckets[key], limit))
+        category = state.categories[product_id]
+        if category and len(candidates) <= self.top_k:
+            for tag_id in state.features[product_id]:
+                postings = state.tag_postings[(category, tag_id)]
+                if len(postings) <= self.MAX_POSTING:
+                    candidates.update(islice(postings, limit))
+        return candidates
+
+    def _set_neighbors(self, state, product_id, top):
+        for _, other in state.neighbors.get(product_id, []):
+            state.referenced_by.get(other, set()).discard(product_id)
+        state.neighbors[product_id] = top
+        for _, other in top:
+            state.referenced_by.setdefault(other, set()).add(product_id)
+
+    def _score(self, state, product_id):
+        """Kandidat berskor (-Jaccard tag, id) terurut dari skor tertinggi (termasuk produk itu sendiri)"""
+        features = state.features[product_id]
+        size = len(features)
+        all_features = state.features
+        # Banyak kandidat punya himpunan tag yang persis sama: Jaccard dihitung sekali per himpunan
+        jaccard = {}
+        scored = []
+        for other in self._candidates(state, product_id):
+            # Kandidat sudah pasti sekategori
+            other_features = all_features[other]
+            score = jaccard.get(other_features)
+            if score is None:
+                shared = len(features & other_features)
+                score = jaccard[other_features] = shared / (size + len(other_features) - shared) if shared else 0.0
+            if score:
+                scored.append((-score, other))
+        scored.sort()
+        return scored
+
+    def _top(self, scored, product_id):
+        """Top-K tetangga dari kandidat berskor, tanpa produk itu sendiri"""
+        others = ((-negative, other) for negative, other in scored if other != product_id)
+        return list(islice(others, self.top_k))
+
+    def _compute(self, state, product_id):
+        """Menghitung ulang top-K tetangga satu produk; mengembalikan semua kandidat berskor"""
+        scored = [item for item in self._score(state, product_id) if item[1] != product_id]
+        self._set_neighbors(state, product_id, self._top(scored, product_id))
+        return scored
+
+    def _offer(self, state, product_id, score, other):
+        """Memasukkan `other` ke top-K `product_id` jika skornya cukup tinggi"""
+        top = state.neighbors.get(product_id, [])
+        if len(top) >= self.top_k and (-score, other) >= (-top[-1][0], top[-1][1]):
+            return
+        top = sorted(top + [(score, other)], key=lambda item: (-item[0], item[1]))[:self.top_k]
+        self._set_neighbors(state, product_id, top)
+
+    def _build(self, products):
+        """Membangun state lengkap dari daftar produk"""
+        state = _ContentState()
+        for product in products:
+            self._add(state, product)
+        # Produk dengan kategori dan tag yang sama berbagi kandidat: skor dihitung sekali per kelompok
+        groups = {}
+        for product_id, features in state.features.items():
+            groups.setdefault((state.categories[product_id], features), []).append(product_id)
+        for members in groups.values():
+            scored = self._score(state, members[0])
+            for product_id in members:
+                self._set_neighbors(state, product_id, self._top(scored, product_id))
+        return state
+
+    def reset(self, products):
+        """Membangun ulang index dari seluruh katalog di thread background, lalu menukarnya"""
+        products = list(products)
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._backlog = []
+            builder = self._builder = threading.Thread(
+                target=self._rebuild, args=(products, generation), name='content-similarity-build', daemon=True
+            )
+        builder.start()
+
+    def _rebuild(self, products, generation):
+        started = time.perf_counter()
+        try:
+            state = self._build(products)
+        except Exception:
+            log.exception("Error building content similarity index")
+            with self._lock:
+                if generation == self._generation:
+                    self._backlog = None
+            return
+        with self._lock:
+            if generation != self._generation:
+                # Ada reset yang lebih baru; hasil build ini sudah usang
+                return
+            backlog, self._backlog = self._backlog, None
+            for event, payload in backlog:
+                getattr(self, f'_{event}')(state, payload)
+            self._state = state
+            self._builds += 1
+            self.build_seconds = time.perf_counter() - started
+
+    def wait(self, timeout=None):
+        """Menunggu build background terakhir selesai; mengembalikan False jika masih berjalan"""
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+            return not builder.is_alive()
+        return True
+
+    def _upsert(self, state, product):
+        """Menambah atau memperbarui satu produk di `state`; dipanggil dengan `_lock`"""
+        product_id = product.get('id')
+        # Produk yang sebelumnya menampilkan produk ini dihitung ulang penuh (skornya bisa turun)
+        affected = set(state.referenced_by.pop(product_id, ()))
+        self._discard(state, product_id)
+        self._add(state, product)
+        for negative, other in self._compute(state, product_id):
+            if other not in affected:
+                # Skor simetris: cukup tawarkan produk ini ke top-K kandidatnya
+                self._offer(state, other, -negative, product_id)
+        for other in affected:
+            if other in state.docs:
+                self._compute(state, other)
+
+    def _remove(self, state, product_id):
+        """Menghapus satu produk dari `state`; dipanggil dengan `_lock`"""
+        affected = state.referenced_by.pop(product_id, set())
+        self._discard(state, product_id)
+        for other in affected:
+            if other in state.docs:
+                self._compute(state, other)
+
+    def upsert(self, product):
+        """Menambah atau memperbarui satu produk beserta tetangga yang terdampak"""
+        with self._lock:
+            self._upsert(self._state, product)
+            if self._backlog is not None:
+                self._backlog.append(('upsert', product))
+
+    def remove(self, product_id):
+        """Menghapus satu produk dan menghitung ulang produk yang menampilkannya"""
+        with self._lock:
+            self._remove(self._state, product_id)
+            if self._backlog is not None:
+                self._backlog.append(('remove', product_id))
+
+    def similar_products(self, product_id, limit=6):
+        """Produk serupa (dokumen katalog) terurut dari skor tertinggi"""
+        if self.catalog is not None:
+            self.catalog.refresh()
+        state = self._state
+        docs = state.docs
+        neighbors = state.neighbors.get(product_id, [])
+        return [doc for doc in (docs.get(other) for _, other in neighbors[:limit]) if doc is not None]
+
+    def stats(self):
+        """Statistik index kemiripan konten"""
+        state = self._state
+        return {
+            'products': len(state.docs),
+            'tags': len(state.tag_ids),
+            'categories': len(state.category_sizes),
+            'buckets': len(state.buckets),
+            'max_bucket': max(map(len, state.buckets.values()), default=0),
+            'building': self._backlog is not None,
+            'builds': self._builds,
+            'build_seconds': round(self.build_seconds, 3) if self.build_seconds is not None else None,
+        }
+
+# Instance store kemiripan co-view dan index kemiripan konten
+coview_similarity = CoViewSimilarity(mongodb)
+content_similarity = ContentSimilarityIndex(product_catalog)
@@ -0,0 +1,41 @@
+"""
+Modul laporan waktu startup aplikasi (import, koneksi database, warm-up cache)
+"""
+
+from contextlib import contextmanager
+import time
+
+class StartupReport:
+    """Mencatat durasi setiap tahap startup agar bagian yang lambat terlihat"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.ready_seconds = None
+
+    def record(self, name, seconds, error=None):
+        """Mencatat satu tahap yang durasinya sudah diukur"""
+        self.phases.append({'phase': name, 'seconds': round(seconds, 4), 'error': error})
+
+    @contextmanager
+    def phase(self, name):
+        """Mengukur satu tahap; error dicatat lalu diteruskan ke pemanggil"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(name, time.perf_counter() - started, str(e))
+            raise
+        self.record(name, time.perf_counter() - started)
+
+    def mark_ready(self):
+        """Menandai aplikasi siap melayani request"""
+        self.ready_seconds = round(time.perf_counter() - self.started, 4)
+        return self.ready_seconds
+
+    def summary(self):
+        """Ringkasan laporan startup"""
+        return {'ready_seconds': self.ready_seconds, 'phases': list(self.phases)}
+
+# Instance laporan startup (dibuat saat modul pertama di-import oleh aplikasi)
+startup_report = StartupReport()
@@ -0,0 +1,125 @@
+"""
+Test cache TTL/LRU dan invalidasi cache rekomendasi
+"""
+
+from src.cache import RecommendationCache, TTLCache
+
+def test_ttl_expiry_and_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    cache.set('d', 4, ttl=-1)
+    assert cache.get('d') is None
+    assert cache.stats()['evictions'] == 2
+
+def test_delete_tagged_removes_only_tagged_entries():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('a', 1, tags=['x'])
+    cache.set('b', 2, tags=['x', 'y'])
+    cache.set('c', 3, tags=['z'])
+    assert cache.delete_tagged(['x']) == 2
+    assert cache.get('c') == 3
+    assert cache.delete_tagged(['y']) == 0
+
+def test_evicted_entries_leave_no_tags_behind():
+    cache = TTLCache(maxsize=1, ttl=60)
+    cache.set('a', 1, tags=['x'])
+    cache.set('b', 2, tags=['y'])
+    cache.set('b', 3, tags=['z'])
+    assert cache._tags == {'z': {'b'}}
+
+def test_stale_write_is_skipped_after_invalidation():
+    cache = RecommendationCache(maxsize=10, ttl=60)
+
+    def compute():
+        # Event datang saat rekomendasi masih dihitung
+        cache.invalidate_user('u1')
+        return [{'product_id': 1}]
+
+    assert cache.get_or_compute('user', 'u1', 5, compute) == [{'product_id': 1}]
+    assert cache.stats()['size'] == 0
+    assert cache.stats()['stale_writes'] == 1
+    cache.get_or_compute('user', 'u1', 5, lambda: [])
+    assert cache.stats()['size'] == 1
+
+def test_unrelated_invalidation_keeps_the_write():
+    cache = RecommendationCache(maxsize=10, ttl=60)
+
+    def compute():
+        cache.invalidate_user('u2')
+        cache.invalidate_product(99)
+        return [{'product_id': 1}]
+
+    cache.get_or_compute('user', 'u1', 5, compute)
+    assert cache.stats()['size'] == 1
+    assert cache.stats()['stale_writes'] == 0
+
+def test_invalidated_product_in_result_discards_the_write():
+    cache = RecommendationCache(maxsize=10, ttl=60)
+
+    def compute():
+        cache.invalidate_product(1)
+        return [{'product_id': 1}]
+
+    cache.get_or_compute('user', 'u1', 5, compute)
+    assert cache.stats()['size'] == 0
+    assert cache.stats()['stale_writes'] == 1
+
+def test_clear_during_compute_discards_the_write():
+    cache = TTLCache(maxsize=10, ttl=60)
+    token = cache.begin()
+    cache.clear()
+    assert cache.set('a', 1, tags=['x'], since=token) is False
+    cache.end(token)
+    assert cache._inflight == {} and cache._invalidated == {}
+
+def test_invalidation_without_computation_leaves_no_record():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.delete_tagged(['x'])
+    token = cache.begin()
+    assert cache.set('a', 1, tags=['x'], since=token)
+    cache.end(token)
+
+def fill(cache, entries):
+    for strategy, subject, value in entries:
+        cache.get_or_compute(strategy, subject, 5, lambda value=value: value)
+
+def cached_keys(cache):
+    return sorted((key[0], key[1]) for key in cache._cache._data)
+
+def test_view_invalidates_user_viewed_product_and_earlier_views():
+    cache = RecommendationCache(maxsize=100, ttl=60)
+    fill(cache, [
+        ('user', 'u1', []),
+        ('user', 'u2', []),
+        ('similar', '10', []),
+        ('similar', '11', []),
+        ('similar', '12', []),
+        ('bought_together', '10', []),
+    ])
+    removed = cache.invalidate_for_events([('view', 'u1', 10)], {'u1': [11]})
+    assert removed == 3
+    assert cached_keys(cache) == [('bought_together', '10'), ('similar', '12'), ('user', 'u2')]
+    assert cache.generation == 1
+
+def test_purchase_invalidates_bought_together_only():
+    cache = RecommendationCache(maxsize=100, ttl=60)
+    fill(cache, [('bought_together', '5', []), ('similar', '5', []), ('user', 'u1', [])])
+    cache.invalidate_for_events([('purchase', 'u1', 5), ('like', 'u1', 5)])
+    assert cached_keys(cache) == [('similar', '5'), ('user', 'u1')]
+
+def test_product_change_invalidates_entries_showing_it():
+    cache = RecommendationCache(maxsize=100, ttl=60)
+    fill(cache, [
+        ('content', '7', [{'id': 1}]),
+        ('user', 'u1', [{'product_id': '7'}]),
+        ('similar', '2', [{'product_id': 3}]),
+    ])
+    cache.upsert({'id': 7})
+    assert cached_keys(cache) == [('similar', '2')]
+    cache.reset([])
+    assert cached_keys(cache) == []
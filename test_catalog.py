@@ -0,0 +1,79 @@
+"""
+Test cache katalog: pembaruan dari proses lain dan notifikasi index turunan
+"""
+
+import threading
+from src.database import ProductCatalog
+
+class RecordingListener:
+    """Listener katalog yang mencatat notifikasi; `gate` menahan upsert/reset sampai dibuka"""
+
+    def __init__(self, gate=None):
+        self.events = []
+        self.gate = gate
+
+    def _record(self, event, payload):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.events.append((event, payload))
+
+    def reset(self, products):
+        self._record('reset', len(products))
+
+    def upsert(self, product):
+        self._record('upsert', product['id'])
+
+    def remove(self, product_id):
+        self._record('remove', product_id)
+
+def make_catalogs(memory_db, count=5, incremental_limit=3):
+    products = memory_db.get_collection('products')
+    for i in range(1, count + 1):
+        products.insert_one({'id': i, 'name': f'Produk {i}', 'price': i})
+    writer = ProductCatalog(memory_db, check_interval=0)
+    reader = ProductCatalog(memory_db, check_interval=0, incremental_limit=incremental_limit)
+    writer.bump_version()
+    writer.refresh(wait=True)
+    reader.refresh(wait=True)
+    return products, writer, reader
+
+def change(products, writer, ids):
+    for product_id in ids:
+        products.update_one({'id': product_id}, {'$set': {'price': 100}})
+    writer.bump_version(ids)
+
+def test_small_change_is_delivered_as_upserts(memory_db):
+    products, writer, reader = make_catalogs(memory_db)
+    listener = RecordingListener()
+    reader.subscribe(listener)
+    change(products, writer, [2, 4])
+    reader.refresh(wait=True)
+    assert listener.events[1:] == [('upsert', 2), ('upsert', 4)]
+    assert reader.get(2)['price'] == 100
+    assert reader.stats()['incremental_reloads'] == 1
+
+def test_large_change_is_delivered_as_one_reset(memory_db):
+    products, writer, reader = make_catalogs(memory_db)
+    listener = RecordingListener()
+    reader.subscribe(listener)
+    change(products, writer, [1, 2, 3, 4])
+    reader.refresh(wait=True)
+    assert listener.events == [('reset', 5), ('reset', 5)]
+    assert [p['price'] for p in reader.all()] == [100, 100, 100, 100, 5]
+    assert reader.stats()['reloads'] == 1
+
+def test_background_refresh_serves_old_snapshot_until_listeners_finish(memory_db):
+    products, writer, reader = make_catalogs(memory_db)
+    gate = threading.Event()
+    listener = RecordingListener(gate)
+    gate.set()
+    reader.subscribe(listener)
+    gate.clear()
+    change(products, writer, [3])
+    reader.refresh()
+    # Listener masih tertahan: request dilayani snapshot lama tanpa menunggu
+    assert reader.get(3)['price'] == 3
+    gate.set()
+    reader.refresh(wait=True)
+    assert reader.get(3)['price'] == 100
+    assert listener.events[-1] == ('upsert', 3)
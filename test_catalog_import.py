@@ -0,0 +1,122 @@
+"""
+Test normalisasi dan pembacaan feed import katalog
+"""
+
+from datetime import datetime, timedelta
+import gzip
+import json
+import socket
+import subprocess
+import sys
+import pytest
+from config import Config
+from src.catalog_import import feed_format, iter_feed, normalize_record
+
+@pytest.mark.parametrize('raw, expected', [
+    ('Rp 1.250.000', 1250000),
+    ('1,250,000', 1250000),
+    ('125000', 125000),
+    ('99.5', 99),
+    (15000, 15000),
+    (12.9, 12),
+])
+def test_price_formats(raw, expected):
+    assert normalize_record({'name': 'Produk', 'price': raw})['price'] == expected
+
+def test_fields_are_trimmed_and_tags_split():
+    product = normalize_record({
+        'name': '  Headset  ', 'price': '10', 'category': ' audio ', 'tags': 'gaming| usb ,mic',
+        'sku': 123, 'id': '7', 'description': '',
+    })
+    assert product == {
+        'name': 'Headset', 'price': 10, 'category': 'audio', 'tags': ['gaming', 'usb', 'mic'],
+        'sku': '123', 'id': 7,
+    }
+
+def test_tag_list_from_jsonl_is_kept():
+    assert normalize_record({'name': 'A', 'price': 1, 'tags': ['x', 'y']})['tags'] == ['x', 'y']
+
+@pytest.mark.parametrize('record', [
+    {'name': '', 'price': 1},
+    {'name': 'A'},
+    {'name': 'A', 'price': 'abc'},
+    {'name': 'A', 'price': -5},
+    {'name': 'A', 'price': 1, 'id': 'x1'},
+])
+def test_invalid_records_raise_value_error(record):
+    with pytest.raises(ValueError):
+        normalize_record(record)
+
+def test_feed_format_from_extension():
+    assert feed_format('feed.csv') == 'csv'
+    assert feed_format('feed.JSONL.gz') == 'jsonl'
+    assert feed_format('feed.ndjson') == 'jsonl'
+    assert feed_format('feed.txt', 'csv') == 'csv'
+    with pytest.raises(ValueError):
+        feed_format('feed.xml')
+
+def test_iter_feed_reports_bad_jsonl_lines(tmp_path):
+    path = tmp_path / 'feed.jsonl.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps({'name': 'A', 'price': 1}) + '\n\nbukan json\n[1, 2]\n')
+    rows = list(iter_feed(str(path)))
+    assert rows[0] == (1, {'name': 'A', 'price': 1})
+    assert [line for line, _ in rows[1:]] == [3, 4]
+    assert all(isinstance(error, ValueError) for _, error in rows[1:])
+
+def test_iter_feed_csv_line_numbers(tmp_path):
+    path = tmp_path / 'feed.csv'
+    path.write_text('\ufeffname,price\nKabel,"1.000"\nMouse,2000\n', encoding='utf-8')
+    assert list(iter_feed(str(path))) == [
+        (2, {'name': 'Kabel', 'price': '1.000'}),
+        (3, {'name': 'Mouse', 'price': '2000'}),
+    ]
+
+class RecordingCatalog:
+    """Pengganti ProductCatalog yang mencatat panggilan `bump_version`"""
+
+    incremental_limit = 3
+
+    def __init__(self):
+        self.bumps = []
+
+    def bump_version(self, product_ids=None):
+        self.bumps.append(product_ids)
+
+def make_importer(memory_db, **kwargs):
+    from src.catalog_import import CatalogImporter
+    from src.database import IdAllocator
+    catalog = RecordingCatalog()
+    ids = IdAllocator(memory_db, 'product_id', 'products')
+    return CatalogImporter(memory_db, None, catalog, ids, **kwargs), catalog
+
+def test_catalog_version_is_bumped_per_group_of_chunks(memory_db, tmp_path):
+    path = tmp_path / 'feed.csv'
+    path.write_text('sku,name,price\n' + ''.join(f'S{i},Produk {i},{i}\n' for i in range(5)), encoding='utf-8')
+    importer, catalog = make_importer(memory_db, chunk_size=2, bump_chunks=2)
+    job = importer.run(str(path), graph=False)
+    assert job.status == 'done' and job.inserted == 5
+    # 4 produk pertama melebihi batas incremental: satu penanda muat ulang penuh
+    assert catalog.bumps == [None, [5]]
+    assert importer.get_job(job.id)['status'] == 'done'
+
+def insert_job(memory_db, job_id, owner, age_seconds):
+    memory_db.get_collection('import_jobs').insert_one({
+        '_id': job_id, 'id': job_id, 'status': 'running', 'errors': [], 'owner': owner,
+        'updated_at': datetime.now() - timedelta(seconds=age_seconds),
+    })
+
+def test_orphaned_jobs_are_marked_failed_when_read(memory_db):
+    finished = subprocess.Popen([sys.executable, '-c', 'pass'])
+    finished.wait()
+    importer, _ = make_importer(memory_db)
+    insert_job(memory_db, 'dead', f'{socket.gethostname()}:{finished.pid}', 1)
+    insert_job(memory_db, 'stale', 'host-lain:1', Config.IMPORT_JOB_STALE_SECONDS + 60)
+    insert_job(memory_db, 'alive', 'host-lain:1', 1)
+
+    dead = importer.get_job('dead')
+    assert dead['status'] == 'failed' and 'berhenti' in dead['errors'][-1]['error']
+    assert 'owner' not in dead and 'updated_at' not in dead
+    assert importer.get_job('stale')['status'] == 'failed'
+    assert importer.get_job('alive')['status'] == 'running'
+    assert memory_db.get_collection('import_jobs').find_one({'_id': 'dead'})['status'] == 'failed'
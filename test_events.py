@@ -0,0 +1,86 @@
+"""
+Test penulisan batch pipeline event aktivitas saat MongoDB gagal
+"""
+
+import pytest
+from src.events import ActivityEventPipeline
+
+class RecordingGraph:
+    def __init__(self):
+        self.rows = []
+
+    def write_activity_batch(self, rows):
+        self.rows.extend(rows)
+
+class FlakyDB:
+    """Database yang menolak `insert_many` ke koleksi tertentu sebanyak `failures` kali"""
+
+    def __init__(self, memory_db, failing, failures):
+        self.memory_db = memory_db
+        self.failing = failing
+        self.failures = failures
+
+    def get_collection(self, name):
+        collection = self.memory_db.get_collection(name)
+        if name != self.failing:
+            return collection
+        db = self
+
+        class Collection:
+            def insert_many(self, docs, ordered=True):
+                if db.failures:
+                    db.failures -= 1
+                    raise ConnectionError('mongod tidak bisa dihubungi')
+                return collection.insert_many(docs, ordered=ordered)
+
+        return Collection()
+
+def pipeline(db, tmp_path, retries):
+    events = ActivityEventPipeline(db, RecordingGraph(), enabled=False, write_retries=retries,
+                                   spill_path=str(tmp_path / 'spill.jsonl'))
+    received = []
+    events.subscribe('recorder', received.extend)
+    return events, received
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr('src.events.time.sleep', lambda seconds: None)
+
+def test_purchase_is_retried(memory_db, tmp_path):
+    events, received = pipeline(FlakyDB(memory_db, 'purchases', failures=2), tmp_path, retries=3)
+    events.submit('purchase', 'u1', 'p1', {'user_id': 'u1', 'product_id': 'p1'})
+
+    assert memory_db.get_collection('purchases').count_documents({}) == 1
+    assert [event['product_id'] for event in received] == ['p1']
+    assert events.stats()['mongo_errors'] == 2
+    assert not (tmp_path / 'spill.jsonl').exists()
+
+def test_failed_purchase_is_spilled_and_replayed(memory_db, tmp_path):
+    events, received = pipeline(FlakyDB(memory_db, 'purchases', failures=2), tmp_path, retries=1)
+    events.submit('purchase', 'u1', 'p1', {'user_id': 'u1', 'product_id': 'p1'})
+
+    assert memory_db.get_collection('purchases').count_documents({}) == 0
+    assert received == []
+    assert events.graph.rows == []
+    assert events.stats()['spilled'] == 1
+
+    assert events.replay_spilled() == 1
+    assert memory_db.get_collection('purchases').count_documents({}) == 1
+    assert [event['product_id'] for event in received] == ['p1']
+    assert [row['product_id'] for row in events.graph.rows] == ['p1']
+    assert not (tmp_path / 'spill.jsonl').exists()
+    assert events.replay_spilled() == 0
+
+def test_only_persisted_events_reach_subscribers(memory_db, tmp_path):
+    events, received = pipeline(FlakyDB(memory_db, 'product_views', failures=1), tmp_path, retries=3)
+    events._write_batch([
+        {'kind': kind, 'user_id': 'u1', 'product_id': pid, 'document': {'product_id': pid},
+         'graph_row': {}, 'at': '2026-01-01T00:00:00', 'enqueued_at': 0.0}
+        for kind, pid in (('view', 'p1'), ('purchase', 'p2'), ('order', 'p3'))
+    ])
+
+    assert [event['product_id'] for event in received] == ['p2', 'p3']
+    assert memory_db.get_collection('product_views').count_documents({}) == 0
+    stats = events.stats()
+    assert stats['write_failed'] == 1
+    assert 'spilled' not in stats
@@ -0,0 +1,95 @@
+"""
+Test leaderboard produk unggulan (counter incremental dan rebuild)
+"""
+
+import threading
+from src.leaderboard import FeaturedLeaderboard
+
+def event(kind, product_id):
+    return {'kind': kind, 'user_id': 'u1', 'product_id': product_id}
+
+def test_record_many_accumulates_counters(memory_db):
+    leaderboard = FeaturedLeaderboard(memory_db)
+    leaderboard.record_many({1: (2, 1), 2: (0, 0)})
+    leaderboard.record_many({1: (1, 0), 3: (0, 1)})
+    assert leaderboard.top() == [
+        {'product_id': '1', 'purchase_count': 3, 'like_count': 1, 'score': 4},
+        {'product_id': '3', 'purchase_count': 0, 'like_count': 1, 'score': 1},
+    ]
+    assert leaderboard.record_many({}) is None
+
+def test_record_events_counts_purchases_and_likes_only(memory_db):
+    leaderboard = FeaturedLeaderboard(memory_db)
+    leaderboard.record_events([
+        event('purchase', 5), event('like', 5), event('view', 5), event('add_to_cart', 6), event('like', 6),
+    ])
+    assert [(e['product_id'], e['score']) for e in leaderboard.top()] == [('5', 2), ('6', 1)]
+
+def test_top_product_ids_orders_by_score_then_id(memory_db):
+    leaderboard = FeaturedLeaderboard(memory_db)
+    leaderboard.record_many({7: (1, 0), 3: (0, 1), 9: (5, 0), 'x': (9, 0)})
+    # ID yang bukan angka dilewati, skor sama diurutkan per product_id
+    assert leaderboard.top_product_ids(10) == [9, 3, 7]
+    assert leaderboard.top_product_ids(2) == [9]
+
+def test_rebuild_replaces_counters_from_history(memory_db):
+    leaderboard = FeaturedLeaderboard(memory_db)
+    leaderboard.record_many({1: (10, 0), 4: (1, 0)})
+    memory_db.get_collection('purchases').insert_many([
+        {'user_id': 'u1', 'product_id': 2}, {'user_id': 'u2', 'product_id': 2}, {'user_id': 'u1', 'product_id': None},
+    ])
+    memory_db.get_collection('user_interactions').insert_many([
+        {'user_id': 'u1', 'product_id': 1, 'interaction_type': 'like'},
+        {'user_id': 'u1', 'product_id': 1, 'interaction_type': 'add_to_cart'},
+    ])
+    assert leaderboard.rebuild() == 2
+    assert leaderboard.top_product_ids(10) == [2, 1]
+    assert 'product_stats_rebuild' not in memory_db.db.list_collection_names()
+    assert 'product_id_unique' in memory_db.get_collection('product_stats').index_information()
+
+class CountingDB:
+    """Membungkus MemoryDB dan menghitung pemanggilan `find` ke product_stats"""
+
+    def __init__(self, memory_db):
+        self.memory_db = memory_db
+        self.finds = 0
+
+    def get_collection(self, name):
+        collection = self.memory_db.get_collection(name)
+        if name != 'product_stats':
+            return collection
+        counter = self
+
+        class Counted:
+            def __getattr__(self, attr):
+                if attr == 'find':
+                    counter.finds += 1
+                return getattr(collection, attr)
+
+        return Counted()
+
+def test_top_product_ids_is_served_from_memory(memory_db):
+    db = CountingDB(memory_db)
+    leaderboard = FeaturedLeaderboard(db, cache_size=5, cache_seconds=60)
+    leaderboard.record_many({1: (1, 0)})
+    assert leaderboard.top_product_ids(5) == [1]
+    assert leaderboard.top_product_ids(3) == [1]
+    assert db.finds == 1
+
+    # Subscriber event memperbarui salinan di memori (di thread pipeline event)
+    leaderboard.record_events([event('purchase', 2), event('purchase', 2)])
+    assert db.finds == 2
+    assert leaderboard.top_product_ids(5) == [2, 1]
+    assert db.finds == 2
+
+def test_expired_top_is_reloaded_in_background(memory_db):
+    leaderboard = FeaturedLeaderboard(memory_db, cache_size=5, cache_seconds=0)
+    leaderboard.record_many({1: (1, 0)})
+    assert leaderboard.top_product_ids() == [1]
+    # Perubahan dari proses lain: pemanggilan berikutnya masih memakai salinan lama
+    FeaturedLeaderboard(memory_db).record_many({2: (5, 0)})
+    assert leaderboard.top_product_ids() == [1]
+    for thread in threading.enumerate():
+        if thread.name == 'leaderboard-reload':
+            thread.join(5)
+    assert leaderboard.top_product_ids() == [2, 1]
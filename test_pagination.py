@@ -0,0 +1,49 @@
+"""
+Test keyset pagination katalog (token cursor dan halaman maju/mundur)
+"""
+
+from src.database import ProductCatalog, decode_cursor, encode_cursor
+
+def test_cursor_round_trip():
+    key = ('Kamera Ünik "Pro"', 42)
+    token = encode_cursor(key)
+    assert '=' not in token
+    assert decode_cursor(token) == key
+
+def test_invalid_cursor_is_rejected():
+    assert decode_cursor(None) is None
+    assert decode_cursor('') is None
+    assert decode_cursor('bukan-base64!!') is None
+    assert decode_cursor(encode_cursor(('nama', 'bukan-int'))) is None
+    assert decode_cursor(encode_cursor((1, 2))) is None
+
+def make_catalog(memory_db, names):
+    products = memory_db.get_collection('products')
+    for i, name in enumerate(names):
+        products.insert_one({'id': i + 1, 'name': name, 'price': 1})
+    return ProductCatalog(memory_db)
+
+def test_pages_forward_and_back_without_gaps(memory_db):
+    names = ['Kabel', 'Adaptor', 'Kabel', 'Mouse', 'Baterai', 'Kabel', 'Speaker']
+    catalog = make_catalog(memory_db, names)
+    seen = []
+    after = None
+    pages = []
+    while True:
+        products, next_key, prev_key = catalog.page(3, after=after)
+        pages.append((products, prev_key))
+        seen += [(p['name'], p['id']) for p in products]
+        if next_key is None:
+            break
+        after = decode_cursor(encode_cursor(next_key))
+    # Nama sama diurutkan per ID, tiap produk muncul tepat sekali
+    assert seen == sorted((name, i + 1) for i, name in enumerate(names))
+    assert pages[0][1] is None
+
+    last_products, last_prev = pages[-1]
+    products, _, prev_key = catalog.page(3, before=last_prev)
+    assert products == pages[-2][0]
+
+def test_empty_page_has_no_cursors(memory_db):
+    catalog = make_catalog(memory_db, [])
+    assert catalog.page(5) == ([], None, None)
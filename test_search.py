@@ -0,0 +1,87 @@
+"""
+Test index pencarian produk (tokenisasi, stemming, ranking BM25)
+"""
+
+from src.search import ProductSearchIndex, stem, tokenize
+
+def product(product_id, name, description='', category='', tags=()):
+    return {'id': product_id, 'name': name, 'description': description, 'category': category, 'tags': list(tags)}
+
+def make_index(*products):
+    index = ProductSearchIndex()
+    index.reset(list(products))
+    return index
+
+def ids(results):
+    return [p['id'] for p in results]
+
+def test_tokenize_normalizes_accents_and_drops_stopwords():
+    assert tokenize('Kamera dan Lénsa untuk Vlog') == ['kamera', 'lensa', 'vlog']
+
+def test_stem_strips_particles_and_possessives():
+    assert stem('baterainya') == 'baterai'
+    assert stem('kameralah') == 'kamera'
+    assert stem('hp') == 'hp'
+
+def test_name_match_ranks_above_description_match():
+    index = make_index(
+        product(1, 'Charger Cepat', description='cocok untuk laptop'),
+        product(2, 'Laptop Gaming', description='layar besar'),
+    )
+    assert ids(index.search('laptop')) == [2, 1]
+
+def test_rare_term_outweighs_common_term():
+    index = make_index(
+        product(1, 'Kabel USB'),
+        product(2, 'Kabel HDMI'),
+        product(3, 'Kabel USB Premium'),
+        product(4, 'Adaptor USB'),
+    )
+    # "hdmi" hanya ada di satu produk, jadi idf-nya lebih besar dari "kabel"
+    assert ids(index.search('kabel hdmi')) == [2]
+    assert ids(index.search('usb'))[-1] == 3
+
+def test_query_is_and_across_tokens():
+    index = make_index(product(1, 'Mouse Wireless'), product(2, 'Keyboard Wireless'))
+    assert ids(index.search('wireless mouse')) == [1]
+    assert index.search('wireless speaker') == []
+
+def test_exact_match_beats_prefix_match():
+    index = make_index(product(1, 'Speakerphone Rapat'), product(2, 'Speaker Bluetooth'))
+    assert ids(index.search('speaker')) == [2, 1]
+
+def test_stemmed_query_matches_base_form():
+    index = make_index(product(1, 'Baterai Cadangan'))
+    assert ids(index.search('baterainya')) == [1]
+
+def test_upsert_and_remove_update_results():
+    index = make_index(product(1, 'Tablet Android'))
+    index.upsert(product(2, 'Tablet Windows'))
+    assert sorted(ids(index.search('tablet'))) == [1, 2]
+    index.upsert(product(1, 'Smartphone Android'))
+    assert ids(index.search('tablet')) == [2]
+    index.remove(2)
+    assert index.search('tablet') == []
+    assert index.stats()['documents'] == 1
+
+def test_limit_and_tie_break_by_name():
+    index = make_index(*(product(i, f'Lampu {name}') for i, name in enumerate(['Zeta', 'Alfa', 'Meja'])))
+    assert [p['name'] for p in index.search('lampu')] == ['Lampu Alfa', 'Lampu Meja', 'Lampu Zeta']
+    assert len(index.search('lampu', limit=2)) == 2
+
+def test_top_k_matches_full_ranking():
+    brands = ['Samsung', 'Xiaomi', 'Asus', 'Lenovo']
+    kinds = ['Laptop', 'Tablet', 'Monitor']
+    index = make_index(*(
+        # Panjang deskripsi berbeda per produk supaya tidak ada skor yang sama
+        product(i, f'{brands[i % 4]} {kinds[i % 3]} {i}', description=f'{kinds[(i + 1) % 3]} ' * (i % 5) + 'paket ' * i)
+        for i in range(120)
+    ))
+    for query in ['laptop', 'samsung tablet', 'lap mon', 'asus']:
+        full = ids(index.search(query, limit=1000))
+        assert ids(index.search(query, limit=7)) == full[:7]
+
+def test_single_character_token_is_not_a_prefix():
+    index = make_index(product(1, 'Speaker Bluetooth'), product(2, 'TV 4 K'))
+    assert index.search('s') == []
+    assert ids(index.search('k')) == [2]
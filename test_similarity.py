@@ -0,0 +1,63 @@
+"""
+Test index kemiripan konten (kategori dan tag)
+"""
+
+import threading
+from src.similarity import ContentSimilarityIndex
+
+def product(product_id, category, tags):
+    return {'id': product_id, 'name': f'Produk {product_id}', 'category': category, 'tags': list(tags)}
+
+def build(*products, top_k=5):
+    index = ContentSimilarityIndex(top_k=top_k)
+    index.reset(list(products))
+    assert index.wait(5)
+    return index
+
+def ids(products):
+    return [p['id'] for p in products]
+
+def test_neighbors_share_category_and_a_tag():
+    index = build(
+        product(1, 'Audio', ['bluetooth', 'tws', 'bass']),
+        product(2, 'Audio', ['bluetooth', 'tws']),
+        product(3, 'Audio', ['bluetooth', 'kabel']),
+        product(4, 'Smartphone', ['bluetooth', 'tws', 'bass']),
+        product(5, 'Audio', ['kabel']),
+        product(6, '', ['bluetooth', 'tws', 'bass']),
+    )
+    assert ids(index.similar_products(1)) == [2, 3]
+    assert index.similar_products(4) == []
+    assert index.similar_products(6) == []
+
+def test_upsert_and_remove_update_neighbors():
+    index = build(
+        product(1, 'Audio', ['bluetooth', 'tws']),
+        product(2, 'Audio', ['bluetooth']),
+        product(3, 'Kamera', ['bluetooth', 'tws']),
+    )
+    index.upsert(product(3, 'Audio', ['bluetooth', 'tws']))
+    assert ids(index.similar_products(1)) == [3, 2]
+    index.remove(3)
+    assert ids(index.similar_products(1)) == [2]
+
+def test_changes_during_background_build_are_replayed():
+    index = ContentSimilarityIndex(top_k=5)
+    release = threading.Event()
+    build_state = index._build
+
+    def slow_build(products):
+        release.wait(5)
+        return build_state(products)
+
+    index._build = slow_build
+    index.reset([product(1, 'Audio', ['tws']), product(2, 'Audio', ['tws'])])
+    # State lama (kosong) tetap dilayani, perubahan langsung berlaku di sana
+    index.upsert(product(3, 'Audio', ['tws']))
+    assert ids(index.similar_products(3)) == []
+    assert index.stats()['building']
+    release.set()
+    assert index.wait(5)
+    assert ids(index.similar_products(3)) == [1, 2]
+    assert ids(index.similar_products(1)) == [2, 3]
+    assert not index.stats()['building']